@@ -0,0 +1 @@
+"""Benchmark the sudoers parser on generated files."""
@@ -0,0 +1,251 @@
+"""Generate large, realistic sudoers files for the benchmarks."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+# The name prefix of the generated aliases of each type
+ALIAS_PREFIXES = {
+    "Cmnd_Alias": "CMNDS",
+    "Host_Alias": "HOSTS",
+    "Runas_Alias": "RUNAS",
+    "User_Alias": "USERS",
+}
+DEFAULTS = [
+    "Defaults env_reset",
+    "Defaults mail_badpass",
+    'Defaults secure_path="/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"',
+    "Defaults:{user} !requiretty",
+    "Defaults@{host} log_output",
+    "Defaults>root !lecture",
+    "Defaults!/usr/bin/tool{num} noexec",
+    'Defaults env_keep += "HOME EDITOR"',
+    "Defaults:%group{group} timestamp_timeout=15",
+]
+COMMANDS = [
+    "/usr/bin/tool{num}",
+    "/usr/sbin/service svc{small} restart",
+    "/opt/app{small}/bin/",
+    "/usr/bin/systemctl * app{small}",
+    '/usr/local/bin/report{num} ""',
+    "/bin/cat /var/log/app{small}/*.log",
+]
+TAGS = ["NOPASSWD:", "PASSWD:", "NOEXEC:", "SETENV:", "NOPASSWD: NOEXEC:"]
+
+
+class _Generator:
+    """Hold the random state and the generated names while writing one file."""
+
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+        self.aliases = {alias: [] for alias in ALIAS_PREFIXES}
+
+    def chance(self, probability: float) -> bool:
+        """Return True with the given probability."""
+        return self.rng.random() < probability
+
+    def leaf(self, alias_type: str) -> str:
+        """Return a random plain member of an alias type."""
+        num = self.rng.randrange(10000)
+        if alias_type == "User_Alias":
+            return f"%group{num % 200}" if num % 10 == 0 else f"user{num:05d}"
+        if alias_type == "Host_Alias":
+            return (
+                f"host{num:05d}.example.com" if num % 20 else f"10.{num % 256}.0.0/16"
+            )
+        if alias_type == "Runas_Alias":
+            return self.rng.choice(
+                ["root", "postgres", "mysql", "www-data", f"svc{num % 100}"]
+            )
+        return self.command(num)
+
+    def command(self, num: int) -> str:
+        """Return a random command, with or without arguments."""
+        return COMMANDS[num % len(COMMANDS)].format(num=num, small=num % 50)
+
+    def member(self, alias_type: str, level: int) -> str:
+        """Return a member for an alias of the given nesting level, an alias of the level below if there is one."""
+        below = self.aliases[alias_type][level - 1] if level else []
+        if below and self.chance(0.3):
+            return self.rng.choice(below)
+        return self.leaf(alias_type)
+
+    def pick(self, alias_type: str, leaf_chance: float) -> str:
+        """Return a random alias of any level, or sometimes a plain member."""
+        levels = [names for names in self.aliases[alias_type] if names]
+        if not levels or self.chance(leaf_chance):
+            return self.leaf(alias_type)
+        return self.rng.choice(self.rng.choice(levels))
+
+    def declaration(
+        self, alias_type: str, name: str, members: list, continuation: float
+    ) -> str:
+        """Return an alias declaration, split over several lines with backslashes some of the time."""
+        if len(members) > 1 and self.chance(continuation):
+            half = len(members) // 2
+            return f"{alias_type} {name} = {', '.join(members[:half])}, \\\n    {', '.join(members[half:])}"
+        return f"{alias_type} {name} = {', '.join(members)}"
+
+    def runas(self) -> str:
+        """Return a random run as list."""
+        return self.rng.choice(
+            [
+                "(root)",
+                f"({self.pick('Runas_Alias', 0.5)})",
+                f"({self.leaf('Runas_Alias')}, {self.leaf('Runas_Alias')})",
+                "(ALL : ALL)",
+            ]
+        )
+
+    def rule(self, commands: int, runas: float, continuation: float) -> str:
+        """Return a random rule."""
+        users = ", ".join(
+            self.pick("User_Alias", 0.5) for _ in range(self.rng.randint(1, 2))
+        )
+        hosts = "ALL" if self.chance(0.4) else self.pick("Host_Alias", 0.3)
+        specs = []
+        for _ in range(self.rng.randint(1, commands)):
+            spec = self.pick("Cmnd_Alias", 0.6)
+            if self.chance(0.1):
+                spec = f"!{spec}"
+            if self.chance(0.3):
+                spec = f"{self.rng.choice(TAGS)} {spec}"
+            if self.chance(runas):
+                spec = f"{self.runas()} {spec}"
+            specs.append(spec)
+
+        if len(specs) > 1 and self.chance(continuation):
+            return f"{users} {hosts} = {', '.join(specs[:1])}, \\\n    {', '.join(specs[1:])}"
+        return f"{users} {hosts} = {', '.join(specs)}"
+
+
+def generate(  # noqa: PLR0913
+    *,
+    seed: int = 0,
+    aliases: int = 100,
+    depth: int = 3,
+    members: int = 6,
+    rules: int = 2000,
+    commands: int = 4,
+    continuation: float = 0.1,
+    runas: float = 0.5,
+    defaults: int = 20,
+) -> Generator[str, None, None]:
+    """
+    Generate the lines of a random, valid sudoers file.
+
+    The same arguments always generate the same file.  Aliases are declared before they are used, and an alias of
+    nesting level *n* only refers to aliases of level *n - 1*, so alias expansions are up to *depth* levels deep and
+    never cyclic.
+
+    :param int seed: The seed of the random generator
+    :param int aliases: The number of aliases of each type
+    :param int depth: The number of alias nesting levels
+    :param int members: The maximum number of members of each alias
+    :param int rules: The number of rules
+    :param int commands: The maximum number of commands of each rule
+    :param float continuation: The fraction of aliases and rules split over several lines
+    :param float runas: The fraction of commands with an explicit run as list
+    :param int defaults: The number of Defaults lines
+
+    :return: A generator of the lines of the file, without line endings
+    :rtype: Generator[str, None, None]
+    """
+    gen = _Generator(random.Random(seed))  # noqa: S311 - not used for security
+
+    yield "# Generated sudoers file"
+    for num in range(defaults):
+        yield DEFAULTS[num % len(DEFAULTS)].format(
+            user=gen.leaf("User_Alias").lstrip("%"),
+            host=gen.leaf("Host_Alias"),
+            num=num,
+            group=num,
+        )
+
+    for alias_type, prefix in ALIAS_PREFIXES.items():
+        yield ""
+        yield f"# {alias_type} declarations"
+        levels = gen.aliases[alias_type]
+        for level in range(depth):
+            levels.append([])
+            count = aliases // depth + (1 if level < aliases % depth else 0)
+            for num in range(count):
+                name = f"{prefix}_{level}_{num}"
+                names = list(
+                    dict.fromkeys(
+                        gen.member(alias_type, level)
+                        for _ in range(gen.rng.randint(1, members))
+                    )
+                )
+                yield gen.declaration(alias_type, name, names, continuation)
+                levels[level].append(name)
+
+    yield ""
+    yield "# User specifications"
+    for num in range(rules):
+        if num % 100 == 0:
+            yield f"# Section {num // 100}"
+        yield gen.rule(commands, runas, continuation)
+
+
+def write(path: str | Path, **kwargs: object) -> int:
+    """
+    Write a generated sudoers file.
+
+    :param path: The path of the file to write
+    :type path: str or Path
+    :param kwargs: The arguments of *generate*
+
+    :return: The number of physical lines written
+    :rtype: int
+    """
+    text = "\n".join(generate(**kwargs)) + "\n"
+    Path(path).write_text(text, encoding="ascii")
+    return text.count("\n")
+
+
+def main(argv: list | None = None) -> int:
+    """Write a generated sudoers file named on the command line."""
+    parser = argparse.ArgumentParser(
+        description="Generate a large, realistic sudoers file."
+    )
+    parser.add_argument("path", help="file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--aliases", type=int, default=100, help="aliases of each type")
+    parser.add_argument("--depth", type=int, default=3, help="alias nesting levels")
+    parser.add_argument(
+        "--members", type=int, default=6, help="maximum members of each alias"
+    )
+    parser.add_argument("--rules", type=int, default=2000)
+    parser.add_argument(
+        "--commands", type=int, default=4, help="maximum commands of each rule"
+    )
+    parser.add_argument(
+        "--continuation",
+        type=float,
+        default=0.1,
+        help="fraction of entries split over lines",
+    )
+    parser.add_argument(
+        "--runas",
+        type=float,
+        default=0.5,
+        help="fraction of commands with a run as list",
+    )
+    parser.add_argument("--defaults", type=int, default=20)
+    args = vars(parser.parse_args(argv))
+
+    lines = write(args.pop("path"), **args)
+    sys.stdout.write(f"{lines} lines written\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
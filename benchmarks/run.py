@@ -0,0 +1,242 @@
+"""Benchmark the parser on generated sudoers files and compare the results with a baseline."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from benchmarks.generate import write
+from pysudoers import AliasTable, Sudoers
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# The options passed to the generator for each benchmarked file
+PROFILES = {
+    "small": {"aliases": 40, "rules": 500},
+    "large": {"aliases": 400, "depth": 4, "members": 8, "rules": 20000},
+}
+# Each metric, and whether a higher value is better
+METRICS = {
+    "parse_lines_per_s": True,
+    "parse_commands_per_s": True,
+    "parse_line_lines_per_s": True,
+    "peak_memory_mb": False,
+    "resolve_cold_us": False,
+    "resolve_warm_us": False,
+}
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    """Return the shortest of *repeat* timings of *func*, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _parse_line_by_line(lines: list) -> int:
+    """Parse logical lines with one *parse_line* call each, then read the data so it is published."""
+    sudoers = Sudoers.from_string("")
+    for line in lines:
+        sudoers.parse_line(line)
+    return len(sudoers.rules)
+
+
+def _command_parts(path: Path) -> list:
+    """Return the commands part of every rule of a file."""
+    prefixes = ("Defaults", *Sudoers.ALIAS_TYPES)
+    with path.open(encoding="ascii") as sudo:
+        return [
+            line.rpartition("=")[2]
+            for _, _, line in Sudoers.logical_lines(sudo)
+            if not line.startswith(prefixes)
+        ]
+
+
+def _resolve_all(sudoers: Sudoers) -> int:
+    """Resolve every alias of every type, returning the number of aliases resolved."""
+    count = 0
+    for alias in Sudoers.ALIAS_TYPES:
+        for name in sudoers._data[alias]:  # noqa: SLF001
+            sudoers._resolve_aliases(alias, name)  # noqa: SLF001
+            count += 1
+    return count
+
+
+def _fresh_tables(sudoers: Sudoers) -> Sudoers:
+    """Return an object holding the data of *sudoers* in new alias tables, with no closure computed yet."""
+    data = dict(sudoers._data)  # noqa: SLF001
+    for alias in Sudoers.ALIAS_TYPES:
+        data[alias] = AliasTable(data[alias])
+    return Sudoers._from_data(data)  # noqa: SLF001
+
+
+def run_profile(options: dict, repeat: int) -> dict:
+    """
+    Generate a file and measure every metric on it.
+
+    :param dict options: The options passed to the generator
+    :param int repeat: The number of times each timing is repeated, the best one is kept
+
+    :return: A map of metric name to value
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "sudoers"
+        lines = write(path, **options)
+
+        results = {}
+        results["parse_lines_per_s"] = lines / _best(lambda: Sudoers(path), repeat)
+
+        commands = _command_parts(path)
+        elapsed = _best(
+            lambda: [Sudoers.parse_commands(part) for part in commands], repeat
+        )
+        results["parse_commands_per_s"] = len(commands) / elapsed
+
+        with path.open(encoding="ascii") as sudo:
+            logical = [line for _, _, line in Sudoers.logical_lines(sudo)]
+        elapsed = _best(lambda: _parse_line_by_line(logical), repeat)
+        results["parse_line_lines_per_s"] = len(logical) / elapsed
+
+        tracemalloc.start()
+        sudoers = Sudoers(path)
+        results["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    # Published alias tables never drop their closures, so each cold run resolves against new tables
+    fresh = iter([_fresh_tables(sudoers) for _ in range(repeat)])
+
+    def cold() -> None:
+        _resolve_all(next(fresh))
+
+    count = _resolve_all(sudoers)
+    results["resolve_cold_us"] = _best(cold, repeat) / count * 1e6
+    results["resolve_warm_us"] = (
+        _best(lambda: _resolve_all(sudoers), repeat) / count * 1e6
+    )
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Return the metrics that regressed by more than *threshold* against the baseline, or that have no baseline.
+
+    :param dict results: A map of profile name to metrics
+    :param dict baseline: The same map from the baseline run
+    :param float threshold: The tolerated relative change, such as 0.25 for 25%
+
+    :return: A list of (profile, metric, value, baseline value) tuples, the baseline value being None when missing
+    :rtype: list
+    """
+    regressions = []
+    for profile, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(profile, {}).get(metric)
+            if not base:
+                # A metric without a baseline is never checked, so it must be recorded with --update
+                regressions.append((profile, metric, value, None))
+                continue
+            change = (value - base) / base
+            worse = -change if METRICS[metric] else change
+            if worse > threshold:
+                regressions.append((profile, metric, value, base))
+
+    return regressions
+
+
+def _environment() -> dict:
+    """Return a description of the machine the benchmarks ran on."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def main(argv: list | None = None) -> int:
+    """
+    Run the benchmarks and compare them with the baseline.
+
+    :param list argv: The command line arguments, *sys.argv* by default
+
+    :return: The exit status, 1 if any metric regressed or has no baseline
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the sudoers parser against a baseline."
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        choices=sorted(PROFILES),
+        help="profiles to run, all by default",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="runs of each timing, the best one is kept",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="baseline file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="tolerated relative regression"
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="record the results as the new baseline"
+    )
+    args = parser.parse_args(argv)
+
+    results = {
+        name: run_profile(PROFILES[name], args.repeat)
+        for name in args.profile or PROFILES
+    }
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = stored.get("results", {})
+    if stored and stored.get("environment") != _environment():
+        sys.stdout.write(
+            f"warning: the baseline was recorded on {stored.get('environment')}\n"
+        )
+
+    for profile, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(profile, {}).get(metric)
+            change = f"{(value - base) / base:+8.1%}" if base else ""
+            sys.stdout.write(f"{profile:8} {metric:22} {value:14.2f} {change}\n")
+
+    if args.update:
+        baseline.update(results)
+        args.baseline.write_text(
+            json.dumps({"environment": _environment(), "results": baseline}, indent=2)
+            + "\n"
+        )
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for profile, metric, value, base in regressions:
+        if base is None:
+            sys.stdout.write(f"MISSING BASELINE {profile} {metric}: {value:.2f}\n")
+        else:
+            sys.stdout.write(
+                f"REGRESSION {profile} {metric}: {value:.2f} against {base:.2f}\n"
+            )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
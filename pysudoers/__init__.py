@@ -2,18 +2,333 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
 import logging
+import mmap
+import os
 import re
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import cache, lru_cache
+from itertools import count
 from pathlib import Path
-from typing import TYPE_CHECKING, ClassVar
+from typing import TYPE_CHECKING, ClassVar, NamedTuple, NoReturn, TypedDict
+
+from pysudoers.groups import is_group_entry
+from pysudoers.models import Alias, CommandSpec, Rule, shared_tuple
+from pysudoers.spans import Span, SpanTable
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Iterable
+    from typing import Self, Unpack
+
+    from pysudoers.groups import MembershipResolver
+    from pysudoers.stats import ParseStats
+
 
+__version__ = "3.0.0"
 
 LOGGER = logging.getLogger(__name__)
 
 
+# Whitespace before or after a comma, colon or equals sign is not significant
+_SEP_SPACE_RE = re.compile(r"\s+(?=[,:=])|(?<=[,:=])\s+")
+# The same whitespace in Defaults lines, whose double quoted values are kept as they are
+_DEFAULTS_SPACE_RE = re.compile(r'("(?:[^"\\]|\\.)*"?)|\s+(?=[,:=])|(?<=[,:=])\s+')
+# A colon separates multiple alias declarations unless it is escaped or follows a digest type
+_ALIAS_SPLIT_RE = re.compile(r"(?<!\\)(?<!sha224|sha256|sha384|sha512):")
+# Each match is one command of a rule, commas inside a run as list or escaped by a backslash do not split commands
+_COMMAND_RE = re.compile(r"(?:[^,(\\]+|\([^)]*\)?|\\,|\\)+")
+_ESCAPED_COMMA_RE = re.compile(r"(\([^)]*\)?)|\\(?=,)")
+_INCLUDE_RE = re.compile(r"^[@#]include(dir)?\s+(.*)$")
+_HASH_INCLUDE_RE = re.compile(r"#include(dir)?\s")
+# This is the regular expression to try to parse out each command per line if it has a run as
+_RUNAS_RE = re.compile(r"\s*\(([\w,!?:]*)\)\s*([\S\s]*)")
+_RUNAS_SPLIT_RE = re.compile(r",|:")
+# The bytes str.strip removes from an ASCII line
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# The statistics of the parse running in the current context, if it is instrumented
+# Every version of the parsed data of any object takes the next number, so generations only ever increase
+_GENERATIONS = count(1)
+
+_ACTIVE_STATS: ContextVar[ParseStats | None] = ContextVar("_ACTIVE_STATS", default=None)
+
+
+def _duplicate_alias_message(line: str) -> str:
+    """Return the message of the error raised for a line declaring an alias that is already declared."""
+    return f"duplicate alias: {_SEP_SPACE_RE.sub('', line)}"
+
+
+def _unescape_comma(match: re.Match) -> str:
+    """Keep a run as list untouched and drop the backslash of an escaped comma."""
+    return match.group(1) or ""
+
+
+@cache
+def _escaped_split_re(delim: str) -> re.Pattern:
+    """Return a regular expression matching either an escaped character or, in group 1, the delimiter."""
+    return re.compile(rf"\\.|({re.escape(delim)})", re.DOTALL)
+
+
+@lru_cache(maxsize=1024)
+def _runas_tuples(runas: str) -> tuple:
+    """Return the shared tuples of all the names and of the groups alone of a run as list, as (run_as, groups)."""
+    _, colon, groups = runas.partition(":")
+    return (
+        shared_tuple(filter(None, _RUNAS_SPLIT_RE.split(runas))),
+        shared_tuple(filter(None, _RUNAS_SPLIT_RE.split(groups))) if colon else (),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _tags_tuple(tags: str) -> tuple:
+    """Return the shared tuple of the colon-separated tags of a command."""
+    return shared_tuple(tags.split(":"))
+
+
+class Entry(NamedTuple):
+    """
+    One entry of a sudoers file, as yielded by *Sudoers.iter_entries*.
+
+    The *kind* is *Defaults*, *Rule*, *Include* or one of the alias types.  The *data* is the Defaults line, the *Rule*,
+    the include dictionary or an *Alias*, each in the same format as the matching properties of *Sudoers*.  The *line*
+    and *end_line* are the first and last physical lines of the entry.
+    """
+
+    kind: str
+    data: object
+    line: int
+    end_line: int
+
+
+class Diagnostic(NamedTuple):
+    """
+    One error recorded by a non-strict parse, see *Sudoers.errors*.
+
+    The *error* is the name of the exception a strict parse raises instead, such as *BadRuleExceptionError*, and the
+    *message* its message.  The *span* is where the line that caused it was declared, None when no single line did.
+    """
+
+    error: str
+    message: str
+    span: Span | None
+
+    @classmethod
+    def from_error(cls, error: Exception, span: Span | None) -> Diagnostic:
+        """Return the diagnostic of an exception."""
+        return cls(type(error).__name__, str(error), span)
+
+    def as_dict(self) -> dict:
+        """Return the diagnostic as a flat dictionary of JSON types, the fields of the span being None if unknown."""
+        span = self.span
+        return {
+            "error": self.error,
+            "message": self.message,
+            "path": None if span is None or span.path is None else str(span.path),
+            "line": None if span is None else span.line,
+            "end_line": None if span is None else span.end_line,
+            "start": None if span is None else span.start,
+            "end": None if span is None else span.end,
+        }
+
+
+def _read_only(self: object, *args: object, **kwargs: object) -> NoReturn:  # noqa: ARG001
+    """Refuse to change a published container."""
+    errmsg = f"{type(self).__name__} is read-only, parse or reload to change the data"
+    raise TypeError(errmsg)
+
+
+class AliasTable(dict):
+    """
+    Hold the aliases of one alias type, mapping each alias name to its list of members.
+
+    The fully expanded member list (closure) of every alias is computed at most once and kept until the table is
+    changed through any of the dict methods, which clears all of the cached closures.  Once *freeze* is called, as it
+    is for every table a *Sudoers* object publishes, any change raises a *TypeError*.
+    """
+
+    __slots__ = ("_closures", "_frozen")
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        """Initialize the table like a dict, a copy of a frozen table can be changed."""
+        super().__init__(*args, **kwargs)
+        self._closures = {}
+        self._frozen = False
+
+    def __reduce__(self) -> tuple:
+        """Pickle the aliases only, the cached closures are rebuilt on demand."""
+        return (self.__class__, (dict(self),))
+
+    @property
+    def frozen(self) -> bool:
+        """Return whether the table can no longer be changed."""
+        return self._frozen
+
+    def freeze(self) -> Self:
+        """Stop any further change to the table and return it."""
+        self._frozen = True
+        return self
+
+    def closure(self, name: str) -> tuple:
+        """
+        Return the ordered, de-duplicated expansion of the provided name.
+
+        Members that are aliases themselves are expanded in place, depth first.  A name that is not an alias expands
+        to itself.
+
+        :param str name: A string representing a name or an alias
+
+        :return: A tuple of one or more names
+        :rtype: tuple
+        """
+        if name not in self:
+            return (name,)
+
+        closures = self._closures
+        if name in closures:
+            return closures[name]
+
+        # Walk the nested aliases without recursion, a stack entry is an alias and an iterator over its members.
+        # Threads expanding the same frozen table at once only ever store the same closures.
+        stack = [(name, iter(self[name]))]
+        visiting = {name}
+        while stack:
+            alias, members = stack[-1]
+            for member in members:
+                if member in self and member not in closures:
+                    if member in visiting:
+                        errmsg = f"alias loop: {member} is a member of itself through {alias}"
+                        raise CyclicAliasExceptionError(errmsg)
+                    visiting.add(member)
+                    stack.append((member, iter(self[member])))
+                    break
+            else:
+                stack.pop()
+                visiting.discard(alias)
+                expanded = {}
+                for member in self[alias]:
+                    expanded.update(dict.fromkeys(closures.get(member, (member,))))
+                closures[alias] = tuple(expanded)
+
+        return closures[name]
+
+    def _changing(self) -> None:
+        """Refuse a change to a frozen table, otherwise forget every cached closure."""
+        if self._frozen:
+            _read_only(self)
+        self._closures.clear()
+
+    def __setitem__(self, key: str, value: list) -> None:
+        """Set an alias and invalidate the closures."""
+        self._changing()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        """Delete an alias and invalidate the closures."""
+        self._changing()
+        super().__delitem__(key)
+
+    def __ior__(self, other: object) -> Self:
+        """Merge in other aliases and invalidate the closures."""
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        """Remove all aliases and invalidate the closures."""
+        self._changing()
+        super().clear()
+
+    def pop(self, *args: object) -> object:
+        """Remove an alias and invalidate the closures."""
+        self._changing()
+        return super().pop(*args)
+
+    def popitem(self) -> tuple:
+        """Remove the last alias and invalidate the closures."""
+        self._changing()
+        return super().popitem()
+
+    def setdefault(self, key: str, default: list | None = None) -> list | None:
+        """Set an alias if it is missing and invalidate the closures."""
+        self._changing()
+        return super().setdefault(key, default)
+
+    def update(self, *args: object, **kwargs: object) -> None:
+        """Merge in other aliases and invalidate the closures."""
+        self._changing()
+        super().update(*args, **kwargs)
+
+
+class FrozenList(list):
+    """
+    Hold the rules, Defaults, include directives or alias members of a sudoers file as a list that cannot change.
+
+    Every method that would change the list raises a *TypeError*.  It still compares equal to a list with the same
+    items, and *list* returns a copy that can be changed.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self) -> tuple:
+        """Pickle the items as a list."""
+        return (self.__class__, (list(self),))
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = reverse = sort = _read_only
+
+
+def _freeze(container: AliasTable | SpanTable | Iterable) -> object:
+    """Return a container of parsed data that cannot change, freezing alias tables in place and copying lists."""
+    if isinstance(container, (AliasTable, SpanTable)):
+        return container.freeze()
+    if isinstance(container, FrozenList):
+        return container
+    return FrozenList(container)
+
+
+class SudoersData(dict):
+    """
+    Hold one published version of the parsed data of a sudoers file, the internal *_data* of a *Sudoers* object.
+
+    Every container is frozen when the object is created, and neither the object nor its containers can be changed
+    afterwards, so any number of threads may read it without locks.  Each object takes the next *generation* number.
+    """
+
+    __slots__ = ("generation",)
+
+    def __init__(self, data: dict) -> None:
+        """
+        Initialize the class, freezing the containers of *data*.
+
+        :param dict data: A map of entry kind to its rules, Defaults, include directives, alias table or spans
+        """
+        super().__init__((key, _freeze(container)) for key, container in data.items())
+        self.generation = next(_GENERATIONS)
+
+    def __reduce__(self) -> tuple:
+        """Pickle the containers only, a new generation is taken when they are loaded."""
+        return (self.__class__, (dict(self),))
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class _SourceOptions(TypedDict, total=False):
+    """The keyword arguments *from_string* and *from_bytes* pass on to *from_lines*."""
+
+    follow_includes: bool
+    max_workers: int | None
+    use_processes: bool
+    strict: bool
+    stats: ParseStats | None
+
+
 class Sudoers:
     """Provide methods for dealing with all aspects of a sudoers file."""
 
@@ -24,29 +339,223 @@ class Sudoers:
         "User_Alias",
     ]
     MIN_LINE_PIECES: ClassVar[int] = 2
-
-    def __init__(self, path: str | Path) -> None:
+    MAX_INCLUDE_DEPTH: ClassVar[int] = 128
+    # The size of the pieces a file is split into by a parallel parse, smaller files are parsed serially
+    PARALLEL_CHUNK_SIZE: ClassVar[int] = 4 * 1024 * 1024
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: str | Path,
+        *,
+        follow_includes: bool = False,
+        max_workers: int | None = None,
+        use_processes: bool = False,
+        parallel: bool = False,
+        strict: bool = True,
+        stats: ParseStats | None = None,
+    ) -> None:
         """
         Initialize the class.
 
         :param string path: The path to the sudoers file
+        :param bool follow_includes: Resolve include directives and merge the included files into this object
+        :param int max_workers: The maximum number of workers used to parse included files or chunks of the file
+        :param bool use_processes: Parse included files in a process pool instead of a thread pool
+        :param bool parallel: Split a large file into chunks parsed in a process pool, see *parse_file*
+        :param bool strict: Raise the first parse error, otherwise record every error and keep parsing, see *errors*
+        :param ParseStats stats: Gather counters and timings of the parse into this object
+        """
+        self._initialize(path)
+        self._strict = strict
+        self._stats = stats
+
+        self.parse_file(parallel=parallel, max_workers=max_workers)
+
+        if follow_includes:
+            self._load_includes(max_workers=max_workers, use_processes=use_processes)
+
+    def _initialize(self, path: str | Path | None) -> None:
+        """
+        Set up the data members of a new object, before anything is parsed.
+
+        :param string path: The path to the sudoers file, None when the data does not come from a file
         """
-        if isinstance(path, Path):
-            self._path = path.resolve()
+        if path is None or isinstance(path, Path):
+            self._path = path.resolve() if path else None
         else:
             self._path = Path(path).resolve()
 
-        # Initialize the internal _data data member
-        self._data = {}
-        self._data["Defaults"] = []
-        self._data["Rules"] = []
-        for alias in self.ALIAS_TYPES:
-            self._data[alias] = {}
+        # Initialize the published data, read through *_data*, and the working copy *parse_line* adds to
+        self._published = SudoersData(self._empty_data())
+        self._pending = None
+        self._pending_lock = threading.Lock()
+
+        # Every logical line parsed from the file along with its entries, and what the file looked like, for reload
+        self._lines = []
+        self._stamp = None
+        self._digest = None
+        self._include_options: dict | None = None
+        self._strict = True
+        self._stats = None
+
+    @classmethod
+    def from_lines(  # noqa: PLR0913
+        cls,
+        lines: Iterable[str],
+        path: str | Path | None = None,
+        *,
+        follow_includes: bool = False,
+        max_workers: int | None = None,
+        use_processes: bool = False,
+        strict: bool = True,
+        stats: ParseStats | None = None,
+    ) -> Sudoers:
+        """
+        Create an object from the lines of a sudoers file instead of reading it from disk.
+
+        :param Iterable lines: The lines of the file, such as a list of strings or an open file object
+        :param string path: The path the lines came from, if any, used as the base of relative includes
+        :param bool follow_includes: Resolve include directives and merge the included files into this object
+        :param int max_workers: The maximum number of workers used to parse included files
+        :param bool use_processes: Parse included files in a process pool instead of a thread pool
+        :param bool strict: Raise the first parse error, otherwise record every error and keep parsing, see *errors*
+        :param ParseStats stats: Gather counters and timings of the parse into this object
+
+        :return: The parsed sudoers object
+        :rtype: Sudoers
+        """
+        return cls._from_source(
+            lines,
+            path,
+            None,
+            follow_includes=follow_includes,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            strict=strict,
+            stats=stats,
+        )
+
+    @classmethod
+    def _from_source(  # noqa: PLR0913
+        cls,
+        lines: Iterable[str],
+        path: str | Path | None,
+        text: str | None,
+        *,
+        follow_includes: bool = False,
+        max_workers: int | None = None,
+        use_processes: bool = False,
+        strict: bool = True,
+        stats: ParseStats | None = None,
+    ) -> Sudoers:
+        """Create an object like *from_lines*, keeping the string holding the lines, if any, for the spans."""
+        sudoers = cls.__new__(cls)
+        sudoers._initialize(path)  # noqa: SLF001
+        sudoers._strict = strict  # noqa: SLF001
+        sudoers._stats = stats  # noqa: SLF001
+
+        sudoers._parse_source(lines, sudoers._path, text)  # noqa: SLF001
+
+        if follow_includes:
+            sudoers._load_includes(max_workers=max_workers, use_processes=use_processes)  # noqa: SLF001
+
+        return sudoers
+
+    @classmethod
+    def _from_data(
+        cls,
+        data: dict,
+        path: str | Path | None = None,
+        *,
+        lines: Iterable[tuple] = (),
+        stamp: tuple | None = None,
+        digest: bytes | None = None,
+    ) -> Sudoers:
+        """
+        Create an object around internal data that was already parsed, such as by another process.
+
+        The *lines*, *stamp* and *digest* describe the file the data was parsed from, so that *reload* only parses
+        what changed since.
+
+        :param dict data: The internal *_data* structure
+        :param string path: The path the data was parsed from, if any
+        :param Iterable lines: The (logical line, entries) tuples the data was built from
+        :param tuple stamp: The stamp of the file when it was read, see *_path_stamp*
+        :param bytes digest: The SHA-256 digest of the contents of the file
+
+        :return: The sudoers object
+        :rtype: Sudoers
+        """
+        sudoers = cls.__new__(cls)
+        sudoers._initialize(path)  # noqa: SLF001
+        sudoers._publish(data)  # noqa: SLF001
+        sudoers._lines = list(lines)  # noqa: SLF001
+        sudoers._stamp = stamp  # noqa: SLF001
+        sudoers._digest = digest  # noqa: SLF001
+
+        return sudoers
+
+    @classmethod
+    def from_string(
+        cls,
+        data: str,
+        path: str | Path | None = None,
+        **kwargs: Unpack[_SourceOptions],
+    ) -> Sudoers:
+        """
+        Create an object from the contents of a sudoers file held in a string.
 
-        self.parse_file()
+        Line endings are handled the same way as when reading a file.  The string is kept to slice the text of the
+        entries from, see *source_text*.  Any other keyword arguments are passed on to *from_lines*.
+
+        :param str data: The contents of the file
+        :param string path: The path the data came from, if any, used as the base of relative includes
+
+        :return: The parsed sudoers object
+        :rtype: Sudoers
+        """
+        return cls._from_source(io.StringIO(data, newline=""), path, data, **kwargs)
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: bytes | bytearray | memoryview | mmap.mmap,
+        path: str | Path | None = None,
+        encoding: str = "ascii",
+        **kwargs: Unpack[_SourceOptions],
+    ) -> Sudoers:
+        """
+        Create an object from the raw contents of a sudoers file.
+
+        Any object supporting the buffer protocol is accepted, including *bytes*, *memoryview* and *mmap* objects,
+        and it is decoded without making an intermediate copy.  Any other keyword arguments are passed on to
+        *from_lines*.
+
+        :param bytes data: The contents of the file
+        :param string path: The path the data came from, if any, used as the base of relative includes
+        :param str encoding: The encoding of the data
+
+        :return: The parsed sudoers object
+        :rtype: Sudoers
+        """
+        return cls.from_string(str(data, encoding), path, **kwargs)
+
+    @classmethod
+    def _empty_data(cls) -> dict:
+        """Return a new, empty, internal *_data* structure whose containers can be changed until it is published."""
+        data = {}
+        data["Defaults"] = []
+        data["Rules"] = []
+        data["Includes"] = []
+        data["Errors"] = []
+        for alias in cls.ALIAS_TYPES:
+            data[alias] = AliasTable()
+        data["Spans"] = SpanTable()
+
+        return data
 
     @property
-    def cmnd_aliases(self) -> list:
+    def cmnd_aliases(self) -> dict:
         """Return the command aliases."""
         return self._data["Cmnd_Alias"]
 
@@ -56,13 +565,38 @@ class Sudoers:
         return self._data["Defaults"]
 
     @property
-    def host_aliases(self) -> list:
+    def errors(self) -> list:
+        """
+        Return the *Diagnostic* of every error recorded by a non-strict parse, in file order.
+
+        A line that fails to parse is skipped and an alias declared again is ignored, the rest of the file is parsed
+        as usual.  The list is always empty after a strict parse, which raises the first error instead.
+        """
+        return self._data["Errors"]
+
+    @property
+    def generation(self) -> int:
+        """
+        Return a number that increases whenever the parsed data changes.
+
+        Parsing, reloading and following includes publish a new version of the data, with a new number.  Numbers are
+        never reused, even across objects, and a *snapshot* keeps the number of the data it holds.
+        """
+        return self._data.generation
+
+    @property
+    def host_aliases(self) -> dict:
         """Return the host aliases."""
         return self._data["Host_Alias"]
 
     @property
-    def path(self) -> Path:
-        """Return the path to the sudoers file as a pathlib.Path object."""
+    def includes(self) -> list:
+        """Return the include directives."""
+        return self._data["Includes"]
+
+    @property
+    def path(self) -> Path | None:
+        """Return the path to the sudoers file as a pathlib.Path object, None if it was not parsed from a file."""
         return self._path
 
     @property
@@ -71,12 +605,17 @@ class Sudoers:
         return self._data["Rules"]
 
     @property
-    def runas_aliases(self) -> list:
+    def stats(self) -> ParseStats | None:
+        """Return the statistics gathered while parsing, None unless a *ParseStats* object was passed."""
+        return self._stats
+
+    @property
+    def runas_aliases(self) -> dict:
         """Return the run as aliases."""
         return self._data["Runas_Alias"]
 
     @property
-    def user_aliases(self) -> list:
+    def user_aliases(self) -> dict:
         """Return the user aliases."""
         return self._data["User_Alias"]
 
@@ -93,109 +632,78 @@ class Sudoers:
         :rtype: Generator[tuple, None, None]
         """
         # We need to keep all line spacing, so use the original line with the index stripped
-        kvline = re.sub(rf"^{alias_key}\s*", "", line)
+        kvline = line[len(alias_key) :].lstrip() if line.startswith(alias_key) else line
 
         # The : character is used to declare multiple aliases
         # Do not split when it is escaped or preceded by a known statement
-        for sub_alias in re.split(r"(?<!\\)(?<!sha224|sha256|sha384|sha512):", kvline):
+        for sub_alias in _ALIAS_SPLIT_RE.split(kvline):
             # Split out the alias key/value
             keyval = cls.escaped_split(sub_alias, "=", maxsplit=1)
             if (len(keyval) != cls.MIN_LINE_PIECES) or (not keyval[1]):
                 errmsg = f"bad alias: {line}"
                 raise BadAliasExceptionError(errmsg)
 
-            # Separate the comma-separated list of values
-            val_list = cls.escaped_split(keyval[1], ",")
+            # Separate the comma-separated list of values, making sure extra whitespace is stripped for each item
+            val_list = [
+                sys.intern(val.strip()) for val in cls.escaped_split(keyval[1], ",")
+            ]
 
             if not val_list:
                 errmsg = f"bad alias: {line}"
                 raise BadAliasExceptionError(errmsg)
-            # Make sure extra whitespace is stripped for each item in the list, then convert back to a list
-            val_list = list(map(str.strip, val_list))
 
             # Return a tuple with the key / value pair
             yield (keyval[0], val_list)
 
     @staticmethod
-    def parse_commands(commands: str) -> list:  # noqa:C901,PLR0912 pylint: disable-msg=too-many-locals
+    def parse_commands(commands: str) -> list:
         """
         Parse all commands from a rule line.
 
         Given a portion of a user specification (rule) line representing the *commands* part of the rule, parse out
-        the components and return the results as a list of dictionaries.  There will be one dictionary per command in
-        the line, and the keys of the dictionary will be *run_as*, *command*, and *tags*.  *run_as* and *tags* will
-        also be lists.
+        the components and return the results as a list of *CommandSpec* objects.  There will be one per command in
+        the line, and each one can be used as a dictionary with the keys *run_as*, *command*, and *tags*.  *run_as* and
+        *tags* will also be lists.
 
         :param str commands: The portion of a rule line representing the commands
 
-        :return: A dictionary describing the commands allowed
-        :rtype: dict
+        :return: A list of *CommandSpec* objects describing the commands allowed
+        :rtype: list
         """
-        # This is the regular expression to try to parse out each command per line if it has a run as
-        runas_re = re.compile(r"\s*\(([\w,!?:]*)\)\s*([\S\s]*)")
         data = []
 
         # runas and tags are running collectors as they are inherited by later commands
         # runas starts as 'root' to account for any commands without an explicit run as list,
         # since they can only appear at the start, before the first explicit run as list
-        runas = ["root"]
+        runas = shared_tuple(["root"])
+        groups = ()
         tags = None
 
         # split the commands along commas without splitting users/groups inside run as parenthesis
         # ex: "root ALL = (ALL, ALL) ALL" shouldn't be split along the comma in parenthesis
-        cmds = []
-        in_parens = False
-        curr_string = ""
-        for char in commands:
-            if in_parens:
-                curr_string += char
-                if char == ")":
-                    in_parens = False
-            elif char == ",":
-                if curr_string[-1] == "\\":
-                    curr_string = curr_string[:-1] + char
-                else:
-                    cmds.append(curr_string)
-                    curr_string = ""
-            elif char == "(":
-                in_parens = True
-                curr_string += "("
-            else:
-                curr_string += char
-        if curr_string != "":
-            # add the last command
-            cmds.append(curr_string)
+        for cmd in _COMMAND_RE.findall(commands):
+            command = cmd
+            if "\\," in command:
+                # Escaped commas outside of a run as list are kept, without their backslash
+                command = _ESCAPED_COMMA_RE.sub(_unescape_comma, command)
 
-        for command in cmds:
-            tmp_data = {}
             tmp_command = None
             # See if we have parentheses (a "run as") in the current command
-            match = runas_re.search(command)
+            match = _RUNAS_RE.search(command)
             if match:
-                # split along commas and colons to get users and groups
-                unfiltered_data = re.split(",|:", match.group(1))
-                # filter out empty string in the case of (: [groups])
-                tmp_data["run_as"] = list(filter(None, unfiltered_data))
-                # Keep track of the latest "run_as"
-                runas = tmp_data["run_as"]
+                # split along commas and colons to get users and groups, and keep track of the latest "run_as"
+                runas, groups = _runas_tuples(match.group(1))
                 tmp_command = match.group(2)
             else:
                 # Else, just treat this like a normal command
-                tmp_data["run_as"] = runas
                 tmp_command = command
 
-            # Now check for tags
-            tmp_data["tags"] = tags
-            cmd_pieces = tmp_command.split(":")
-            # The last element of the list, but return the string, not a 1-element list
-            tmp_data["command"] = cmd_pieces[-1:][0]
-            # tag_index is everything but the last element
-            tag_index = len(cmd_pieces) - 1
-            if tag_index > 0:
-                tmp_data["tags"] = cmd_pieces[:tag_index]
-                tags = tmp_data["tags"]
+            # Now check for tags, everything before the last colon
+            tag_str, colon, tmp_command = tmp_command.rpartition(":")
+            if colon:
+                tags = _tags_tuple(tag_str)
 
-            data.append(tmp_data)
+            data.append(CommandSpec(runas, tags, sys.intern(tmp_command), groups))
 
         return data
 
@@ -209,149 +717,919 @@ class Sudoers:
         limit is applied to the number of fields split.
         """
         field = []
-        buf = []
-        itr = iter(input_str)
-        for char in itr:
-            if maxsplit == 0:
-                buf.append(char)
-            elif char == "\\":
-                try:
-                    buf.append("\\")
-                    buf.append(next(itr))
-                except StopIteration:
-                    pass
-            elif char == delim:
-                field.append("".join(buf))
-                buf = []
-                if maxsplit > 0:
-                    maxsplit -= 1
-            else:
-                buf.append(char)
+        start = 0
+        # A backslash can never be a delimiter since it always escapes the following character
+        if maxsplit != 0 and len(delim) == 1 and delim != "\\":
+            for match in _escaped_split_re(delim).finditer(input_str):
+                if match.group(1) is None:
+                    # An escaped character
+                    continue
+                field.append(input_str[start : match.start()])
+                start = match.end()
+                maxsplit -= 1
+                if maxsplit == 0:
+                    break
 
-        if len(buf) != 0:
-            field.append("".join(buf))
+        if start < len(input_str):
+            field.append(input_str[start:])
 
         return field
 
-    def parse_rule(self, line: str) -> dict:
+    @classmethod
+    def parse_rule(cls, line: str) -> Rule | dict:
         """
         Parse a rule line into its component parts.
 
-        Given a user specification (rule) line, parse out the components and return the results in a dictionary.  The
-        keys of the returned dictionary will be *users*, *hosts*, and *commands*.
+        Given a user specification (rule) line, parse out the components and return the results as a *Rule*.  The rule
+        can be used as a dictionary with the keys *users*, *hosts*, and *commands*.  An include directive returns an
+        empty dictionary.
 
         :param str line: The line from the sudoers file to be parsed
 
-        :return: A dictionary describing the rule line
-        :rtype: dict
+        :return: A *Rule* describing the rule line
+        :rtype: Rule
         """
-        rule_re = re.compile(r"([\S\s]*)=([\S\s]*)")
-        include_re = re.compile(r"^(@|#)include(dir)?\s+")
-        rule = {}
-
         # Ignore includes for now
-        if include_re.search(line):
+        if _INCLUDE_RE.search(line):
             return {}
 
-        # Do a basic check for rule syntax
-        match = rule_re.search(line)
-        if not match:
+        # Do a basic check for rule syntax, the commands start after the last equals sign
+        userhosts, equals, commands = line.rpartition("=")
+        if not equals:
             errmsg = f"invalid rule: {line}"
             raise BadRuleExceptionError(errmsg)
 
         # Split to the left of the = into user and host parts
-        pieces = match.group(1).split()
+        pieces = userhosts.split()
+        if len(pieces) < cls.MIN_LINE_PIECES:
+            errmsg = f"invalid rule: {line}"
+            raise BadRuleExceptionError(errmsg)
 
-        rule["users"] = pieces[0].split(",")
-        rule["hosts"] = pieces[1].split(",")
+        # User and host names repeat across many rules, so they are interned and stored once
+        return Rule(
+            tuple(map(sys.intern, pieces[0].split(","))),
+            tuple(map(sys.intern, pieces[1].split(","))),
+            tuple(cls._timed_parse_commands(commands)),
+        )
 
-        # Parse the commands
-        rule["commands"] = self.parse_commands(match.group(2))
+    @classmethod
+    def _timed_parse_commands(cls, commands: str) -> list:
+        """Call *parse_commands*, adding the time it takes to the statistics of an instrumented parse."""
+        stats = _ACTIVE_STATS.get()
+        if stats is None:
+            return cls.parse_commands(commands)
 
-        return rule
+        started = time.perf_counter()
+        parsed = cls.parse_commands(commands)
+        stats.times["parse_commands"] += time.perf_counter() - started
+        return parsed
 
-    def parse_line(self, line: str) -> None:
+    @classmethod
+    def _parse_entries(cls, line: str) -> Generator[tuple, None, None]:
         """
-        Parse one line of the sudoers file.
+        Parse one logical line of the sudoers file into the entries it declares.
 
-        Take one line from the sudoers file and parse it.  The contents of the line are stored in the internal
-        *_data* member according to the type of the line.  There is no return value from this function.
+        :param str line: The line from the sudoers file to be parsed
+
+        :return: A generator of (kind, data) tuples, where kind is *Include*, *Defaults*, *Rule* or one of the alias
+                 types.  The data is an include dictionary without its position, the Defaults line, a *Rule* or an
+                 *Alias* respectively.
+        :rtype: Generator[tuple, None, None]
         """
-        defaults_re = re.compile(r"^Defaults")
+        match = _INCLUDE_RE.search(line)
+        if match:
+            yield (
+                "Include",
+                {
+                    "directive": "includedir" if match.group(1) else "include",
+                    "path": match.group(2).strip(),
+                },
+            )
+            return
+
+        if line.startswith("Defaults"):
+            # Trim the same spaces as below, except inside quoted values
+            yield (
+                "Defaults",
+                _DEFAULTS_SPACE_RE.sub(lambda match: match.group(1) or "", line),
+            )
+            return
 
         # Trim unnecessary spaces (no spaces before/after commas, colons, and equals signs)
-        line = re.sub(r"\s*([,:=])\s*", r"\g<1>", line)
+        line = _SEP_SPACE_RE.sub("", line)
 
-        pieces = line.split()
-        if pieces[0] in self.ALIAS_TYPES:
+        pieces = line.split(None, 1)
+        if pieces[0] in cls.ALIAS_TYPES:
             index = pieces[0]
 
             # Raise an exception if there aren't at least 2 elements after the split
-            if len(pieces) < self.MIN_LINE_PIECES:
+            if len(pieces) < cls.MIN_LINE_PIECES:
                 errmsg = f"bad alias: {line}"
                 raise BadAliasExceptionError(errmsg)
 
-            for key, members in self.parse_alias(index, line):
-                if key in self._data[index]:
-                    errmsg = f"duplicate alias: {line}"
-                    raise DuplicateAliasExceptionError(errmsg)
-
-                self._data[index][key] = members
-                # Debugging output
-                LOGGER.info("%s: %s => %s", index, key, members)
-        elif defaults_re.search(line):
-            self._data["Defaults"].append(line)
+            for key, members in cls.parse_alias(index, line):
+                yield (index, Alias(key, tuple(members)))
         else:
             # Everything that doesn't match the above aliases is assumed to be a rule
-            rule = self.parse_rule(line)
-            self._data["Rules"].append(rule)
+            yield ("Rule", cls.parse_rule(line))
+
+    @property
+    def _data(self) -> SudoersData:
+        """Return the published internal data, first publishing the lines *parse_line* added since it was last read."""
+        if self._pending is not None:
+            with self._pending_lock:
+                if self._pending is not None:
+                    self._publish(self._pending)
+                    self._pending = None
+        return self._published
+
+    def _working_data(self) -> dict:
+        """Return a copy of the current data whose rules, Defaults, includes and spans can be added to, to publish."""
+        data = dict(self._data)
+        for key in ("Defaults", "Rules", "Includes", "Errors"):
+            data[key] = list(data[key])
+        data["Spans"] = data["Spans"].copy()
+        return data
+
+    def _publish(self, data: dict) -> None:
+        """
+        Make *data* the current internal data, freezing its containers.
+
+        Readers see either the previous data or the new one, never a mix of both, as publishing is a single
+        assignment.  Changes to the data must not be made concurrently.
+
+        :param dict data: The internal data to publish
+        """
+        self._published = data if isinstance(data, SudoersData) else SudoersData(data)
 
-    def parse_file(self) -> None:
+    def snapshot(self) -> Sudoers:
+        """
+        Return an object holding the current data, which later parsing and reloading of this object do not change.
+
+        The data is shared, not copied, as it never changes once published.  Threads answering several questions from
+        one consistent version of the data should work on a snapshot.
+
+        :return: The sudoers object
+        :rtype: Sudoers
+        """
+        snapshot = self._from_data(self._data)
+        snapshot._path = self._path  # noqa: SLF001
+        return snapshot
+
+    def parse_line(self, line: str) -> None:
+        """
+        Parse one line of the sudoers file.
+
+        Take one line from the sudoers file and parse it.  The contents of the line are added to a working copy of the
+        internal *_data* member according to the type of the line, which is published the next time the data is
+        read.  The copy is made by the first line after the data was published and the lines that follow add to it, so
+        feeding a file to this method one line at a time takes linear time, as long as the data is not read in
+        between.  Nothing is changed if the line fails to parse.  There is no return value from this function.
+        """
+        entries = self._parse_line_entries(line)
+        with self._pending_lock:
+            data = self._pending
+            if data is None:
+                data = self._working_data()
+            if self._strict and not isinstance(entries, Exception):
+                # The working copy holds the lines before this one, so a bad line must be found before storing it
+                self._check_duplicates(data, entries, line)
+            source = data["Spans"].add_source(None, line)
+            start = len(line) - len(line.lstrip())
+            row = (source, 1, 1, start, len(line.rstrip()))
+            self._store_entries(data, entries, line, row, strict=self._strict)
+            self._pending = data
+
+    @classmethod
+    def _check_duplicates(cls, data: dict, entries: Iterable[tuple], line: str) -> None:
+        """Raise the error *_store_entries* raises for an alias of *entries* that is already declared."""
+        declared = set()
+        for kind, entry in entries:
+            if kind in cls.ALIAS_TYPES:
+                if entry.name in data[kind] or (kind, entry.name) in declared:
+                    raise DuplicateAliasExceptionError(_duplicate_alias_message(line))
+                declared.add((kind, entry.name))
+
+    def _parse_line_entries(self, line: str) -> tuple | Exception:
+        """
+        Parse one logical line into the tuple of its entries, see *_parse_entries*.
+
+        :param str line: The line from the sudoers file to be parsed
+
+        :return: The (kind, data) tuples, or the parse error when the object is not strict
+        :rtype: tuple or Exception
+        """
+        try:
+            return tuple(self._parse_entries(line))
+        except (BadAliasExceptionError, BadRuleExceptionError) as err:
+            if self._strict:
+                raise
+            return err
+
+    @staticmethod
+    def _store_entries(
+        data: dict,
+        entries: Iterable[tuple] | Exception,
+        line: str,
+        row: tuple,
+        *,
+        strict: bool = True,
+    ) -> None:
+        """
+        Store the entries parsed from one line in an internal *_data* structure.
+
+        :param dict data: The internal data to store the entries in
+        :param entries: The (kind, data) tuples parsed from the line, or the error raised when parsing it
+        :type entries: Iterable or Exception
+        :param str line: The line the entries were parsed from, used in error messages
+        :param tuple row: The source number, line numbers and offsets of the line, stored as the span of each entry
+        :param bool strict: Raise errors, otherwise record them in the data and skip the entries they concern
+        """
+        spans = data["Spans"]
+        if isinstance(entries, Exception):
+            if strict:
+                raise entries
+            data["Errors"].append(Diagnostic.from_error(entries, spans.span(row)))
+            return
+
+        for kind, entry in entries:
+            name = None
+            if kind == "Rule":
+                data["Rules"].append(entry)
+            elif kind == "Defaults":
+                data["Defaults"].append(entry)
+            elif kind == "Include":
+                # Includes are recorded along with the number of rules and defaults that precede them
+                data["Includes"].append(
+                    {
+                        **entry,
+                        "rules": len(data["Rules"]),
+                        "defaults": len(data["Defaults"]),
+                    }
+                )
+            else:
+                key, members = entry
+                table = data[kind]
+                if key in table:
+                    errmsg = _duplicate_alias_message(line)
+                    if strict:
+                        raise DuplicateAliasExceptionError(errmsg)
+                    error = DuplicateAliasExceptionError(errmsg)
+                    data["Errors"].append(Diagnostic.from_error(error, spans.span(row)))
+                    continue
+
+                if table.frozen:
+                    # The published table may be read at any time, so a copy is changed instead
+                    table = data[kind] = AliasTable(table)
+                table[key] = FrozenList(members)
+                name = key
+                # Debugging output
+                LOGGER.info("%s: %s => %s", kind, key, members)
+            spans.add(kind, name, row)
+
+    def parse_file(
+        self, *, parallel: bool = False, max_workers: int | None = None
+    ) -> None:
         """
         Parse the sudoers file.
 
         Parse the entire sudoers file.  The results are stored in the internal *_data* member.  There is no return
         value from this function.
+
+        With *parallel*, a file of at least two *PARALLEL_CHUNK_SIZE* chunks is memory-mapped and split into chunks
+        that end between logical lines, which are parsed in a process pool of at most *max_workers* processes.  The
+        entries are then stored in file order, so the result, including duplicate alias errors and spans, is the same
+        as for a serial parse.  Parses gathering statistics are always serial.
+
+        :param bool parallel: Parse the chunks of a large file in a process pool
+        :param int max_workers: The maximum number of processes used by a parallel parse
         """
-        backslash_re = re.compile(r"\\$")
+        path = self._path
+        if path is None:
+            errmsg = "cannot parse sudoers data that was not read from a file"
+            raise ValueError(errmsg)
+
+        # Take the stamp first, so that a change made while the file is read is seen by the next reload
+        self._stamp = self._file_stamp()
+        if parallel and self._stats is None:
+            with path.open("rb") as sudo:
+                size = os.fstat(sudo.fileno()).st_size
+                # An empty file cannot be mapped
+                if size >= 2 * self.PARALLEL_CHUNK_SIZE:
+                    with mmap.mmap(sudo.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        bounds = self.chunk_bounds(data, self.PARALLEL_CHUNK_SIZE)
+                    self._parse_chunks(bounds, max_workers)
+                    return
+
+        # Line endings are kept so that the offsets of the spans count the bytes of the file
+        with path.open(encoding="ascii", newline="") as sudo:
+            self._parse_source(sudo, path)
 
-        with self._path.open(encoding="ascii") as sudo:
-            for line in sudo:
-                # Strip whitespace from beginning and end
-                linestr = line.strip()
-                # Ignore all comments
-                if linestr.startswith("#"):
-                    continue
-                # Ignore all empty lines
-                if not linestr:
+    @staticmethod
+    def chunk_bounds(data: bytes | mmap.mmap, size: int) -> list:
+        """
+        Split the contents of a sudoers file into chunks of about *size* bytes that each hold whole logical lines.
+
+        A chunk only ends after a newline closing a line that does not end with a backslash, so it never splits a
+        continued line.  Comments ending with a backslash do not continue, but are not split after either.
+
+        :param bytes data: The contents of the file, such as a memory-mapped file
+        :param int size: The minimum size of a chunk, except for the last one
+
+        :return: The list of (start, end) byte offsets of the chunks
+        :rtype: list
+        """
+        bounds = []
+        start = 0
+        total = len(data)
+        while start < total:
+            end = total
+            newline = data.find(b"\n", start + size - 1)
+            while newline != -1:
+                line = data[data.rfind(b"\n", start, newline) + 1 : newline]
+                if not line.rstrip(_ASCII_WHITESPACE).endswith(b"\\"):
+                    end = newline + 1
+                    break
+                newline = data.find(b"\n", newline + 1)
+            bounds.append((start, end))
+            start = end
+        return bounds
+
+    def _parse_chunks(self, bounds: list, max_workers: int | None) -> None:
+        """
+        Parse chunks of the sudoers file in a process pool and store their entries in file order, like *parse_lines*.
+
+        :param list bounds: The (start, end) byte offsets of the chunks, as returned by *chunk_bounds*
+        :param int max_workers: The maximum number of processes
+        """
+        working = self._working_data()
+        source = working["Spans"].add_source(self._path)
+        parsed = []
+        debug = LOGGER.isEnabledFor(logging.DEBUG)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            starts, ends = zip(*bounds, strict=True)
+            # Chunks count their lines from 1, the lines of the previous chunks are added to them
+            numbers = 0
+            for start, (lines, count) in zip(
+                starts,
+                pool.map(
+                    _parse_chunk,
+                    [self._path] * len(bounds),
+                    starts,
+                    ends,
+                    [self._strict] * len(bounds),
+                ),
+                strict=True,
+            ):
+                for linestr, entries, (first, last, offset, end) in lines:
+                    if debug:
+                        LOGGER.debug(linestr)
+                    row = (
+                        source,
+                        first + numbers,
+                        last + numbers,
+                        offset + start,
+                        end + start,
+                    )
+                    # The lines before a bad line are stored first, so an earlier duplicate alias is raised instead
+                    self._store_entries(
+                        working, entries, linestr, row, strict=self._strict
+                    )
+                    parsed.append((linestr, entries))
+                numbers += count
+
+        self._publish(working)
+        self._lines.extend(parsed)
+
+    def parse_lines(self, lines: Iterable[str]) -> None:
+        """
+        Parse the lines of a sudoers file.
+
+        Comments and empty lines are skipped and lines ending with a backslash are joined with the lines that follow
+        them before being parsed.  The results are added to a copy of the internal *_data* member, which is
+        published once every line is parsed, so nothing is changed if any line fails to parse, unless the object is
+        not strict.  There is no return value from this function.
+
+        The spans of the entries count lines and offsets from the first of *lines*, without a path.
+
+        :param Iterable lines: The lines of the file, such as an open file object
+        """
+        self._parse_source(lines, None)
+
+    def _parse_source(
+        self, lines: Iterable[str], path: Path | None, text: str | None = None
+    ) -> None:
+        """
+        Parse the lines of a sudoers file like *parse_lines*, recording the source of their spans.
+
+        :param Iterable lines: The lines of the file, such as an open file object
+        :param Path path: The file the lines were read from, None if they were not read from a file
+        :param str text: The string holding the lines, kept to slice the text of the spans from
+        """
+        working = self._working_data()
+        source = working["Spans"].add_source(path, text)
+        parsed = []
+        if self._stats is not None:
+            self._parse_lines_instrumented(working, parsed, lines, self._stats, source)
+        else:
+            # Checking the level once avoids a logging call for every line
+            debug = LOGGER.isEnabledFor(logging.DEBUG)
+            for start, end, offset, end_offset, linestr in self._logical_spans(lines):
+                if debug:
+                    LOGGER.debug(linestr)
+                entries = self._parse_line_entries(linestr)
+                row = (source, start, end, offset, end_offset)
+                self._store_entries(working, entries, linestr, row, strict=self._strict)
+                parsed.append((linestr, entries))
+
+        self._publish(working)
+        self._lines.extend(parsed)
+
+    def _parse_lines_instrumented(
+        self,
+        working: dict,
+        collected: list,
+        lines: Iterable[str],
+        stats: ParseStats,
+        source: int,
+    ) -> None:
+        """
+        Parse the lines of a sudoers file like *parse_lines*, gathering statistics along the way.
+
+        :param dict working: The internal data to store the entries in
+        :param list collected: The list receiving the (logical line, entries) tuples
+        :param Iterable lines: The lines of the file, such as an open file object
+        :param ParseStats stats: The object receiving the statistics
+        :param int source: The number of the source of the spans of the entries
+        """
+        clock = time.perf_counter
+        logical = self._logical_spans(lines)
+        token = _ACTIVE_STATS.set(stats)
+        try:
+            while True:
+                started = clock()
+                item = next(logical, None)
+                read = clock()
+                stats.times["read"] += read - started
+                if item is None:
+                    break
+
+                start, end, offset, end_offset, linestr = item
+                entries = self._parse_line_entries(linestr)
+                parsed = clock()
+                row = (source, start, end, offset, end_offset)
+                self._store_entries(working, entries, linestr, row, strict=self._strict)
+                collected.append((linestr, entries))
+                stats.times["store"] += clock() - parsed
+                if isinstance(entries, Exception):
                     continue
+                stats.record(entries[0][0], start, end, linestr, parsed - read)
+
+                if stats.callback is not None:
+                    for kind, data in entries:
+                        stats.callback(Entry(kind, data, start, end))
+        finally:
+            _ACTIVE_STATS.reset(token)
+
+    def _file_stamp(self) -> tuple | None:
+        """Return the modification time, size and inode of the sudoers file, None if it cannot be read."""
+        return self._path_stamp(self._path)
+
+    @staticmethod
+    def _path_stamp(path: Path | None) -> tuple | None:
+        """Return the modification time, size and inode of a file, None if it cannot be read."""
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino, stat.st_dev)
+
+    def reload(self) -> bool:
+        """
+        Parse the sudoers file again if it changed since it was last parsed.
 
-                if backslash_re.search(linestr):
-                    concatline = linestr.rstrip("\\")
-                    while True:
-                        # Get the next line from the file
-                        nextline = next(sudo).strip()
-                        # Make sure we don't go past EOF
-                        if not nextline:
-                            break
-                        # Add the next line to the previous line
-                        concatline += nextline.rstrip("\\")
-                        # Break when the next line doesn't end with a backslash
-                        if not backslash_re.search(nextline):
-                            break
-
-                    linestr = concatline
+        The file is only read when its modification time, size or inode changed, and only parsed again when the hash
+        of its contents changed.  Its logical lines are then compared to the previous ones: lines that did not change
+        reuse their previous entries, wherever they moved, and only new or changed lines are parsed.  Alias tables
+        that end up unchanged are kept along with their memoized expansions.  When includes were followed, the
+        included files are read again.  If anything fails to parse, the object is left unchanged.  Edits to comments
+        and whitespace only publish the new spans of the entries, and are not reported as a change.
 
+        :return: True if the contents changed and were reloaded, False otherwise
+        :rtype: bool
+        """
+        if self._path is None:
+            errmsg = "cannot reload sudoers data that was not read from a file"
+            raise ValueError(errmsg)
+
+        stamp = self._file_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return False
+
+        with self._path.open("rb") as sudo:
+            raw = sudo.read()
+        digest = hashlib.sha256(raw).digest()
+        if digest == self._digest:
+            self._stamp = stamp
+            return False
+
+        lines, rows, changed = self._reparse_lines(
+            io.StringIO(str(raw, "ascii"), newline="")
+        )
+        # Edits to comments and whitespace only do not count as a change, but they can move the entries
+        reloaded = lines != self._lines
+        self._replace_lines(lines, rows)
+        if reloaded:
+            LOGGER.info(
+                "Reloaded %s: %d of %d lines parsed", self._path, changed, len(lines)
+            )
+
+        self._stamp = stamp
+        self._digest = digest
+        return reloaded
+
+    def _reparse_lines(self, source: Iterable[str]) -> tuple:
+        """
+        Parse the logical lines of *source*, reusing the entries of the lines that were already parsed.
+
+        :param Iterable source: The lines of the file
+
+        :return: The list of (logical line, entries) tuples, the list of (first line, last line, start offset, end
+                 offset) tuples of the same lines and the number of lines that had to be parsed
+        :rtype: tuple
+        """
+        # Parsing a logical line only depends on its text, so unchanged lines keep their entries
+        known = dict(self._lines)
+        lines = []
+        rows = []
+        changed = 0
+        for *row, linestr in self._logical_spans(source):
+            entries = known.get(linestr)
+            if entries is None:
                 LOGGER.debug(linestr)
-                self.parse_line(linestr)
+                entries = self._parse_line_entries(linestr)
+                changed += 1
+            lines.append((linestr, entries))
+            rows.append(row)
+
+        return (lines, rows, changed)
+
+    def _replace_lines(self, lines: list, rows: list) -> None:
+        """
+        Replace the internal data with the entries of *lines*, keeping the alias tables that did not change.
+
+        :param list lines: The (logical line, entries) tuples of the file
+        :param list rows: The (first line, last line, start offset, end offset) tuples of the lines, for the spans
+        """
+        data = self._empty_data()
+        source = data["Spans"].add_source(self._path)
+        for (linestr, entries), row in zip(lines, rows, strict=True):
+            self._store_entries(
+                data, entries, linestr, (source, *row), strict=self._strict
+            )
+        if self._include_options is not None:
+            data = self._merge_includes(data, self._include_options)
+        for alias in self.ALIAS_TYPES:
+            # An unchanged table keeps the alias expansions it has memoized
+            if data[alias] == self._data[alias]:
+                data[alias] = self._data[alias]
+
+        self._publish(data)
+        self._lines = lines
+
+    @staticmethod
+    def logical_lines(lines: Iterable[str]) -> Generator[tuple, None, None]:
+        """
+        Return the logical lines of a sudoers file.
+
+        Comments and empty lines are skipped and lines ending with a backslash are joined with the lines that follow
+        them.
+
+        :param Iterable lines: The lines of the file, such as an open file object
+
+        :return: A generator of (first line number, last line number, logical line) tuples, line numbers starting at 1
+        :rtype: Generator[tuple, None, None]
+        """
+        for number, end, _, _, linestr in Sudoers._logical_spans(lines):
+            yield (number, end, linestr)
+
+    @staticmethod
+    def _logical_spans(lines: Iterable[str]) -> Generator[tuple, None, None]:
+        """
+        Return the logical lines of a sudoers file like *logical_lines*, along with their offsets.
+
+        The offsets count the characters of *lines* up to the first and just past the last character of each logical
+        line, so lines should keep their line endings to match the offsets of the file.
+
+        :param Iterable lines: The lines of the file, such as an open file object
+
+        :return: A generator of (first line number, last line number, start offset, end offset, logical line) tuples
+        :rtype: Generator[tuple, None, None]
+        """
+        sudo = enumerate(lines, start=1)
+        offset = 0
+        for number, line in sudo:
+            begin = offset
+            offset += len(line)
+            # Strip whitespace from beginning and end
+            linestr = line.strip()
+            # Ignore all comments, except for the legacy "#include" directives
+            if linestr.startswith("#") and not _HASH_INCLUDE_RE.match(linestr):
+                continue
+            # Ignore all empty lines
+            if not linestr:
+                continue
+
+            start = begin + len(line) - len(line.lstrip())
+            end = number
+            stop = begin + len(line.rstrip())
+            if linestr.endswith("\\"):
+                pieces = [linestr.rstrip("\\")]
+                while True:
+                    # Get the next line from the file, making sure we don't go past EOF
+                    nextnumber, nextline = next(sudo, (end, ""))
+                    begin = offset
+                    offset += len(nextline)
+                    stripped = nextline.strip()
+                    if not stripped:
+                        break
+                    # Add the next line to the previous line
+                    end = nextnumber
+                    stop = begin + len(nextline.rstrip())
+                    pieces.append(stripped.rstrip("\\"))
+                    # Break when the next line doesn't end with a backslash
+                    if not stripped.endswith("\\"):
+                        break
+
+                linestr = "".join(pieces)
+
+            yield (number, end, start, stop, linestr)
+
+    @classmethod
+    def iter_entries(
+        cls, source: str | Path | Iterable[str]
+    ) -> Generator[Entry, None, None]:
+        """
+        Parse a sudoers file lazily, yielding each entry as soon as it is parsed.
+
+        Nothing is kept once an entry is yielded, so arbitrarily large files can be streamed in constant memory.  For
+        the same reason, aliases are not checked for duplicates.
+
+        :param source: The path to the sudoers file, or its lines such as an open file object
+        :type source: str or Path or Iterable
+
+        :return: A generator of *Entry* tuples, see *Entry* for the data of each kind of entry
+        :rtype: Generator[Entry, None, None]
+        """
+        if isinstance(source, (str, Path)):
+            with Path(source).open(encoding="ascii") as sudo:
+                yield from cls.iter_entries(sudo)
+            return
+
+        rules = 0
+        defaults = 0
+        for start, end, linestr in cls.logical_lines(source):
+            for kind, data in cls._parse_entries(linestr):
+                if kind == "Rule":
+                    rules += 1
+                elif kind == "Defaults":
+                    defaults += 1
+                elif kind == "Include":
+                    data["rules"] = rules
+                    data["defaults"] = defaults
+                yield Entry(kind, data, start, end)
+
+    @staticmethod
+    def include_paths(include: dict, parent: Path | None) -> list:
+        """
+        Return the files named by an include directive, in the order sudo reads them.
+
+        Relative paths are resolved against the directory of the including file and *%h* is replaced by the short
+        host name.  For an *includedir*, the directory is listed in lexical order and any file names that end in *~*
+        or contain a *.* are skipped, just as sudo does.  A missing directory yields no files.
+
+        :param dict include: An include entry as stored in the *includes* property
+        :param Path parent: The path of the file containing the directive, None to resolve against the current directory
+
+        :return: A list of paths to parse
+        :rtype: list
+        """
+        target = include["path"]
+        if len(target) > 1 and target.startswith('"') and target.endswith('"'):
+            target = target[1:-1]
+        target = target.replace("\\ ", " ").replace(
+            "%h", socket.gethostname().split(".")[0]
+        )
+
+        path = Path(target)
+        if not path.is_absolute():
+            path = (parent.parent if parent else Path.cwd()) / path
+
+        if include["directive"] == "include":
+            return [path.resolve()]
+
+        if not path.is_dir():
+            return []
+
+        return [
+            entry.resolve()
+            for entry in sorted(path.iterdir(), key=lambda entry: entry.name)
+            if not entry.name.endswith("~")
+            and "." not in entry.name
+            and entry.is_file()
+        ]
+
+    def _load_includes(
+        self, max_workers: int | None = None, *, use_processes: bool = False
+    ) -> None:
+        """
+        Parse all files included from this sudoers file and publish them merged into the internal *_data* member.
+
+        :param int max_workers: The maximum number of workers used to parse included files
+        :param bool use_processes: Parse included files in a process pool instead of a thread pool
+        """
+        self._include_options = {
+            "max_workers": max_workers,
+            "use_processes": use_processes,
+        }
+        self._publish(self._merge_includes(self._data, self._include_options))
+
+    def _merge_includes(self, data: dict, options: dict) -> dict:
+        """
+        Parse all files included from this sudoers file, as set up by *_load_includes*, and merge them with *data*.
+
+        The include tree is discovered one level at a time, with every newly found file of a level parsed
+        concurrently.  Once everything is parsed, the files are merged depth-first in sudo's order so that rules and
+        defaults keep their relative positions and aliases are checked for duplicates across all files.
+
+        :param dict data: The internal data of this sudoers file on its own
+        :param dict options: The *max_workers* and *use_processes* options of the pool, as set by *_load_includes*
+
+        :return: The internal data of every file merged, in a new structure
+        :rtype: dict
+        """
+        parsed: dict[Path | None, dict | Exception] = {self._path: data}
+        targets = {}
+        pool_cls = (
+            ProcessPoolExecutor if options["use_processes"] else ThreadPoolExecutor
+        )
+
+        with pool_cls(max_workers=options["max_workers"]) as pool:
+            pending = [(self._path, data)]
+            while pending:
+                found = []
+                for path, fragment in pending:
+                    targets[path] = [
+                        self.include_paths(inc, path) for inc in fragment["Includes"]
+                    ]
+                    found.extend(
+                        child
+                        for paths in targets[path]
+                        for child in paths
+                        if child not in parsed
+                    )
+
+                found = list(dict.fromkeys(found))
+                fragments = list(
+                    pool.map(_parse_fragment, found, [self._strict] * len(found))
+                )
+                parsed.update(zip(found, fragments, strict=True))
+                # The files that could not be read include nothing, their errors are recorded when merging
+                pending = [
+                    (path, fragment)
+                    for path, fragment in zip(found, fragments, strict=True)
+                    if not isinstance(fragment, Exception)
+                ]
+
+        merged = self._empty_data()
+        origins = {}
+
+        self._merge_include(merged, origins, parsed, targets, (self._path,))
+        return merged
+
+    def _merge_include(
+        self, merged: dict, origins: dict, parsed: dict, targets: dict, stack: tuple
+    ) -> None:
+        """
+        Merge the parsed data of the last file in *stack*, and everything it includes, into *merged*.
+
+        :param dict merged: The accumulator receiving the merged data
+        :param dict origins: A map of (alias type, alias name) to the file that declared it
+        :param dict parsed: A map of file path to the parsed data of that file
+        :param dict targets: A map of file path to the list of files named by each of its include directives
+        :param tuple stack: The chain of files that led to this one, used to detect include loops
+        """
+        path = stack[-1]
+        if len(stack) > self.MAX_INCLUDE_DEPTH:
+            errmsg = f"include nesting too deep: {path}"
+            self._include_error(merged, BadIncludeExceptionError(errmsg), None)
+            return
+
+        data = parsed[path]
+        merged["Errors"].extend(data["Errors"])
+        spans = merged["Spans"]
+        base = spans.adopt(data["Spans"])
+        for alias in self.ALIAS_TYPES:
+            for key, members in data[alias].items():
+                if key in merged[alias]:
+                    errmsg = f"duplicate alias: {alias} {key} in {path} (first declared in {origins[alias, key]})"
+                    error = DuplicateAliasExceptionError(errmsg)
+                    self._include_error(merged, error, data["Spans"].get(alias, key))
+                    continue
+                merged[alias][key] = members
+                spans.add_alias(data["Spans"], base, alias, key)
+                origins[alias, key] = path
+
+        rule_pos = 0
+        default_pos = 0
+        for position, (include, children) in enumerate(
+            zip(data["Includes"], targets[path], strict=True)
+        ):
+            merged["Rules"].extend(data["Rules"][rule_pos : include["rules"]])
+            merged["Defaults"].extend(
+                data["Defaults"][default_pos : include["defaults"]]
+            )
+            spans.extend(data["Spans"], base, "Rule", rule_pos, include["rules"])
+            spans.extend(
+                data["Spans"], base, "Defaults", default_pos, include["defaults"]
+            )
+            spans.extend(data["Spans"], base, "Include", position, position + 1)
+            rule_pos = include["rules"]
+            default_pos = include["defaults"]
+
+            merged["Includes"].append(
+                {
+                    **include,
+                    "rules": len(merged["Rules"]),
+                    "defaults": len(merged["Defaults"]),
+                    "files": children,
+                }
+            )
+
+            for child in children:
+                if child in stack:
+                    errmsg = f"include loop: {child} included from {path}"
+                    error = BadIncludeExceptionError(errmsg)
+                    self._include_error(
+                        merged, error, data["Spans"].get("Include", position)
+                    )
+                    continue
+                if isinstance(parsed[child], Exception):
+                    self._include_error(
+                        merged, parsed[child], data["Spans"].get("Include", position)
+                    )
+                    continue
+                self._merge_include(merged, origins, parsed, targets, (*stack, child))
+
+        merged["Rules"].extend(data["Rules"][rule_pos:])
+        merged["Defaults"].extend(data["Defaults"][default_pos:])
+        spans.extend(data["Spans"], base, "Rule", rule_pos)
+        spans.extend(data["Spans"], base, "Defaults", default_pos)
+
+    def _include_error(self, merged: dict, error: Exception, span: Span | None) -> None:
+        """Raise an error found while merging included files, or record it in *merged* when the object is not strict."""
+        if self._strict:
+            raise error
+        merged["Errors"].append(Diagnostic.from_error(error, span))
+
+    def span(self, kind: str, key: int | str) -> Span | None:
+        """
+        Return where an entry was declared: its file, physical lines and offsets.
+
+        :param str kind: The kind of the entry, *Rule*, *Defaults*, *Include* or one of the alias types
+        :param key: The position of the entry in *rules*, *defaults* or *includes*, or the name of an alias
+        :type key: int or str
+
+        :return: The span of the entry, None if there is no such entry
+        :rtype: Span or None
+        """
+        return self._data["Spans"].get(kind, key)
+
+    def source_text(self, kind: str, key: int | str) -> str | None:
+        """
+        Return the text that declared an entry, continuation lines included, as it appears in its source.
+
+        The text is only sliced when asked for, from the string the entry was parsed from when it was parsed with
+        *from_string*, *from_bytes* or *parse_line*, or else read from its file.
+
+        :param str kind: The kind of the entry, *Rule*, *Defaults*, *Include* or one of the alias types
+        :param key: The position of the entry in *rules*, *defaults* or *includes*, or the name of an alias
+        :type key: int or str
+
+        :return: The text, None if there is no such entry or its text was neither kept nor read from a file
+        :rtype: str or None
+        """
+        return self._data["Spans"].text(kind, key)
 
     def _resolve_aliases(self, alias_type: str, name: str) -> list:
         """
         For the provided alias type, resolve the provided name for any aliases that may exist.
 
-        This function is recursive in nature.  If the provided name is not an existing alias, it is returned (as a
-        list). If the name is an alias of the provided type, the function is called again on each of the names derived
-        from the alias in case there are nested aliases.
+        If the provided name is not an existing alias, it is returned (as a list). If the name is an alias of the
+        provided type, it is expanded along with any nested aliases.  Expansions are memoized per alias table until the
+        table changes, and an alias that is (indirectly) a member of itself raises a *CyclicAliasExceptionError*.
 
         :param str alias_type: The alias type for which we are resolving
         :param str name: A string representing a name or another alias
@@ -359,23 +1637,7 @@ class Sudoers:
         :return: A list of one or more name
         :rtype: list
         """
-        data = []
-
-        # See if the name provided is an alias or not.
-        if name in self._data[alias_type]:
-            namematch = self._data[alias_type][name]
-
-            # For each name in the list, try to resolve that name as well, and then add it to the accumulator
-            for expanded_name in namematch:
-                resolved = self._resolve_aliases(alias_type, expanded_name)
-                # Cycle through the resolved list and remove any duplicates
-                for res in resolved:
-                    if res not in data:
-                        data.append(res)
-        else:
-            data = [name]
-
-        return data
+        return list(self._data[alias_type].closure(name))
 
     def resolve_command(self, command: str) -> list:
         """Resolve the provided command for any aliases that may exist."""
@@ -389,18 +1651,101 @@ class Sudoers:
         """Resolve the provided run as user for any aliases that may exist."""
         return self._resolve_aliases("Runas_Alias", runas)
 
-    def resolve_user(self, user: str) -> list:
-        """Resolve the provided user for any aliases that may exist."""
-        return self._resolve_aliases("User_Alias", user)
+    def resolve_user(
+        self, user: str, resolver: MembershipResolver | None = None
+    ) -> list:
+        """
+        Resolve the provided user for any aliases that may exist.
+
+        With a *resolver*, group, GID and netgroup entries are also replaced by their members, sorted by name, unless
+        the resolver does not know them, in which case they are kept as they are.
+
+        :param str user: A string representing a user or another alias
+        :param MembershipResolver resolver: Resolves the members of groups and netgroups
+
+        :return: A list of one or more names, without duplicates when a resolver is used
+        :rtype: list
+        """
+        names = self._resolve_aliases("User_Alias", user)
+        if resolver is None:
+            return names
+
+        resolved = {}
+        for name in names:
+            members = resolver.members(name) if is_group_entry(name) else None
+            if members is None:
+                resolved[name] = None
+            else:
+                resolved.update(dict.fromkeys(sorted(members)))
+        return list(resolved)
+
+
+def _parse_fragment(path: Path, strict: bool = True) -> dict | Exception:  # noqa: FBT001, FBT002
+    """
+    Parse a single sudoers file without following its includes and return its internal data.
+
+    This is a module-level function so that it can be sent to a process pool.  When the object is not strict, the error
+    raised by a file that cannot be read is returned instead, to be recorded where the file is included.
+    """
+    try:
+        return Sudoers(path, strict=strict)._data  # noqa: SLF001
+    except (OSError, UnicodeDecodeError) as err:
+        if strict:
+            raise
+        return err
+
+
+def _parse_chunk(path: Path, start: int, end: int, strict: bool = True) -> tuple:  # noqa: FBT001, FBT002
+    """
+    Parse the logical lines between two byte offsets of a sudoers file, without storing their entries.
+
+    This is a module-level function so that it can be sent to a process pool.  The entries of a line that fails to
+    parse are replaced by the error, to be raised or recorded in file order, and a strict parse stops there.
+
+    :return: The list of (logical line, entries or error, (first line, last line, start offset, end offset)) tuples,
+             counting from the start of the chunk, and the number of lines in the chunk
+    :rtype: tuple
+    """
+    with (
+        path.open("rb") as sudo,
+        mmap.mmap(sudo.fileno(), 0, access=mmap.ACCESS_READ) as data,
+    ):
+        text = str(data[start:end], "ascii")
+    # Lines end with any of the line endings, as when the file is read
+    count = text.count("\n") + text.count("\r") - text.count("\r\n")
+
+    lines = []
+    for *row, linestr in Sudoers._logical_spans(io.StringIO(text, newline="")):  # noqa: SLF001
+        try:
+            entries = tuple(Sudoers._parse_entries(linestr))  # noqa: SLF001
+        except (BadAliasExceptionError, BadRuleExceptionError) as err:
+            lines.append((linestr, err, tuple(row)))
+            if strict:
+                break
+        else:
+            lines.append((linestr, entries, tuple(row)))
+    return (lines, count)
 
 
 class BadAliasExceptionError(Exception):
     """Provide a custom exception type to be raised when an alias is malformed."""
 
 
+class BadDefaultsExceptionError(Exception):
+    """Provide a custom exception type to be raised when a Defaults line is malformed."""
+
+
+class BadIncludeExceptionError(Exception):
+    """Provide a custom exception type to be raised when include directives loop or nest too deeply."""
+
+
 class BadRuleExceptionError(Exception):
     """Provide a custom exception type to be raised when a rule is malformed."""
 
 
+class CyclicAliasExceptionError(Exception):
+    """Provide a custom exception type to be raised when an alias is a member of itself."""
+
+
 class DuplicateAliasExceptionError(Exception):
     """Provide a custom exception type to be raised when an alias is malformed."""
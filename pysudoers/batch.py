@@ -0,0 +1,219 @@
+"""Parse many sudoers files at once across a pool of processes."""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from pysudoers import (
+    BadAliasExceptionError,
+    BadRuleExceptionError,
+    DuplicateAliasExceptionError,
+    Sudoers,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+# The errors reported for a single file instead of stopping the whole batch
+PARSE_ERRORS = (
+    BadAliasExceptionError,
+    BadRuleExceptionError,
+    DuplicateAliasExceptionError,
+    UnicodeDecodeError,
+)
+
+
+class BatchResult(NamedTuple):
+    """
+    The outcome of parsing one of the distinct contents found in a batch of files.
+
+    *paths* lists every file that had these contents, in the order they were given.  Exactly one of *sudoers* and
+    *error* is set.  A file that could not be read has no *digest* and its *error* is the *OSError*.  When the batch
+    is not strict, the errors of each line are in the *errors* of the *sudoers* object instead.
+    """
+
+    digest: str | None
+    paths: list
+    sudoers: Sudoers | None
+    error: Exception | None
+
+
+def expand_paths(patterns: Iterable[str | Path]) -> Generator[Path, None, None]:
+    """
+    Return the files named by a list of paths and glob patterns.
+
+    In a pattern, two asterisks match any number of directories.  Directories matched by a pattern are skipped.
+
+    :param Iterable patterns: The paths and glob patterns
+
+    :return: A generator of the paths, each pattern's matches in sorted order
+    :rtype: Generator[Path, None, None]
+    """
+    for pattern in patterns:
+        if glob.has_magic(str(pattern)):
+            for match in sorted(glob.glob(str(pattern), recursive=True)):  # noqa: PTH207
+                path = Path(match)
+                if path.is_file():
+                    yield path
+        else:
+            yield Path(pattern)
+
+
+def _parse_chunk(chunk: list, encoding: str, strict: bool = True) -> list:  # noqa: FBT001, FBT002
+    """
+    Parse a chunk of (digest, path, contents) tuples in a worker process.
+
+    :return: A list of (digest, internal data, error) tuples
+    :rtype: list
+    """
+    results = []
+    for digest, path, raw in chunk:
+        try:
+            data = Sudoers.from_bytes(raw, path, encoding, strict=strict)._data  # noqa: SLF001
+        except PARSE_ERRORS as err:
+            results.append((digest, None, err))
+        else:
+            results.append((digest, data, None))
+
+    return results
+
+
+def parse_many(
+    paths: Iterable[str | Path],
+    *,
+    max_workers: int | None = None,
+    chunksize: int = 16,
+    encoding: str = "ascii",
+    strict: bool = True,
+) -> Generator[BatchResult, None, None]:
+    """
+    Parse many sudoers files in a process pool, yielding the results as they complete.
+
+    Every file is read and hashed first, and files with identical contents are only parsed once.  The distinct
+    contents are sent to the pool in chunks of *chunksize* files as soon as they are read, so parsing overlaps the
+    reading of the remaining files.  A file that fails to parse yields a result holding the error, any other
+    exception stops the batch.  Without *strict*, every file is parsed to the end and the *errors* of its *Sudoers*
+    object list every line that failed, so a single pass finds every problem.
+
+    :param Iterable paths: The paths and glob patterns of the files, see *expand_paths*
+    :param int max_workers: The number of worker processes, the number of CPUs by default
+    :param int chunksize: The number of distinct files sent to a worker at a time
+    :param str encoding: The encoding of the files
+    :param bool strict: Stop parsing a file at its first error, otherwise record every error
+
+    :return: A generator of *BatchResult* tuples, in completion order
+    :rtype: Generator[BatchResult, None, None]
+    """
+    groups = {}
+    futures = []
+    chunk = []
+    pool = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        for path in expand_paths(paths):
+            try:
+                raw = path.read_bytes()
+            except OSError as err:
+                yield BatchResult(None, [path], None, err)
+                continue
+
+            digest = hashlib.sha256(raw).hexdigest()
+            if digest in groups:
+                groups[digest].append(path)
+                continue
+
+            groups[digest] = [path]
+            chunk.append((digest, path, raw))
+            if len(chunk) >= chunksize:
+                futures.append(pool.submit(_parse_chunk, chunk, encoding, strict))
+                chunk = []
+
+        if chunk:
+            futures.append(pool.submit(_parse_chunk, chunk, encoding, strict))
+
+        for future in as_completed(futures):
+            for digest, data, error in future.result():
+                group = groups[digest]
+                sudoers = None if data is None else Sudoers._from_data(data, group[0])  # noqa: SLF001
+                yield BatchResult(digest, group, sudoers, error)
+    finally:
+        # Stop any work that is left when the caller stops early
+        pool.shutdown(cancel_futures=True)
+
+
+def _summary(result: BatchResult) -> dict:
+    """Return the JSON summary of a batch result."""
+    summary = {"sha256": result.digest, "paths": [str(path) for path in result.paths]}
+    sudoers = result.sudoers
+    # A file is parsed exactly when it has no error
+    if sudoers is None:
+        summary["error"] = f"{type(result.error).__name__}: {result.error}"
+        return summary
+
+    summary["rules"] = len(sudoers.rules)
+    summary["defaults"] = len(sudoers.defaults)
+    summary["aliases"] = sum(len(sudoers._data[alias]) for alias in Sudoers.ALIAS_TYPES)  # noqa: SLF001
+    summary["includes"] = len(sudoers.includes)
+    if sudoers.errors:
+        summary["errors"] = [diagnostic.as_dict() for diagnostic in sudoers.errors]
+    return summary
+
+
+def main(argv: list | None = None) -> int:
+    """
+    Parse the files named on the command line and write one JSON summary per distinct file to standard output.
+
+    With *--keep-going*, the summary of a file lists every error found in it, with its location, under *errors*.
+
+    :param list argv: The command line arguments, *sys.argv* by default
+
+    :return: The exit status, 1 if any file failed to parse or had errors
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="pysudoers-batch",
+        description="Parse many sudoers files in parallel, parsing identical files once.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="sudoers files or glob patterns, ** matches directories",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=16, help="files sent to a worker at a time"
+    )
+    parser.add_argument("--encoding", default="ascii", help="encoding of the files")
+    parser.add_argument(
+        "-k",
+        "--keep-going",
+        action="store_true",
+        help="report every error of each file instead of stopping at the first",
+    )
+    args = parser.parse_args(argv)
+
+    status = 0
+    for result in parse_many(
+        args.paths,
+        max_workers=args.workers,
+        chunksize=args.chunksize,
+        encoding=args.encoding,
+        strict=not args.keep_going,
+    ):
+        if result.sudoers is None or result.sudoers.errors:
+            status = 1
+        sys.stdout.write(json.dumps(_summary(result)) + "\n")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Cache parsed sudoers files on disk, keyed by their contents."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+from pysudoers import LOGGER, Sudoers, __version__
+
+
+class ParseCache:
+    """
+    Store the parsed data of sudoers files in a directory, so unchanged files are loaded instead of parsed.
+
+    Each entry is the pickled internal data and logical lines of one file, named after the SHA-256 of the library
+    version, the format of the entries, the encoding and the file contents, so any change to them misses the cache.
+    The directory is shared safely by any number of processes: entries are written to a temporary file and atomically
+    renamed into place, and entries that disappear or cannot be loaded are treated as misses.  Whenever the entries
+    grow past *max_size* bytes, the least recently used ones are removed.
+
+    Entries are unpickled when loaded, so the cache directory must only be writable by trusted users.  It is created
+    readable by its owner only.
+    """
+
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+    # The version of the pickled data, changed whenever its classes change so entries written before are never loaded
+    FORMAT = 3
+    SUFFIX = ".pickle"
+    # Temporary files older than this, in seconds, were left behind by a writer that died and can be removed
+    STALE_TEMP_AGE = 3600
+
+    def __init__(
+        self, directory: str | Path | None = None, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        """
+        Initialize the class.
+
+        :param directory: The cache directory, *pysudoers* under $XDG_CACHE_HOME or ~/.cache by default
+        :type directory: str or Path or None
+        :param int max_size: The maximum total size of the entries, in bytes
+        """
+        if directory is None:
+            directory = (
+                Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+                / "pysudoers"
+            )
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def key(cls, data: bytes, encoding: str = "ascii") -> str:
+        """
+        Return the cache key of the contents of a file.
+
+        :param bytes data: The raw contents of the file
+        :param str encoding: The encoding the contents are decoded with
+
+        :return: The hexadecimal SHA-256 of the library version, the format, the encoding and the contents
+        :rtype: str
+        """
+        digest = hashlib.sha256(f"{__version__}\0{cls.FORMAT}\0{encoding}\0".encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        """Return the path of the entry of a key."""
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> dict | None:
+        """
+        Return the parsed data stored under a key, marking it as recently used.
+
+        :param str key: The cache key
+
+        :return: The internal data and logical lines of the parsed file, under *data* and *lines*, None if it is not
+                 cached
+        :rtype: dict or None
+        """
+        entry = self._entry(key)
+        try:
+            with entry.open("rb") as cached:
+                data = pickle.load(cached)  # noqa: S301 - the cache directory is trusted
+        except FileNotFoundError:
+            return None
+        except (
+            OSError,
+            EOFError,
+            pickle.UnpicklingError,
+            # Raised by entries pickled from classes that have since changed
+            AttributeError,
+            ImportError,
+            IndexError,
+            TypeError,
+        ) as err:
+            LOGGER.warning("Removing unreadable cache entry %s: %s", entry, err)
+            entry.unlink(missing_ok=True)
+            return None
+
+        # The modification time orders the entries for eviction
+        with contextlib.suppress(OSError):
+            os.utime(entry)
+
+        return data
+
+    def put(self, key: str, data: dict) -> None:
+        """
+        Store parsed data under a key, then evict entries if the cache grew too large.
+
+        :param str key: The cache key
+        :param dict data: The internal data and logical lines of the parsed file, under *data* and *lines*
+        """
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        handle, tmpname = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as tmp:
+                pickle.dump(data, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+            # Readers in other processes only ever see a complete entry
+            Path(tmpname).replace(self._entry(key))
+        except BaseException:
+            Path(tmpname).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in *max_size*, and any stale temporary files."""
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            scan = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+
+        for item in scan:
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                continue
+            if item.name.endswith(self.SUFFIX):
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+            elif (
+                item.name.endswith(".tmp") and now - stat.st_mtime > self.STALE_TEMP_AGE
+            ):
+                Path(item.path).unlink(missing_ok=True)
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            # Another process may be evicting the same entry
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for entry in self.directory.glob(f"*{self.SUFFIX}"):
+            entry.unlink(missing_ok=True)
+
+    def load(
+        self,
+        path: str | Path,
+        *,
+        encoding: str = "ascii",
+        follow_includes: bool = False,
+        max_workers: int | None = None,
+        use_processes: bool = False,
+    ) -> Sudoers:
+        """
+        Return a sudoers object for a file, parsing it only if its contents are not cached.
+
+        Only the file itself is cached, included files are parsed as usual when *follow_includes* is set.
+
+        :param path: The path to the sudoers file
+        :type path: str or Path
+        :param str encoding: The encoding of the file
+        :param bool follow_includes: Resolve include directives and merge the included files into the object
+        :param int max_workers: The maximum number of workers used to parse included files
+        :param bool use_processes: Parse included files in a process pool instead of a thread pool
+
+        :return: The parsed sudoers object
+        :rtype: Sudoers
+        """
+        # Take the stamp first, so that a change made while the file is read is seen by the next reload
+        stamp = Sudoers._path_stamp(Path(path))  # noqa: SLF001
+        raw = Path(path).read_bytes()
+        key = self.key(raw, encoding)
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+            sudoers = Sudoers.from_bytes(raw, path, encoding)
+            entry = {"data": sudoers._data, "lines": sudoers._lines}  # noqa: SLF001
+            self.put(key, entry)
+        else:
+            self.hits += 1
+        # The entries of the logical lines are kept, so a reload only parses the lines that changed
+        sudoers = Sudoers._from_data(  # noqa: SLF001
+            entry["data"],
+            path,
+            lines=entry["lines"],
+            stamp=stamp,
+            digest=hashlib.sha256(raw).digest(),
+        )
+
+        if follow_includes:
+            sudoers._load_includes(max_workers=max_workers, use_processes=use_processes)  # noqa: SLF001
+
+        return sudoers
@@ -0,0 +1,246 @@
+"""Parse Defaults lines and work out the settings that apply to a command."""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, NamedTuple
+
+from pysudoers import BadDefaultsExceptionError
+from pysudoers.policy import evaluate, leaf_matchers, positive_names
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from pysudoers import Sudoers
+
+# The binding of a Defaults line, the list it is bound to and the parameters
+_DEFAULTS_RE = re.compile(r"Defaults(?:([:@>!])(\S+))?(?:\s+(.*))?", re.DOTALL)
+# Parameters are separated by commas outside of double quotes
+_PARAMETER_LIST_RE = re.compile(r'(?:"(?:[^"\\]|\\.)*"?|[^,"])+')
+_PARAMETER_RE = re.compile(r"(!*)\s*(\w+)(?:\s*([+-]?=)\s*(.*))?", re.DOTALL)
+_INTEGER_RE = re.compile(r"[+-]?\d+")
+_FLOAT_RE = re.compile(r"[+-]?\d*\.\d+")
+
+# The bindings in the order sudo applies them, later ones override earlier ones
+BINDINGS = ("", "@", ":", ">", "!")
+# Parameters holding a list of values, which can be added to with += and removed from with -=
+LIST_PARAMETERS = frozenset({"env_check", "env_delete", "env_keep"})
+# Integer parameters written in octal
+OCTAL_PARAMETERS = frozenset({"umask"})
+
+
+class Parameter(NamedTuple):
+    """
+    One parameter of a Defaults line.
+
+    The *operator* is None for a flag, whose *value* is True, or False when negated with "!".  Otherwise it is "=",
+    "+=" or "-=" and *value* is a tuple of strings for list operators and list parameters, an int or float for numbers
+    and a string, without its quotes, for anything else.
+    """
+
+    name: str
+    operator: str | None
+    value: object
+
+
+class DefaultsEntry(NamedTuple):
+    """
+    One Defaults line.
+
+    The *binding* is "" for global Defaults, or ":" (users), "@" (hosts), ">" (run as users) or "!" (commands), and
+    *targets* is the list it is bound to.  *parameters* is a tuple of *Parameter*.
+    """
+
+    binding: str
+    targets: tuple
+    parameters: tuple
+
+
+def _value(name: str, operator: str, raw: str) -> object:
+    """Return the typed value of a parameter."""
+    if len(raw) > 1 and raw.startswith('"') and raw.endswith('"'):
+        raw = raw[1:-1].replace('\\"', '"')
+    elif operator != "=" or name in LIST_PARAMETERS:
+        raw = raw.strip('"')
+
+    if operator != "=" or name in LIST_PARAMETERS:
+        return tuple(raw.split())
+    if _INTEGER_RE.fullmatch(raw):
+        return int(raw, 8 if name in OCTAL_PARAMETERS else 10)
+    if _FLOAT_RE.fullmatch(raw):
+        return float(raw)
+    return raw
+
+
+def parse_defaults(line: str) -> DefaultsEntry:
+    """
+    Parse a Defaults line, as stored in *Sudoers.defaults*, into its binding, targets and parameters.
+
+    :param str line: The Defaults line
+
+    :return: The parsed line
+    :rtype: DefaultsEntry
+    """
+    match = _DEFAULTS_RE.fullmatch(line.strip())
+    if not match or not match.group(3):
+        errmsg = f"bad defaults: {line}"
+        raise BadDefaultsExceptionError(errmsg)
+
+    binding = match.group(1) or ""
+    targets = tuple(match.group(2).split(",")) if binding else ()
+
+    parameters = []
+    for item in _PARAMETER_LIST_RE.findall(match.group(3)):
+        param = _PARAMETER_RE.fullmatch(item.strip())
+        if not param:
+            errmsg = f"bad defaults parameter {item!r}: {line}"
+            raise BadDefaultsExceptionError(errmsg)
+
+        negations, name, operator, raw = param.groups()
+        if operator is None:
+            parameters.append(Parameter(name, None, len(negations) % 2 == 0))
+        elif negations:
+            errmsg = f"bad defaults parameter {item!r}: {line}"
+            raise BadDefaultsExceptionError(errmsg)
+        else:
+            parameters.append(Parameter(name, operator, _value(name, operator, raw)))
+
+    return DefaultsEntry(binding, targets, tuple(parameters))
+
+
+def apply_parameter(settings: dict, parameter: Parameter) -> None:
+    """
+    Apply one parameter to a dictionary of settings.
+
+    :param dict settings: The settings, mapping parameter names to values
+    :param Parameter parameter: The parameter to apply
+    """
+    if parameter.operator in {None, "="}:
+        settings[parameter.name] = parameter.value
+        return
+
+    current = settings.get(parameter.name)
+    current = current if isinstance(current, tuple) else ()
+    values = (
+        parameter.value if isinstance(parameter.value, tuple) else (parameter.value,)
+    )
+    if parameter.operator == "+=":
+        settings[parameter.name] = tuple(dict.fromkeys((*current, *values)))
+    else:
+        settings[parameter.name] = tuple(
+            value for value in current if value not in values
+        )
+
+
+class DefaultsIndex:
+    """
+    Index the Defaults of a parsed sudoers file to look up the settings in effect for a command.
+
+    Global Defaults are applied once when the index is built.  Bound Defaults are indexed by the user, host and run as
+    names they name after alias expansion, so a lookup only evaluates the entries that may apply.  Results are cached
+    per query.  Only the settings made by the file are returned, sudo's compiled-in defaults are not known.  The index
+    reflects the *Sudoers* object at the time it was built.
+    """
+
+    def __init__(self, sudoers: Sudoers, cache_size: int = 4096) -> None:
+        """
+        Initialize the class.
+
+        :param Sudoers sudoers: The parsed sudoers file
+        :param int cache_size: The number of lookups to keep the results of
+        """
+        self._entries = [parse_defaults(line) for line in sudoers.defaults]
+        self._aliases = {
+            ":": dict(sudoers.user_aliases),
+            "@": dict(sudoers.host_aliases),
+            ">": dict(sudoers.runas_aliases),
+            "!": dict(sudoers.cmnd_aliases),
+        }
+
+        self._global = {}
+        # Per binding, a map of name to entry positions and the positions of entries that may match any name
+        self._by_name = {binding: {} for binding in BINDINGS[1:]}
+        self._any = {binding: set() for binding in BINDINGS[1:]}
+        for order, entry in enumerate(self._entries):
+            if not entry.binding:
+                for parameter in entry.parameters:
+                    apply_parameter(self._global, parameter)
+            elif entry.binding == "!":
+                self._any["!"].add(order)
+            else:
+                names, wildcard = positive_names(
+                    entry.targets, self._aliases[entry.binding]
+                )
+                if wildcard:
+                    self._any[entry.binding].add(order)
+                for name in names:
+                    key = name.lower() if entry.binding == "@" else name
+                    self._by_name[entry.binding].setdefault(key, set()).add(order)
+
+        self._cached = lru_cache(maxsize=cache_size)(self._effective)
+
+    @property
+    def entries(self) -> list:
+        """Return the parsed Defaults lines, in file order."""
+        return self._entries
+
+    def _candidates(self, binding: str, names: Iterable[str]) -> list:
+        """Return the positions of the entries of a binding that may apply to any of the names, in file order."""
+        found = set(self._any[binding])
+        for name in names:
+            found.update(self._by_name[binding].get(name, ()))
+        return sorted(found)
+
+    def _effective(
+        self, user: str, host: str, runas: str, command: str | None, groups: frozenset
+    ) -> Mapping:
+        """Compute the settings for *effective_defaults*."""
+        user_leaf, host_leaf, runas_leaf, command_leaf = leaf_matchers(
+            user, host, command or "", runas, groups
+        )
+        leaves = {":": user_leaf, "@": host_leaf, ">": runas_leaf, "!": command_leaf}
+        names = {
+            ":": [user, *(f"%{group}" for group in groups)],
+            "@": [host.lower()],
+            ">": [runas],
+            "!": [],
+        }
+
+        settings = dict(self._global)
+        for binding in BINDINGS[1:]:
+            if binding == "!" and command is None:
+                continue
+            for order in self._candidates(binding, names[binding]):
+                entry = self._entries[order]
+                if evaluate(entry.targets, self._aliases[binding], leaves[binding]):
+                    for parameter in entry.parameters:
+                        apply_parameter(settings, parameter)
+
+        return MappingProxyType(settings)
+
+    def effective_defaults(
+        self,
+        user: str,
+        host: str,
+        runas: str = "root",
+        command: str | None = None,
+        groups: Iterable[str] = (),
+    ) -> Mapping:
+        """
+        Return the settings in effect when a user runs a command on a host as another user.
+
+        Global Defaults apply first, then those bound to the host, the user, the run as user and finally the command,
+        each in file order, so later entries override earlier ones just as they do for sudo.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param str runas: The user to run the command as
+        :param str command: The full command line, None to leave out command Defaults
+        :param Iterable groups: The names of the groups the user belongs to
+
+        :return: A read-only map of parameter name to value
+        :rtype: Mapping
+        """
+        return self._cached(user, host, runas, command, frozenset(groups))
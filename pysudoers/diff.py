@@ -0,0 +1,405 @@
+"""Compare two parsed sudoers files by what they grant instead of by their text."""
+
+from __future__ import annotations
+
+from collections import deque
+from difflib import SequenceMatcher
+from itertools import product
+from typing import TYPE_CHECKING, NamedTuple
+
+from pysudoers import CyclicAliasExceptionError, Sudoers
+from pysudoers.defaults import parse_defaults
+from pysudoers.models import Rule
+from pysudoers.policy import Policy, evaluate, leaf_matchers
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+
+class Change(NamedTuple):
+    """
+    One difference between two sudoers files.
+
+    The *kind* is "Rule", "Defaults" or an alias type.  For an alias, *key* is its name and *old* and *new* are its
+    members.  For a rule, *key* is its user and host lists with the aliases expanded and *old* and *new* are the
+    *Rule* objects.  For a Defaults line, *key* is its binding and expanded targets and *old* and *new* are the lines.
+    *old* is None for an addition and *new* is None for a removal.
+    """
+
+    kind: str
+    key: object
+    old: object
+    new: object
+
+
+class PermissionChange(NamedTuple):
+    """
+    A query whose answer differs between two sudoers files.
+
+    *old* and *new* are None when the command is not allowed, else the tuple of tags it is allowed with.
+    """
+
+    user: str
+    host: str
+    runas: str
+    command: str
+    old: tuple | None
+    new: tuple | None
+
+
+class SudoersDiff(NamedTuple):
+    """
+    The differences between two sudoers files.
+
+    *added*, *removed* and *changed* are lists of *Change*, in file order.  A rule or Defaults line is changed when
+    one with the same key was removed and another added, or when it moved relative to the others.  *permissions*
+    lists the *PermissionChange* found, when asked for.
+    """
+
+    added: list
+    removed: list
+    changed: list
+    permissions: list
+
+
+class _Lists:
+    """
+    Number every distinct expanded sudoers list.
+
+    The numbers are shared by both files being compared, so equal expansions get equal numbers and canonical forms
+    are small tuples of integers that are cheap to hash.
+    """
+
+    def __init__(self) -> None:
+        self.numbers = {}
+        self.expansions = []
+
+    def number(self, expanded: tuple) -> int:
+        """Return the number of an expanded list."""
+        number = self.numbers.get(expanded)
+        if number is None:
+            number = self.numbers[expanded] = len(self.expansions)
+            self.expansions.append(expanded)
+        return number
+
+    def expander(
+        self, aliases: dict, *, fold_case: bool = False
+    ) -> Callable[[tuple], int]:
+        """
+        Return a function expanding a sudoers list into the number of its tuple of (name, negated) tuples.
+
+        Each list and each alias is only expanded once.  With *fold_case* set, names are lowercased, as for hosts.
+        """
+        entries = {}
+        lists = {}
+        visiting = set()
+
+        def expand_entry(item: str) -> tuple:
+            name = item.lstrip("!")
+            negated = (len(item) - len(name)) % 2 == 1
+            if name not in aliases:
+                name = name.lower() if fold_case and name != "ALL" else name
+                return ((name, negated),)
+
+            if name not in entries:
+                if name in visiting:
+                    errmsg = f"alias loop: {name} is a member of itself"
+                    raise CyclicAliasExceptionError(errmsg)
+                visiting.add(name)
+                members = []
+                for member in aliases[name]:
+                    members.extend(expand_entry(member))
+                visiting.discard(name)
+                entries[name] = tuple(members)
+
+            if not negated:
+                return entries[name]
+            return tuple((member, not flag) for member, flag in entries[name])
+
+        def expand(items: tuple) -> int:
+            number = lists.get(items)
+            if number is None:
+                expanded = []
+                for item in items:
+                    expanded.extend(expand_entry(item))
+                number = lists[items] = self.number(tuple(expanded))
+            return number
+
+        return expand
+
+
+class _Canonical:
+    """Hold the alias expanders of one sudoers file and build the canonical form of its rules and Defaults."""
+
+    def __init__(self, sudoers: Sudoers, lists: _Lists) -> None:
+        self.sudoers = sudoers
+        self.lists = lists
+        data = sudoers._data  # noqa: SLF001
+        self.aliases = {alias: dict(data[alias]) for alias in Sudoers.ALIAS_TYPES}
+        self.users = lists.expander(self.aliases["User_Alias"])
+        self.hosts = lists.expander(self.aliases["Host_Alias"], fold_case=True)
+        self.runas = lists.expander(self.aliases["Runas_Alias"])
+        self.commands = lists.expander(self.aliases["Cmnd_Alias"])
+        self.expanders = {
+            ":": self.users,
+            "@": self.hosts,
+            ">": self.runas,
+            "!": self.commands,
+        }
+
+    def names(self, expander: Callable[[tuple], int], items: tuple) -> set:
+        """Return every name of an expanded list, negated or not."""
+        return {name for name, _ in self.lists.expansions[expander(items)]}
+
+    def rule(self, rule: Rule) -> tuple:
+        """Return the canonical form of a rule: its user and host lists, then its commands."""
+        specs = tuple(
+            (
+                self.runas(entry.run_as_users),
+                self.runas(entry.run_as_groups),
+                entry.tags or (),
+                self.commands((entry.command,)),
+            )
+            for entry in rule.commands
+        )
+        return self.users(rule.users), self.hosts(rule.hosts), specs
+
+    def defaults(self, line: str) -> tuple:
+        """Return the canonical form of a Defaults line: its binding and targets, then its parameters."""
+        entry = parse_defaults(line)
+        if not entry.binding:
+            return "", self.lists.number(()), entry.parameters
+        targets = self.expanders[entry.binding](entry.targets)
+        return entry.binding, targets, entry.parameters
+
+
+def _compare(
+    kind: str, old: list, new: list, key: Callable[[tuple], tuple]
+) -> tuple[list, list, list]:
+    """
+    Compare two lists of (canonical form, item) tuples in order.
+
+    The last matching rule or Defaults line wins, so the order of the items matters: the longest common subsequence
+    of the canonical forms is unchanged and every other item was added, removed or moved.  The first two elements of a
+    canonical form identify the item, and items left over on both sides with the same first two elements are paired as
+    changed, in order, so a moved item is a change whose old and new items are equal.  *key* turns those two elements
+    into the key of a *Change*.
+
+    :return: The added, removed and changed *Change* lists
+    :rtype: tuple
+    """
+    matcher = SequenceMatcher(
+        None,
+        [canonical for canonical, _ in old],
+        [canonical for canonical, _ in new],
+        autojunk=False,
+    )
+    removed = {}
+    inserted = []
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        for canonical, item in old[old_start:old_end]:
+            removed.setdefault(canonical[:2], deque()).append(item)
+        inserted.extend(new[new_start:new_end])
+
+    added = []
+    changed = []
+    for canonical, item in inserted:
+        item_key = canonical[:2]
+        if removed.get(item_key):
+            changed.append(
+                Change(kind, key(item_key), removed[item_key].popleft(), item)
+            )
+        else:
+            added.append(Change(kind, key(item_key), None, item))
+
+    removals = [
+        Change(kind, key(item_key), item, None)
+        for item_key, items in removed.items()
+        for item in items
+    ]
+    return added, removals, changed
+
+
+def _compare_aliases(old: _Canonical, new: _Canonical) -> tuple[list, list, list]:
+    """Return the added, removed and changed aliases of every type."""
+    added, removed, changed = [], [], []
+    for alias in Sudoers.ALIAS_TYPES:
+        old_aliases = old.aliases[alias]
+        new_aliases = new.aliases[alias]
+        for name, members in old_aliases.items():
+            if name not in new_aliases:
+                removed.append(Change(alias, name, tuple(members), None))
+            elif list(members) != list(new_aliases[name]):
+                changed.append(
+                    Change(alias, name, tuple(members), tuple(new_aliases[name]))
+                )
+        added.extend(
+            Change(alias, name, None, tuple(members))
+            for name, members in new_aliases.items()
+            if name not in old_aliases
+        )
+
+    return added, removed, changed
+
+
+def _probes(canonical: _Canonical, rule: Rule) -> set:
+    """
+    Return the (user, host, run as, command) queries a rule can decide.
+
+    Every name a list mentions stands for itself, negated or not, so "ALL" stands for any name the file does not
+    mention.  A group entry stands for a member of the group, a directory for a file inside it.
+    """
+    users = canonical.names(canonical.users, rule.users)
+    hosts = canonical.names(canonical.hosts, rule.hosts)
+    probes = set()
+    for entry in rule.commands:
+        runas = canonical.names(canonical.runas, entry.run_as_users)
+        commands = set()
+        for name in canonical.names(canonical.commands, (entry.command,)):
+            path, _, args = name.partition(" ")
+            command = path if args == '""' else name
+            commands.add(f"{command}*" if command.endswith("/") else command)
+        probes.update(product(users, hosts, runas, commands))
+
+    return probes
+
+
+class _Decider:
+    """Answer queries against one sudoers file, remembering how every command entry matches every command."""
+
+    def __init__(self, canonical: _Canonical) -> None:
+        self.policy = Policy(canonical.sudoers)
+        self.runas_aliases = canonical.aliases["Runas_Alias"]
+        self.cmnd_aliases = canonical.aliases["Cmnd_Alias"]
+        # For each command, its matching function, alias results and command entry results
+        self.commands = {}
+
+    def state(self, matching: list, runas: str, command: str) -> tuple | None:
+        """
+        Return the tags a query is allowed with, or None when it is not allowed.
+
+        :param list matching: The rules matching the user and host, last rule first
+        :param str runas: The user to run the command as
+        :param str command: The command line
+        """
+        if command not in self.commands:
+            self.commands[command] = (leaf_matchers("", "", command, "", ())[3], {}, {})
+        command_leaf, memo, results = self.commands[command]
+        runas_leaf = leaf_matchers("", "", "", runas, ())[2]
+        runas_memo = {}
+
+        rules = self.policy.rules
+        for index in matching:
+            for entry in reversed(rules[index].commands):
+                if entry.command not in results:
+                    results[entry.command] = evaluate(
+                        (entry.command,), self.cmnd_aliases, command_leaf, memo
+                    )
+                allowed = results[entry.command]
+                if allowed is None or not evaluate(
+                    entry.run_as_users, self.runas_aliases, runas_leaf, runas_memo
+                ):
+                    continue
+                return (entry.tags or ()) if allowed else None
+
+        return None
+
+
+def _states(canonical: _Canonical, probes: list) -> list:
+    """
+    Return, for each query, the tags it is allowed with, or None when it is not allowed.
+
+    The queries must be sorted, so the rules matching each user and host are only looked up once.
+    """
+    decider = _Decider(canonical)
+    states = []
+    last = None
+    matching = []
+    for user, host, runas, command in probes:
+        if (user, host) != last:
+            groups = (user[1:],) if user.startswith("%") else ()
+            matching = list(decider.policy.matching(user, host, groups))
+            last = (user, host)
+        states.append(decider.state(matching, runas, command))
+
+    return states
+
+
+def _compare_permissions(
+    old: _Canonical, new: _Canonical, rules: Iterable[Change]
+) -> list:
+    """Return the queries, derived from the changed rules, whose answer differs between the files."""
+    found = set()
+    for change in rules:
+        if isinstance(change.old, Rule):
+            found |= _probes(old, change.old)
+        if isinstance(change.new, Rule):
+            found |= _probes(new, change.new)
+
+    probes = sorted(found)
+    before = _states(old, probes)
+    after = _states(new, probes)
+    return [
+        PermissionChange(user, host, runas, command, old_state, new_state)
+        for (user, host, runas, command), old_state, new_state in zip(
+            probes, before, after, strict=True
+        )
+        if old_state != new_state
+    ]
+
+
+def diff(old: Sudoers, new: Sudoers, *, permissions: bool = False) -> SudoersDiff:
+    """
+    Compare two sudoers files by what they grant.
+
+    Rules are compared with their aliases expanded, so moving a name from one alias to another or renaming an alias
+    does not change them, while Defaults lines are compared parsed, with their target aliases expanded.  Every rule
+    and Defaults line is reduced to a hashable canonical form, and the forms are compared in order, since moving a
+    rule can change which one wins.
+
+    With *permissions* set, the users, hosts, run as users and commands named by the added, removed and changed rules
+    are queried against both files and the queries whose answer differs are reported.  A changed alias only shows up
+    there through the rules that use it.
+
+    :param Sudoers old: The sudoers file before the change
+    :param Sudoers new: The sudoers file after the change
+    :param bool permissions: Whether to report the differences in effective permissions
+
+    :return: The differences
+    :rtype: SudoersDiff
+    """
+    lists = _Lists()
+    old_canon = _Canonical(old, lists)
+    new_canon = _Canonical(new, lists)
+
+    def expanded(key: tuple) -> tuple:
+        first, second = key
+        if isinstance(first, int):
+            first = lists.expansions[first]
+        return first, lists.expansions[second]
+
+    def rules(canon: _Canonical) -> list:
+        return [(canon.rule(rule), rule) for rule in canon.sudoers.rules]
+
+    def defaults(canon: _Canonical) -> list:
+        return [(canon.defaults(line), line) for line in canon.sudoers.defaults]
+
+    added, removed, changed = _compare_aliases(old_canon, new_canon)
+    rule_changes = _compare("Rule", rules(old_canon), rules(new_canon), expanded)
+    defaults_changes = _compare(
+        "Defaults", defaults(old_canon), defaults(new_canon), expanded
+    )
+    for more_added, more_removed, more_changed in (rule_changes, defaults_changes):
+        added.extend(more_added)
+        removed.extend(more_removed)
+        changed.extend(more_changed)
+
+    permission_changes = []
+    if permissions:
+        permission_changes = _compare_permissions(
+            old_canon, new_canon, [*rule_changes[0], *rule_changes[1], *rule_changes[2]]
+        )
+
+    return SudoersDiff(added, removed, changed, permission_changes)
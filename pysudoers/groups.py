@@ -0,0 +1,387 @@
+"""Resolve the members of the groups and netgroups named in sudoers user lists."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pysudoers.lru import TTLCache
+
+try:
+    import grp
+except ImportError:  # pragma: no cover - grp is only available on Unix
+    grp = None
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from pysudoers import Sudoers
+
+# Prefixes of the user list entries naming groups and netgroups
+GROUP_PREFIX = "%"
+NETGROUP_PREFIX = "+"
+# Marks a cache miss, None being a valid answer
+_MISSING = object()
+
+
+def is_group_entry(entry: str) -> bool:
+    """
+    Return whether a user list entry names a group, a GID or a netgroup, such as "%wheel", "%#10" or "+admins".
+
+    :param str entry: The user list entry, without any negation
+
+    :return: True for group, GID and netgroup entries
+    :rtype: bool
+    """
+    return entry.startswith((GROUP_PREFIX, NETGROUP_PREFIX)) and len(entry) > 1
+
+
+def referenced_groups(sudoers: Sudoers) -> list:
+    """
+    Return every group, GID and netgroup entry named by a parsed sudoers file, in the order they first appear.
+
+    User aliases, the users and run as users of the rules and the targets of user Defaults are searched.
+
+    :param Sudoers sudoers: The parsed sudoers file
+
+    :return: The distinct entries, such as "%wheel", "%#10" or "+admins"
+    :rtype: list
+    """
+    lists = list(dict(sudoers.user_aliases).values())
+    lists.extend(dict(sudoers.runas_aliases).values())
+    for rule in sudoers.rules:
+        lists.append(rule.users)
+        lists.extend(spec.run_as for spec in rule.commands)
+    lists.extend(
+        next(iter(line[len("Defaults:") :].split()), "").split(",")
+        for line in sudoers.defaults
+        if line.startswith("Defaults:")
+    )
+
+    found = {}
+    for items in lists:
+        for item in items:
+            entry = item.lstrip("!").strip()
+            if is_group_entry(entry):
+                found[entry] = None
+    return list(found)
+
+
+class GroupSource(ABC):
+    """
+    Look up the members of groups and netgroups.
+
+    Subclasses must implement *group* and *gid*, and implement *netgroup* when they know about netgroups.  Each
+    returns None for a name the source does not know, so a missing group can be told apart from an empty one.
+    """
+
+    @abstractmethod
+    def group(self, name: str) -> frozenset | None:
+        """Return the members of the group with a name, None if it does not exist."""
+
+    @abstractmethod
+    def gid(self, gid: int) -> frozenset | None:
+        """Return the members of the group with a GID, None if it does not exist."""
+
+    def netgroup(self, name: str) -> frozenset | None:  # noqa: ARG002
+        """Return the users of the netgroup with a name, None if it does not exist."""
+        return None
+
+    def lookup(self, entry: str) -> frozenset | None:
+        """
+        Return the members of a user list entry.
+
+        :param str entry: A group ("%wheel" or the non-Unix "%:wheel"), GID ("%#10") or netgroup ("+admins") entry
+
+        :return: The user names, None if the source does not know the entry
+        :rtype: frozenset or None
+        """
+        if entry.startswith(NETGROUP_PREFIX):
+            return self.netgroup(entry[1:])
+        name = entry[1:]
+        if name.startswith("#"):
+            try:
+                return self.gid(int(name[1:]))
+            except ValueError:
+                return None
+        return self.group(name.removeprefix(":"))
+
+    def lookup_many(self, entries: Iterable[str]) -> dict:
+        """
+        Return the members of many user list entries.
+
+        Sources that can fetch everything at once more cheaply than one entry at a time override this.
+
+        :param Iterable entries: The entries, as for *lookup*
+
+        :return: A map of each entry to its members, or None
+        :rtype: dict
+        """
+        return {entry: self.lookup(entry) for entry in entries}
+
+
+class DictSource(GroupSource):
+    """Look up groups and netgroups in dictionaries."""
+
+    def __init__(
+        self,
+        groups: Mapping[str, Iterable[str]] | None = None,
+        gids: Mapping[int, str] | None = None,
+        netgroups: Mapping[str, Iterable[str]] | None = None,
+    ) -> None:
+        """
+        Initialize the class.
+
+        :param Mapping groups: A map of group name to member names
+        :param Mapping gids: A map of GID to group name
+        :param Mapping netgroups: A map of netgroup name to user names
+        """
+        self._groups = {
+            name: frozenset(members) for name, members in (groups or {}).items()
+        }
+        self._gids = dict(gids or {})
+        self._netgroups = {
+            name: frozenset(users) for name, users in (netgroups or {}).items()
+        }
+
+    def group(self, name: str) -> frozenset | None:
+        """Return the members of the group with a name, None if it does not exist."""
+        return self._groups.get(name)
+
+    def gid(self, gid: int) -> frozenset | None:
+        """Return the members of the group with a GID, None if it does not exist."""
+        name = self._gids.get(gid)
+        return None if name is None else self._groups.get(name)
+
+    def netgroup(self, name: str) -> frozenset | None:
+        """Return the users of the netgroup with a name, None if it does not exist."""
+        return self._netgroups.get(name)
+
+
+class GroupFileSource(DictSource):
+    """
+    Look up groups in a file in the /etc/group format, one "name:password:GID:member,member" line per group.
+
+    The file is read when first used and read again whenever its modification time changes.  Netgroups can be passed
+    as a dictionary, as the group file does not hold them.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "/etc/group",
+        netgroups: Mapping[str, Iterable[str]] | None = None,
+    ) -> None:
+        """
+        Initialize the class.
+
+        :param path: The path to the group file
+        :type path: str or Path
+        :param Mapping netgroups: A map of netgroup name to user names
+        """
+        super().__init__(netgroups=netgroups)
+        self.path = Path(path)
+        self._mtime = None
+
+    def _load(self) -> None:
+        """Read the file again if it changed since it was last read."""
+        mtime = self.path.stat().st_mtime_ns
+        if mtime == self._mtime:
+            return
+
+        groups = {}
+        gids = {}
+        with self.path.open(encoding="utf-8") as handle:
+            for line in handle:
+                fields = line.rstrip("\n").split(":")
+                # Skip comments, blank and malformed lines, as well as NIS "+" and "-" entries
+                if len(fields) != 4 or not fields[0] or fields[0][0] in "#+-":  # noqa: PLR2004
+                    continue
+                name, _, gid, members = fields
+                groups[name] = frozenset(filter(None, members.split(",")))
+                if gid.isdigit():
+                    gids.setdefault(int(gid), name)
+
+        self._groups, self._gids, self._mtime = groups, gids, mtime
+
+    def group(self, name: str) -> frozenset | None:
+        """Return the members of the group with a name, None if it does not exist."""
+        self._load()
+        return super().group(name)
+
+    def gid(self, gid: int) -> frozenset | None:
+        """Return the members of the group with a GID, None if it does not exist."""
+        self._load()
+        return super().gid(gid)
+
+
+class GrpSource(GroupSource):
+    """
+    Look up groups with the grp module, so through NSS.
+
+    Only the supplementary members listed in the group database are returned, users whose primary group it is are
+    not.  Netgroups can be passed as a dictionary, as the grp module cannot look them up.
+    """
+
+    def __init__(self, netgroups: Mapping[str, Iterable[str]] | None = None) -> None:
+        """
+        Initialize the class.
+
+        :param Mapping netgroups: A map of netgroup name to user names
+        """
+        if grp is None:
+            errmsg = "the grp module is not available on this platform"
+            raise RuntimeError(errmsg)
+        self._grp = grp
+        self._netgroups = DictSource(netgroups=netgroups)
+
+    def group(self, name: str) -> frozenset | None:
+        """Return the members of the group with a name, None if it does not exist."""
+        try:
+            return frozenset(self._grp.getgrnam(name).gr_mem)
+        except KeyError:
+            return None
+
+    def gid(self, gid: int) -> frozenset | None:
+        """Return the members of the group with a GID, None if it does not exist."""
+        try:
+            return frozenset(self._grp.getgrgid(gid).gr_mem)
+        except (KeyError, OverflowError):
+            return None
+
+    def netgroup(self, name: str) -> frozenset | None:
+        """Return the users of the netgroup with a name, None if it does not exist."""
+        return self._netgroups.netgroup(name)
+
+    def lookup_many(self, entries: Iterable[str]) -> dict:
+        """
+        Return the members of many user list entries, enumerating the group database once for all of them.
+
+        :param Iterable entries: The entries, as for *lookup*
+
+        :return: A map of each entry to its members, or None
+        :rtype: dict
+        """
+        entries = list(entries)
+        if len(entries) < 2:  # noqa: PLR2004
+            return super().lookup_many(entries)
+
+        groups = {}
+        gids = {}
+        for group in self._grp.getgrall():
+            groups.setdefault(group.gr_name, group.gr_mem)
+            gids.setdefault(group.gr_gid, group.gr_name)
+        table = DictSource(groups, gids)
+
+        # Enumeration does not return every group on every NSS backend, so what it missed is looked up one by one
+        found = {entry: table.lookup(entry) for entry in entries}
+        for entry, members in found.items():
+            if members is None:
+                found[entry] = self.lookup(entry)
+        return found
+
+
+class MembershipResolver:
+    """
+    Resolve group, GID and netgroup entries into their members, caching the answers of a source.
+
+    Answers, including those for unknown entries, are kept for *ttl* seconds, and only the *maxsize* most recently
+    used ones are kept, so repeated checks of the same groups only ask the source once.  *prefetch* fills the cache
+    with every group a parsed sudoers file names in a single pass.  The resolver is safe to share between threads.
+    """
+
+    def __init__(
+        self, source: GroupSource, maxsize: int = 4096, ttl: float = 300.0
+    ) -> None:
+        """
+        Initialize the class.
+
+        :param GroupSource source: Where to look up groups and netgroups
+        :param int maxsize: The number of entries to keep the members of
+        :param float ttl: The number of seconds to keep the members of an entry
+        """
+        self.source = source
+        self.cache = TTLCache(maxsize, ttl)
+
+    @property
+    def hits(self) -> int:
+        """Return the number of answers found in the cache."""
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        """Return the number of answers the source was asked for."""
+        return self.cache.misses
+
+    def members(self, entry: str) -> frozenset | None:
+        """
+        Return the members of a group, GID or netgroup entry.
+
+        :param str entry: The entry, such as "%wheel", "%#10" or "+admins"
+
+        :return: The user names, None if the source does not know the entry
+        :rtype: frozenset or None
+        """
+        cached = self.cache.get(entry, _MISSING)
+        if cached is None or isinstance(cached, frozenset):
+            return cached
+
+        # The cache lock is not held here, so a slow lookup does not block the other threads
+        members = self.source.lookup(entry)
+        self.cache.put(entry, members)
+        return members
+
+    def is_member(self, user: str, entry: str) -> bool:
+        """
+        Return whether a user is a member of a group, GID or netgroup entry.
+
+        :param str user: The user name
+        :param str entry: The entry, such as "%wheel", "%#10" or "+admins"
+
+        :return: True if the user is a member
+        :rtype: bool
+        """
+        return user in (self.members(entry) or ())
+
+    def prefetch(self, sudoers: Sudoers) -> int:
+        """
+        Look up every group, GID and netgroup named by a parsed sudoers file that is not cached yet, all at once.
+
+        :param Sudoers sudoers: The parsed sudoers file
+
+        :return: The number of entries looked up
+        :rtype: int
+        """
+        missing = [
+            entry for entry in referenced_groups(sudoers) if entry not in self.cache
+        ]
+        if not missing:
+            return 0
+
+        found = self.source.lookup_many(missing)
+        for entry in missing:
+            self.cache.put(entry, found.get(entry))
+        return len(missing)
+
+    def groups_of(self, user: str, sudoers: Sudoers) -> list:
+        """
+        Return the groups named by a parsed sudoers file that a user belongs to, as the *groups* of a *Policy* query.
+
+        Group names are returned without their "%" prefix, and GIDs as "#" followed by the number, which is how a
+        *Policy* and a *DefaultsIndex* match them.  Netgroups are not included.
+
+        :param str user: The user name
+        :param Sudoers sudoers: The parsed sudoers file
+
+        :return: The group names, in the order the file first names them
+        :rtype: list
+        """
+        return [
+            entry[1:]
+            for entry in referenced_groups(sudoers)
+            if entry.startswith(GROUP_PREFIX) and self.is_member(user, entry)
+        ]
+
+    def clear(self) -> None:
+        """Forget every cached answer."""
+        self.cache.clear()
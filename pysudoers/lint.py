@@ -0,0 +1,477 @@
+"""Find unused, undefined and looping aliases and rules that never apply in a parsed sudoers file."""
+
+from __future__ import annotations
+
+import re
+from itertools import product
+from typing import TYPE_CHECKING, NamedTuple
+
+from pysudoers import BadDefaultsExceptionError, CyclicAliasExceptionError, Sudoers
+from pysudoers.defaults import parse_defaults
+from pysudoers.policy import expand_names
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+    from pysudoers.models import CommandSpec, Rule
+    from pysudoers.spans import Span
+
+# sudo reads any word of capital letters, digits and underscores that starts with a letter as an alias name
+_ALIAS_NAME_RE = re.compile(r"[A-Z][A-Z0-9_]*")
+# The alias type referred to by each binding of a Defaults line
+_BINDING_ALIASES = {
+    ":": "User_Alias",
+    "@": "Host_Alias",
+    ">": "Runas_Alias",
+    "!": "Cmnd_Alias",
+}
+
+
+class Finding(NamedTuple):
+    """
+    One problem found by *lint*.
+
+    The *check* is "alias-cycle", "undefined-alias", "unused-alias" or "shadowed-rule".  The *kind* and *key* name the
+    entry the problem was found in, as passed to *Sudoers.span*: an alias type and the name of the alias, or *Rule* or
+    *Defaults* and the position of the entry.  The *span* is where that entry was declared, None if unknown.
+    """
+
+    check: str
+    kind: str
+    key: int | str
+    message: str
+    span: Span | None
+
+    def as_dict(self) -> dict:
+        """Return the finding as a flat dictionary of JSON types, the fields of the span being None if unknown."""
+        span = self.span
+        return {
+            "check": self.check,
+            "kind": self.kind,
+            "key": self.key,
+            "message": self.message,
+            "path": None if span is None or span.path is None else str(span.path),
+            "line": None if span is None else span.line,
+            "end_line": None if span is None else span.end_line,
+            "start": None if span is None else span.start,
+            "end": None if span is None else span.end,
+        }
+
+
+def _describe(kind: str, key: int | str) -> str:
+    """Return how an entry is named in the message of a finding."""
+    if kind == "Rule":
+        return f"rule {key}"
+    if kind == "Defaults":
+        return f"Defaults line {key}"
+    return f"{kind} {key}"
+
+
+def _rule_references(sudoers: Sudoers) -> Generator[tuple, None, None]:
+    """Return the names the lists of the rules refer to, as for *_references*."""
+    for index, rule in enumerate(sudoers.rules):
+        for name in rule.users:
+            yield "User_Alias", name.lstrip("!"), "Rule", index
+        for name in rule.hosts:
+            yield "Host_Alias", name.lstrip("!"), "Rule", index
+        for entry in rule.commands:
+            for name in entry.run_as:
+                yield "Runas_Alias", name.lstrip("!"), "Rule", index
+            yield "Cmnd_Alias", entry.command.lstrip("!"), "Rule", index
+
+
+def _references(sudoers: Sudoers) -> Generator[tuple, None, None]:
+    """
+    Return every name a list of the file refers to, with the alias type it would be and the entry it appears in.
+
+    :return: A generator of (alias type, name, kind, key) tuples, the kind and key naming the entry as for *Finding*,
+             for the rules, then the Defaults lines, then the aliases
+    :rtype: Generator[tuple, None, None]
+    """
+    yield from _rule_references(sudoers)
+
+    for index, line in enumerate(sudoers.defaults):
+        try:
+            entry = parse_defaults(line)
+        except BadDefaultsExceptionError:
+            continue
+        alias_type = _BINDING_ALIASES.get(entry.binding)
+        for name in entry.targets:
+            yield alias_type, name.lstrip("!"), "Defaults", index
+
+    for alias_type in Sudoers.ALIAS_TYPES:
+        for alias, members in sudoers._data[alias_type].items():  # noqa: SLF001
+            for name in members:
+                yield alias_type, name.lstrip("!"), alias_type, alias
+
+
+class _Loops:
+    """
+    Find the groups of aliases that are members of each other, directly or through other aliases.
+
+    This is Tarjan's algorithm for strongly connected components, walked without recursion, so every alias and member
+    is visited once.
+    """
+
+    def __init__(self, graph: dict) -> None:
+        """
+        Initialize the class.
+
+        :param dict graph: The names of the aliases that are members of each alias
+        """
+        self.graph = graph
+        self.numbers = {}
+        self.lowest = {}
+        self.stack = []
+        self.on_stack = set()
+        self.work = []
+        self.loops = []
+
+    def enter(self, alias: str) -> None:
+        """Give an alias the next number and start visiting its members."""
+        self.numbers[alias] = self.lowest[alias] = len(self.numbers)
+        self.stack.append(alias)
+        self.on_stack.add(alias)
+        self.work.append((alias, iter(self.graph[alias])))
+
+    def leave(self, alias: str) -> None:
+        """Finish visiting an alias, recording its group when it is the first alias of a loop."""
+        if self.work:
+            parent = self.work[-1][0]
+            self.lowest[parent] = min(self.lowest[parent], self.lowest[alias])
+        if self.lowest[alias] != self.numbers[alias]:
+            return
+        group = []
+        while not group or group[-1] != alias:
+            group.append(self.stack.pop())
+            self.on_stack.discard(group[-1])
+        if len(group) > 1 or alias in self.graph[alias]:
+            self.loops.append(group)
+
+    def find(self) -> list:
+        """
+        Return every loop.
+
+        :return: A list of lists of alias names
+        :rtype: list
+        """
+        for root in self.graph:
+            if root not in self.numbers:
+                self.enter(root)
+            while self.work:
+                alias, members = self.work[-1]
+                for member in members:
+                    if member not in self.numbers:
+                        self.enter(member)
+                        break
+                    if member in self.on_stack:
+                        self.lowest[alias] = min(
+                            self.lowest[alias], self.numbers[member]
+                        )
+                else:
+                    self.work.pop()
+                    self.leave(alias)
+
+        return self.loops
+
+
+def _check_graph(sudoers: Sudoers, alias_type: str, members: dict, used: set) -> tuple:
+    """
+    Return the findings about the loops and unused aliases of one alias type.
+
+    :param Sudoers sudoers: The parsed sudoers file
+    :param str alias_type: The alias type
+    :param dict members: The aliases that are members of each alias, as dictionaries keyed by name
+    :param set used: The aliases named by rules and Defaults lines
+
+    :return: A tuple of the list of loop findings and the list of unused alias findings
+    :rtype: tuple
+    """
+    aliases = sudoers._data[alias_type]  # noqa: SLF001
+    order = {alias: position for position, alias in enumerate(aliases)}
+    graph = {alias: tuple(members.get(alias, ())) for alias in order}
+
+    loops = []
+    for group in _Loops(graph).find():
+        group.sort(key=order.__getitem__)
+        message = (
+            f"{alias_type} {group[0]} is a member of itself through {', '.join(group)}"
+        )
+        loops.append(
+            Finding(
+                "alias-cycle",
+                alias_type,
+                group[0],
+                message,
+                sudoers.span(alias_type, group[0]),
+            )
+        )
+
+    # Aliases only reachable from unused aliases are unused as well
+    reached = set(used)
+    pending = list(reached)
+    while pending:
+        for member in graph[pending.pop()]:
+            if member not in reached:
+                reached.add(member)
+                pending.append(member)
+
+    unused = []
+    for alias in order:
+        if alias not in reached:
+            message = f"{alias_type} {alias} is not used by any rule or Defaults line"
+            unused.append(
+                Finding(
+                    "unused-alias",
+                    alias_type,
+                    alias,
+                    message,
+                    sudoers.span(alias_type, alias),
+                )
+            )
+
+    return loops, unused
+
+
+def _check_aliases(sudoers: Sudoers) -> list:
+    """Return the findings about alias loops, references to undefined aliases and unused aliases, in that order."""
+    data = sudoers._data  # noqa: SLF001
+    members = {alias_type: {} for alias_type in Sudoers.ALIAS_TYPES}
+    used = {alias_type: set() for alias_type in Sudoers.ALIAS_TYPES}
+    undefined = []
+    seen = set()
+
+    for alias_type, name, kind, key in _references(sudoers):
+        if name in data[alias_type]:
+            if kind == alias_type:
+                members[alias_type].setdefault(key, {})[name] = None
+            else:
+                used[alias_type].add(name)
+        elif (
+            name != "ALL"
+            and _ALIAS_NAME_RE.fullmatch(name)
+            and (alias_type, name, kind, key) not in seen
+        ):
+            seen.add((alias_type, name, kind, key))
+            message = f"{_describe(kind, key)} refers to {alias_type} {name}, which is not defined"
+            undefined.append(
+                Finding("undefined-alias", kind, key, message, sudoers.span(kind, key))
+            )
+
+    loops = []
+    unused = []
+    for alias_type in Sudoers.ALIAS_TYPES:
+        more_loops, more_unused = _check_graph(
+            sudoers, alias_type, members[alias_type], used[alias_type]
+        )
+        loops.extend(more_loops)
+        unused.extend(more_unused)
+
+    return loops + undefined + unused
+
+
+class _Coverage:
+    """
+    Index the command entries of rules by the names their lists allow and the commands they match.
+
+    Each distinct list is expanded once into a set of names, and the sets are numbered, so an entry is indexed under
+    one small tuple of numbers per command.  The set allowing ALL gets the number 0.  Hosts are lowercased, as they are
+    not case sensitive.
+    """
+
+    def __init__(self, sudoers: Sudoers) -> None:
+        data = sudoers._data  # noqa: SLF001
+        self.aliases = {
+            alias_type: dict(data[alias_type]) for alias_type in Sudoers.ALIAS_TYPES
+        }
+        self.expanded = {}
+        self.numbers = {frozenset(("ALL",)): 0}
+        # The (users, hosts, run as, command) keys of the entries indexed so far
+        self.covered = set()
+
+    def names(self, alias_type: str, items: Iterable[str]) -> tuple:
+        """
+        Return the names of an expanded list: the ones it can allow, and all of them if it has no negation.
+
+        Any set holding ALL allows the same names as ALL alone.
+
+        :return: A tuple of the set number of the names reached through an even number of negations, None when there
+                 are none, and the set number of every name, None when any name is negated
+        :rtype: tuple
+        """
+        key = (alias_type, items)
+        numbers = self.expanded.get(key)
+        if numbers is None:
+            allowed = set()
+            negated = False
+            for name, negation in expand_names(items, self.aliases[alias_type]):
+                negated = negated or negation
+                if not negation:
+                    allowed.add(
+                        name.lower()
+                        if alias_type == "Host_Alias" and name != "ALL"
+                        else name
+                    )
+            number = None
+            if allowed:
+                names = frozenset(("ALL",)) if "ALL" in allowed else frozenset(allowed)
+                number = self.numbers.setdefault(names, len(self.numbers))
+            numbers = self.expanded[key] = (number, None if negated else number)
+        return numbers
+
+    def runas_names(self, entry: CommandSpec) -> tuple:
+        """
+        Return the set numbers of the run as list of an entry, as for *names*.
+
+        A list with groups is numbered as a (users, groups) pair, -1 standing for no users, and is only covered by the
+        same pair, as the groups a query may run as are not indexed.
+        """
+        if not entry.run_as_groups:
+            return self.names("Runas_Alias", entry.run_as)
+        users, all_users = (
+            self.names("Runas_Alias", entry.run_as_users)
+            if entry.run_as_users
+            else (-1, -1)
+        )
+        groups, all_groups = self.names("Runas_Alias", entry.run_as_groups)
+        return (
+            None if None in (users, groups) else (users, groups),
+            None if None in (all_users, all_groups) else (all_users, all_groups),
+        )
+
+    def split(self, rule: Rule) -> list:
+        """
+        Return the command entries of a rule as set numbers and commands.
+
+        :return: A list of (decided, indexed, commands) tuples.  *decided* holds the users, hosts and run as set
+                 numbers of the names the entry can allow, None when it allows nobody.  *indexed* holds them when no
+                 name is negated, else None, as a negated name may keep the entry from deciding the queries of the
+                 other names.  The commands are every name the command matches, negated or not, as a match decides
+                 the query either way.
+        :rtype: list
+        """
+        users, all_users = self.names("User_Alias", rule.users)
+        hosts, all_hosts = self.names("Host_Alias", rule.hosts)
+        entries = []
+        for entry in rule.commands:
+            runas, all_runas = self.runas_names(entry)
+            decided = (users, hosts, runas)
+            indexed = (all_users, all_hosts, all_runas)
+            expanded = expand_names((entry.command,), self.aliases["Cmnd_Alias"])
+            entries.append(
+                (
+                    None if None in decided else decided,
+                    None if None in indexed else indexed,
+                    tuple(dict.fromkeys(name for name, _ in expanded)),
+                )
+            )
+        return entries
+
+    def is_covered(self, decided: tuple, command: str) -> bool:
+        """
+        Return whether an indexed entry decides every query a command of an entry decides.
+
+        It is decided by an entry whose lists allow the same names or ALL and which matches the same command, ALL or,
+        for a command with arguments, the same command without arguments, which allows any.
+        """
+        path, space, _ = command.partition(" ")
+        commands = (command, "ALL", path) if space else (command, "ALL")
+        users, hosts, runas = decided
+        return any(
+            key in self.covered
+            for key in product(
+                {users, 0},
+                {hosts, 0},
+                {runas} if isinstance(runas, tuple) else {runas, 0},
+                commands,
+            )
+        )
+
+    def add(self, indexed: tuple, commands: tuple) -> None:
+        """Index an entry under every command it matches."""
+        self.covered.update((*indexed, command) for command in commands)
+
+
+def shadowed_rules(sudoers: Sudoers) -> list:
+    """
+    Return the rules that never decide a query, as later rules always decide it first.
+
+    sudo uses the last command entry that matches a query, so the rules are walked from last to first, indexing each
+    command entry under the sets of names its lists allow and the commands it matches.  A rule is shadowed when each
+    command of each of its entries is matched by a later entry whose user, host and run as lists allow the same names
+    or ALL.  Each lookup is a handful of set lookups, so the time taken grows with the size of the file rather than
+    with the number of pairs of rules.  A rule only covered by larger lists, group memberships or patterns is not
+    reported, and a rule with an alias loop is neither reported nor indexed.
+
+    :param Sudoers sudoers: The parsed sudoers file
+
+    :return: The positions of the shadowed rules in *rules*, in file order
+    :rtype: list
+    """
+    coverage = _Coverage(sudoers)
+    shadowed = []
+    rules = sudoers.rules
+    for index in range(len(rules) - 1, -1, -1):
+        try:
+            entries = coverage.split(rules[index])
+        except CyclicAliasExceptionError:
+            continue
+        # An entry allowing nobody decides nothing
+        if all(
+            coverage.is_covered(decided, command)
+            for decided, _, commands in entries
+            if decided is not None
+            for command in commands
+        ):
+            shadowed.append(index)
+        for _, indexed, commands in entries:
+            if indexed is not None:
+                coverage.add(indexed, commands)
+
+    shadowed.reverse()
+    return shadowed
+
+
+def unused_aliases(sudoers: Sudoers) -> list:
+    """
+    Return the aliases that no rule or Defaults line uses, even through other aliases.
+
+    :param Sudoers sudoers: The parsed sudoers file
+
+    :return: A list of (alias type, alias name) tuples, in the order of *Sudoers.ALIAS_TYPES* and of declaration
+    :rtype: list
+    """
+    return [
+        (finding.kind, finding.key)
+        for finding in _check_aliases(sudoers)
+        if finding.check == "unused-alias"
+    ]
+
+
+def lint(sudoers: Sudoers) -> list:
+    """
+    Check a parsed sudoers file for aliases and rules that sudo evaluates for nothing or cannot evaluate.
+
+    Every list of the file is read once to build the graph of the aliases that refer to each other, and the rules once
+    more, from last to first, to index the queries they decide (see *shadowed_rules*).  The checks are:
+
+    - "alias-cycle": an alias is (indirectly) a member of itself, reported once per loop
+    - "undefined-alias": a list names an alias that is not defined
+    - "unused-alias": no rule or Defaults line uses an alias, even through other aliases
+    - "shadowed-rule": later rules decide every query a rule would, or it matches nothing
+
+    :param Sudoers sudoers: The parsed sudoers file
+
+    :return: A list of *Finding*, grouped by check in the order above.  Within a check, the findings follow the order
+             of *rules*, *defaults* and the aliases of each type.
+    :rtype: list
+    """
+    findings = _check_aliases(sudoers)
+    for index in shadowed_rules(sudoers):
+        message = f"rule {index} is shadowed by later rules and never decides a query"
+        findings.append(
+            Finding(
+                "shadowed-rule", "Rule", index, message, sudoers.span("Rule", index)
+            )
+        )
+    return findings
@@ -0,0 +1,124 @@
+"""A thread-safe, size-bounded least recently used cache whose entries can expire."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class CacheStats(NamedTuple):
+    """
+    The counters of a *TTLCache*.
+
+    *evictions* counts the entries removed to stay within the size limit, *expirations* those removed because they
+    were older than the time to live, and *size* is the current number of entries.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+
+class TTLCache:
+    """
+    Map keys to values, keeping at most *maxsize* of the most recently used ones for at most *ttl* seconds each.
+
+    None is a valid value, so *get* takes the default to return on a miss.  Every method holds a lock, so a cache can
+    be shared between threads.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float | None = None) -> None:
+        """
+        Initialize the class.
+
+        :param int maxsize: The maximum number of entries
+        :param float ttl: The number of seconds an entry is kept, forever when None
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones not removed yet."""
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a key has an entry that has not expired, without counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                entry[0] is None or entry[0] > time.monotonic()
+            )
+
+    def get(self, key: object, default: object = None) -> object:
+        """
+        Return the value of a key, marking it as recently used.
+
+        :param object key: The key
+        :param object default: The value returned when the key has no entry or it expired
+
+        :return: The value
+        :rtype: object
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry[0] is not None
+                and entry[0] <= time.monotonic()
+            ):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: object, value: object) -> None:
+        """
+        Store the value of a key, removing the least recently used entries beyond the size limit.
+
+        :param object key: The key
+        :param object value: The value
+        """
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """
+        Return the counters of the cache.
+
+        :return: The hits, misses, evictions, expirations and size
+        :rtype: CacheStats
+        """
+        with self._lock:
+            return CacheStats(
+                self.hits,
+                self.misses,
+                self.evictions,
+                self.expirations,
+                len(self._entries),
+            )
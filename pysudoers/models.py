@@ -0,0 +1,199 @@
+"""Provide compact, immutable models for the entries of a sudoers file."""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable, Iterator, Mapping
+from typing import ClassVar, NamedTuple
+
+# Canonical instances of every run as and tag tuple seen so far, so that equal lists are only stored once
+_SHARED_TUPLES = {}
+# Fields are only set when a model is created, bypassing the __setattr__ that makes the models immutable
+_set_field = object.__setattr__
+
+
+def shared_tuple(values: Iterable[str]) -> tuple:
+    """
+    Return a tuple of interned strings, sharing one instance between all equal tuples.
+
+    :param Iterable values: The strings to store
+
+    :return: The canonical tuple holding the values
+    :rtype: tuple
+    """
+    key = tuple(map(sys.intern, values))
+    return _SHARED_TUPLES.setdefault(key, key)
+
+
+class _Model(Mapping):
+    """
+    Provide a read-only dict view over the slots of an immutable model.
+
+    Tuples are returned as lists by the dict view, so a model compares equal to the dictionary previous versions of
+    this library returned for the same entry.  The attributes give direct access to the stored values.
+    """
+
+    __slots__ = ()
+    _fields: ClassVar[tuple] = ()
+    # Attributes stored along with the fields but left out of the dict view
+    _extra: ClassVar[tuple] = ()
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """Refuse to change a field."""
+        errmsg = f"{type(self).__name__} objects are immutable"
+        raise AttributeError(errmsg)
+
+    def __delattr__(self, name: str) -> None:
+        """Refuse to delete a field."""
+        errmsg = f"{type(self).__name__} objects are immutable"
+        raise AttributeError(errmsg)
+
+    def __getitem__(self, key: str) -> object:
+        """Return a field, as a list if it is stored as a tuple."""
+        if key not in self._fields:
+            raise KeyError(key)
+        value = getattr(self, key)
+        return list(value) if isinstance(value, tuple) else value
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the field names."""
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        """Return the number of fields."""
+        return len(self._fields)
+
+    def _values(self) -> tuple:
+        """Return the stored values of every field and extra attribute."""
+        return tuple(getattr(self, field) for field in self._fields + self._extra)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare with another model of the same type, or with any mapping through the dict view."""
+        if type(other) is type(self):
+            return self._values() == other._values()
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Hash the stored values."""
+        return hash(self._values())
+
+    def __reduce__(self) -> tuple:
+        """Pickle the stored values."""
+        return (type(self), self._values())
+
+    def __repr__(self) -> str:
+        """Return the model as a constructor call."""
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self._fields + self._extra
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class CommandSpec(_Model):
+    """
+    Hold one command of a rule, along with the run as list and tags that apply to it.
+
+    *run_as* is a tuple of the users and then the groups of the run as list, *tags* a tuple of tags or None when no
+    tags apply, and *command* the command string.  The dict view only has those three keys, *run_as_groups* holds the
+    groups given after the colon of the run as list and *run_as_users* the users before it.
+    """
+
+    __slots__ = ("command", "run_as", "run_as_groups", "tags")
+    _fields: ClassVar[tuple] = ("run_as", "tags", "command")
+    _extra: ClassVar[tuple] = ("run_as_groups",)
+
+    run_as: tuple
+    tags: tuple | None
+    command: str
+    run_as_groups: tuple
+
+    def __init__(
+        self,
+        run_as: tuple,
+        tags: tuple | None,
+        command: str,
+        run_as_groups: tuple = (),
+    ) -> None:
+        """
+        Initialize the class.
+
+        :param tuple run_as: The users and groups the command may be run as
+        :param tuple tags: The tags applying to the command, None if there are none
+        :param str command: The command
+        :param tuple run_as_groups: The groups the command may be run as, which end *run_as*
+        """
+        _set_field(self, "run_as", run_as)
+        _set_field(self, "tags", tags)
+        _set_field(self, "command", command)
+        _set_field(self, "run_as_groups", run_as_groups)
+
+    @property
+    def run_as_users(self) -> tuple:
+        """Return the users the command may be run as, an empty tuple when the run as list only has groups."""
+        if not self.run_as_groups:
+            return self.run_as
+        return self.run_as[: len(self.run_as) - len(self.run_as_groups)]
+
+    def __reduce__(self) -> tuple:
+        """Pickle the stored values, so that unpickled commands share their tuples again, as parsed ones do."""
+        return (_shared_command_spec, self._values())
+
+    def as_dict(self) -> dict:
+        """Return the command as a plain dictionary of lists."""
+        return dict(self.items())
+
+
+def _shared_command_spec(
+    run_as: tuple, tags: tuple | None, command: str, run_as_groups: tuple = ()
+) -> CommandSpec:
+    """Create a *CommandSpec* from unpickled values, with the shared tuples and interned strings of a parsed one."""
+    return CommandSpec(
+        shared_tuple(run_as),
+        None if tags is None else shared_tuple(tags),
+        sys.intern(command),
+        shared_tuple(run_as_groups),
+    )
+
+
+class Rule(_Model):
+    """
+    Hold one user specification (rule).
+
+    *users* and *hosts* are tuples of names and *commands* is a tuple of *CommandSpec* objects.
+    """
+
+    __slots__ = ("commands", "hosts", "users")
+    _fields: ClassVar[tuple] = ("users", "hosts", "commands")
+
+    users: tuple
+    hosts: tuple
+    commands: tuple
+
+    def __init__(self, users: tuple, hosts: tuple, commands: tuple) -> None:
+        """
+        Initialize the class.
+
+        :param tuple users: The users the rule applies to
+        :param tuple hosts: The hosts the rule applies to
+        :param tuple commands: The *CommandSpec* objects of the rule
+        """
+        _set_field(self, "users", users)
+        _set_field(self, "hosts", hosts)
+        _set_field(self, "commands", commands)
+
+    def as_dict(self) -> dict:
+        """Return the rule as a plain dictionary of lists, with each command as a dictionary as well."""
+        return {
+            "users": list(self.users),
+            "hosts": list(self.hosts),
+            "commands": [command.as_dict() for command in self.commands],
+        }
+
+
+class Alias(NamedTuple):
+    """Hold one alias declaration, which unpacks to the same (name, members) pair *Sudoers.parse_alias* yields."""
+
+    name: str
+    members: tuple
@@ -0,0 +1,404 @@
+"""Rewrite a parsed sudoers file into a smaller policy that grants the same permissions."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, NamedTuple
+
+from pysudoers import Sudoers
+from pysudoers.lint import shadowed_rules, unused_aliases
+from pysudoers.models import Rule
+from pysudoers.policy import expand_names, positive_names
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+# The run as list of a command written without one
+_DEFAULT_RUNAS = ("root",)
+# The start of the names of the aliases created for repeated lists of each type
+_ALIAS_PREFIXES = {"User_Alias": "USERS_", "Host_Alias": "HOSTS_"}
+# A comma, or a parenthesized list in which commas do not split commands
+_COMMA_RE = re.compile(r"(\([^)]*\)?)|,")
+# A list is only worth an alias when it has more than one member and, for a new alias, is used more than once
+_MIN_REPEATS = 2
+
+
+class OptimizeReport(NamedTuple):
+    """
+    The size of a policy before and after *optimize*.
+
+    The *size* fields are the number of bytes written by *serialize*, so the comments and spacing of the original file
+    are not counted.  The *entries* fields are the number of commands of all the rules.
+    """
+
+    rules_before: int
+    rules_after: int
+    entries_before: int
+    entries_after: int
+    aliases_before: int
+    aliases_after: int
+    defaults_before: int
+    defaults_after: int
+    size_before: int
+    size_after: int
+
+
+class Optimized(NamedTuple):
+    """The result of *optimize*: the optimized policy parsed, its text and the report comparing it to the original."""
+
+    sudoers: Sudoers
+    text: str
+    report: OptimizeReport
+
+
+def _escape_comma(match: re.Match) -> str:
+    """Keep a parenthesized list untouched and escape a comma outside of one."""
+    return match.group(1) or "\\,"
+
+
+def _last_occurrences(items: Iterable) -> tuple:
+    """Return the items without the earlier occurrences of repeated ones, which a later occurrence overrides."""
+    return tuple(reversed(dict.fromkeys(reversed(tuple(items)))))
+
+
+def _rule_line(rule: Rule) -> str:
+    """Return the line declaring a rule, with each run as list and set of tags written where it changes."""
+    runas = (_DEFAULT_RUNAS, ())
+    tags = None
+    commands = []
+    for entry in rule.commands:
+        prefix = ""
+        if (entry.run_as, entry.run_as_groups) != runas:
+            runas = (entry.run_as, entry.run_as_groups)
+            users = ",".join(entry.run_as_users)
+            if entry.run_as_groups:
+                prefix = f"({users}:{','.join(entry.run_as_groups)}) "
+            else:
+                prefix = f"({users}) "
+        if entry.tags is not None and entry.tags != tags:
+            tags = entry.tags
+            prefix += f"{':'.join(tags)}: "
+        commands.append(prefix + _COMMA_RE.sub(_escape_comma, entry.command))
+    return f"{','.join(rule.users)} {','.join(rule.hosts)} = {', '.join(commands)}"
+
+
+def _lines(
+    aliases: dict, defaults: list, rules: list, includes: list
+) -> Generator[str, None, None]:
+    """
+    Return the lines of a policy: the aliases, then the Defaults and rules with the include directives among them.
+
+    Includes that were followed are skipped, as their entries are part of the Defaults and rules.
+    """
+    for alias_type in Sudoers.ALIAS_TYPES:
+        for name, members in aliases[alias_type].items():
+            yield f"{alias_type} {name} = {', '.join(members)}"
+
+    rule_pos = 0
+    default_pos = 0
+    for include in includes:
+        if "files" in include:
+            continue
+        yield from defaults[default_pos : include["defaults"]]
+        yield from map(_rule_line, rules[rule_pos : include["rules"]])
+        yield f"@{include['directive']} {include['path']}"
+        rule_pos = include["rules"]
+        default_pos = include["defaults"]
+
+    yield from defaults[default_pos:]
+    yield from map(_rule_line, rules[rule_pos:])
+
+
+def serialize(sudoers: Sudoers) -> str:
+    """
+    Write a parsed sudoers file in sudoers syntax, which parses back into the same aliases, Defaults and rules.
+
+    The aliases are written first, then the Defaults and rules in order, with the include directives that were not
+    followed where they were found.  Comments, spacing and line continuations are not kept.
+
+    :param Sudoers sudoers: The parsed sudoers file
+
+    :return: The text of the file
+    :rtype: str
+    """
+    data = sudoers._data  # noqa: SLF001
+    lines = _lines(data, data["Defaults"], data["Rules"], data["Includes"])
+    return "".join(f"{line}\n" for line in lines)
+
+
+class _Merger:
+    """
+    Merge rules that only differ by their users into one rule, wherever that grants the same permissions.
+
+    A rule is merged into the last earlier one with the same hosts and commands, taking its place.  That is only done
+    when no rule in between can match a user it names, so nothing else could decide its queries in between, and when
+    its user list has no negation, so appending it to the other list allows the users of both.  A user list naming
+    ALL, groups or patterns may match anyone, so it is only merged into the rule just before it.
+    """
+
+    def __init__(self, user_aliases: dict) -> None:
+        self.user_aliases = user_aliases
+        self.rules = []
+        # The position of the last rule with each hosts and commands, and of the last rule naming each user
+        self.pending = {}
+        self.named = {}
+        # The position of the last rule whose users may match names it does not mention
+        self.last_open = -1
+        self.lists = {}
+
+    def users(self, users: tuple) -> tuple:
+        """Return the names a user list can allow, whether it may allow others, and whether it negates any name."""
+        described = self.lists.get(users)
+        if described is None:
+            names, wildcard = positive_names(users, self.user_aliases)
+            is_open = wildcard or any(name.startswith("%") for name in names)
+            negated = any(
+                negation for _, negation in expand_names(users, self.user_aliases)
+            )
+            described = self.lists[users] = (names, is_open, negated)
+        return described
+
+    def barrier(self) -> None:
+        """Stop merging rules across this point, where the rules of a file that was not read are included."""
+        self.pending.clear()
+
+    def add(self, rule: Rule) -> None:
+        """Add the next rule, merging it into an earlier one when possible."""
+        names, is_open, negated = self.users(rule.users)
+        key = (rule.hosts, rule.commands)
+        position = self.pending.get(key)
+        if (
+            position is None
+            or negated
+            or (is_open and position != len(self.rules) - 1)
+            or self.last_open > position
+            or any(self.named.get(name, -1) > position for name in names)
+        ):
+            position = self.pending[key] = len(self.rules)
+            self.rules.append(rule)
+        else:
+            merged = dict.fromkeys(self.rules[position].users)
+            for user in rule.users:
+                merged.pop(user, None)
+                merged[user] = None
+            self.rules[position] = Rule(tuple(merged), rule.hosts, rule.commands)
+
+        for name in names:
+            self.named[name] = position
+        if is_open:
+            self.last_open = position
+
+
+def _compact(rule: Rule) -> Rule:
+    """Return a rule without repeated list entries and commands that a later command of the rule overrides."""
+    commands = {}
+    for entry in reversed(rule.commands):
+        commands.setdefault((entry.run_as, entry.run_as_groups, entry.command), entry)
+    return Rule(
+        _last_occurrences(rule.users),
+        _last_occurrences(rule.hosts),
+        tuple(reversed(commands.values())),
+    )
+
+
+def _factor(rules: list, aliases: dict, alias_type: str) -> list:
+    """
+    Replace the user or host lists repeated across rules by an alias, when that makes the policy smaller.
+
+    A list with the same members as an existing alias is replaced by that alias, otherwise a new alias is declared
+    in *aliases*.
+
+    :return: The rules with the lists replaced
+    :rtype: list
+    """
+    field = "users" if alias_type == "User_Alias" else "hosts"
+    existing = {}
+    for name, members in aliases[alias_type].items():
+        existing.setdefault(tuple(members), name)
+    taken = {name for alias in Sudoers.ALIAS_TYPES for name in aliases[alias]}
+
+    replacements = {}
+    number = 0
+    for items, count in Counter(getattr(rule, field) for rule in rules).items():
+        if len(items) < _MIN_REPEATS or (
+            count < _MIN_REPEATS and items not in existing
+        ):
+            continue
+        name = existing.get(items)
+        declaration = 0
+        if name is None:
+            number += 1
+            while f"{_ALIAS_PREFIXES[alias_type]}{number}" in taken:
+                number += 1
+            name = f"{_ALIAS_PREFIXES[alias_type]}{number}"
+            declaration = len(f"{alias_type} {name} = {', '.join(items)}\n")
+        if count * (len(",".join(items)) - len(name)) > declaration:
+            replacements[items] = name
+            if declaration:
+                aliases[alias_type][name] = items
+                taken.add(name)
+
+    if field == "users":
+        return [
+            Rule((replacements[rule.users],), rule.hosts, rule.commands)
+            if rule.users in replacements
+            else rule
+            for rule in rules
+        ]
+    return [
+        Rule(rule.users, (replacements[rule.hosts],), rule.commands)
+        if rule.hosts in replacements
+        else rule
+        for rule in rules
+    ]
+
+
+def _report(
+    before: Sudoers, after: Sudoers, size_before: int, size_after: int
+) -> OptimizeReport:
+    """Return the report comparing two policies."""
+
+    def counts(sudoers: Sudoers) -> tuple[int, int, int, int]:
+        return (
+            len(sudoers.rules),
+            sum(len(rule.commands) for rule in sudoers.rules),
+            sum(len(sudoers._data[alias]) for alias in Sudoers.ALIAS_TYPES),  # noqa: SLF001
+            len(sudoers.defaults),
+        )
+
+    rules_before, entries_before, aliases_before, defaults_before = counts(before)
+    rules_after, entries_after, aliases_after, defaults_after = counts(after)
+    return OptimizeReport(
+        rules_before,
+        rules_after,
+        entries_before,
+        entries_after,
+        aliases_before,
+        aliases_after,
+        defaults_before,
+        defaults_after,
+        size_before,
+        size_after,
+    )
+
+
+def optimize(sudoers: Sudoers) -> Optimized:
+    """
+    Rewrite a parsed sudoers file into a smaller policy that grants the same permissions.
+
+    sudo walks the rules of a policy on every call, so the policy is made smaller in these steps:
+
+    - rules that later rules shadow (see *lint.shadowed_rules*) are dropped
+    - repeated users and hosts of a list are dropped, as well as commands of a rule that a later command of the rule
+      with the same run as list overrides, and Defaults lines repeated later
+    - rules with the same hosts, run as lists, tags and commands are merged into one rule, as long as this does not
+      change which rule decides a query (see *_Merger*)
+    - user and host lists repeated across rules are replaced by an alias, when that makes the policy smaller
+    - aliases that are no longer used are dropped
+
+    The rules of included files that were not followed are not known, so rules are not merged across their include
+    directives and no alias is dropped.
+
+    :param Sudoers sudoers: The parsed sudoers file
+
+    :return: The optimized policy parsed, its text and the report comparing it to the original
+    :rtype: Optimized
+    """
+    data = sudoers._data  # noqa: SLF001
+    aliases = {alias: dict(data[alias]) for alias in Sudoers.ALIAS_TYPES}
+    unfollowed = [include for include in data["Includes"] if "files" not in include]
+
+    defaults = data["Defaults"]
+    last_default = {line: position for position, line in enumerate(defaults)}
+    kept_defaults = [
+        position
+        for position, line in enumerate(defaults)
+        if last_default[line] == position
+    ]
+
+    shadowed = set(shadowed_rules(sudoers))
+    merger = _Merger(aliases["User_Alias"])
+    includes = []
+    boundaries = iter(unfollowed)
+    include = next(boundaries, None)
+    for position, rule in enumerate([*data["Rules"], None]):
+        while include is not None and include["rules"] == position:
+            merger.barrier()
+            includes.append(
+                {
+                    **include,
+                    "rules": len(merger.rules),
+                    "defaults": sum(
+                        kept < include["defaults"] for kept in kept_defaults
+                    ),
+                }
+            )
+            include = next(boundaries, None)
+        if rule is not None and position not in shadowed:
+            merger.add(_compact(rule))
+
+    rules = merger.rules
+    for alias_type in _ALIAS_PREFIXES:
+        rules = _factor(rules, aliases, alias_type)
+
+    kept = [defaults[position] for position in kept_defaults]
+    text = "".join(f"{line}\n" for line in _lines(aliases, kept, rules, includes))
+    optimized = Sudoers.from_string(text)
+    if not unfollowed:
+        unused = unused_aliases(optimized)
+        if unused:
+            for alias_type, name in unused:
+                del aliases[alias_type][name]
+            text = "".join(
+                f"{line}\n" for line in _lines(aliases, kept, rules, includes)
+            )
+            optimized = Sudoers.from_string(text)
+
+    report = _report(
+        sudoers, optimized, len(serialize(sudoers).encode()), len(text.encode())
+    )
+    return Optimized(optimized, text, report)
+
+
+def main(argv: list | None = None) -> int:
+    """
+    Optimize the sudoers file named on the command line, write the result and report the sizes as JSON on stderr.
+
+    :param list argv: The command line arguments, *sys.argv* by default
+
+    :return: The exit status
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="pysudoers-optimize",
+        description="Rewrite a sudoers file into a smaller policy that grants the same permissions.",
+    )
+    parser.add_argument("path", help="the sudoers file")
+    parser.add_argument(
+        "-o", "--output", help="the file to write, standard output by default"
+    )
+    parser.add_argument(
+        "-f",
+        "--follow-includes",
+        action="store_true",
+        help="read the included files and write their entries in the result",
+    )
+    args = parser.parse_args(argv)
+
+    result = optimize(Sudoers(path=args.path, follow_includes=args.follow_includes))
+    if args.output is None:
+        sys.stdout.write(result.text)
+    else:
+        with open(args.output, "w", encoding="ascii") as output:  # noqa: PTH123
+            output.write(result.text)
+    sys.stderr.write(json.dumps(result.report._asdict()) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
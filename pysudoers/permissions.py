@@ -0,0 +1,221 @@
+"""Expand the rules of a parsed sudoers file into a flat list of permissions."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from itertools import islice, product
+from typing import TYPE_CHECKING, NamedTuple
+
+from pysudoers.policy import expand_names
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Generator, Iterable
+    from typing import TextIO
+
+    from pysudoers import Sudoers
+
+# The columns of the CSV output, in order
+FIELDS = ("user", "host", "runas", "runas_group", "command", "tags", "allowed")
+
+
+class Permission(NamedTuple):
+    """
+    One user, host, run as user, run as group and command combination named by a rule.
+
+    *runas_group* is empty when the command does not list run as groups.  *tags* is a tuple of the tags of the
+    command, such as NOPASSWD.  *allowed* is False when the command or any of the names is negated, so it is denied
+    instead of granted.
+    """
+
+    user: str
+    host: str
+    runas: str
+    runas_group: str
+    command: str
+    tags: tuple
+    allowed: bool
+
+
+def _predicate(
+    selection: Collection[str] | Callable[[str], bool] | None,
+) -> Callable[[str], bool] | None:
+    """Return a function keeping the selected names, from a collection of names or such a function."""
+    if selection is None or callable(selection):
+        return selection
+    return frozenset(selection).__contains__
+
+
+def _expander(
+    aliases: dict, keep: Callable[[str], bool] | None
+) -> Callable[[tuple], tuple]:
+    """
+    Return a function expanding a sudoers list into its distinct (name, allowed) tuples, in order.
+
+    Each list is only expanded once.  *allowed* is False for names reached through a negation.  With *keep* set, only
+    the names it returns True for are kept.
+    """
+    expanded = {}
+
+    def expand(items: tuple) -> tuple:
+        if items not in expanded:
+            found = ((name, not flag) for name, flag in expand_names(items, aliases))
+            expanded[items] = tuple(
+                item for item in dict.fromkeys(found) if keep is None or keep(item[0])
+            )
+        return expanded[items]
+
+    return expand
+
+
+def expand_permissions(
+    sudoers: Sudoers,
+    *,
+    users: Collection[str] | Callable[[str], bool] | None = None,
+    hosts: Collection[str] | Callable[[str], bool] | None = None,
+    runas: Collection[str] | Callable[[str], bool] | None = None,
+    commands: Collection[str] | Callable[[str], bool] | None = None,
+) -> Generator[Permission, None, None]:
+    """
+    Return every permission named by the rules of a sudoers file, one at a time.
+
+    Aliases are expanded, and every combination of the users, hosts, run as users, run as groups and commands of each
+    command of a rule is yielded.  The order is deterministic: rules in file order, then users, hosts, the commands of
+    the rule, run as users, run as groups and commands after alias expansion, each in the order they appear.  A
+    command only listing run as groups runs as the invoking user, so its *runas* is the *user*.  Names reached through
+    a negation, such as *dave* in "ALL, !dave", are yielded with *allowed* False, like negated commands.  Entries that
+    are not plain names, such as ALL or groups, are yielded as they are written.
+
+    Each filter is either a collection of names or a function returning True for the names to keep, and is applied
+    to the names of each list before any combination is made, so rules without any selected name cost nothing.  Each
+    distinct list is only expanded once, and only the permissions themselves are produced lazily, so memory use does
+    not grow with the number of permissions.
+
+    :param Sudoers sudoers: The parsed sudoers file
+    :param users: The users to keep, all by default
+    :type users: Collection or Callable
+    :param hosts: The hosts to keep, all by default
+    :type hosts: Collection or Callable
+    :param runas: The run as users to keep, all by default
+    :type runas: Collection or Callable
+    :param commands: The commands to keep, after alias expansion, all by default
+    :type commands: Collection or Callable
+
+    :return: A generator of *Permission* tuples
+    :rtype: Generator[Permission, None, None]
+    """
+    keep_runas = _predicate(runas)
+    expand_users = _expander(dict(sudoers.user_aliases), _predicate(users))
+    expand_hosts = _expander(dict(sudoers.host_aliases), _predicate(hosts))
+    expand_runas = _expander(dict(sudoers.runas_aliases), keep_runas)
+    expand_groups = _expander(dict(sudoers.runas_aliases), None)
+    expand_commands = _expander(dict(sudoers.cmnd_aliases), _predicate(commands))
+
+    for rule in sudoers.rules:
+        user_names = expand_users(rule.users)
+        if not user_names:
+            continue
+        host_names = expand_hosts(rule.hosts)
+        if not host_names:
+            continue
+
+        entries = [
+            (
+                # None stands for the invoking user
+                expand_runas(entry.run_as_users) if entry.run_as_users else None,
+                expand_groups(entry.run_as_groups) or (("", True),),
+                expand_commands((entry.command,)),
+                entry.tags or (),
+            )
+            for entry in rule.commands
+        ]
+        for (user, user_allowed), (host, host_allowed) in product(
+            user_names, host_names
+        ):
+            allowed = user_allowed and host_allowed
+            invoking = ((user, True),) if keep_runas is None or keep_runas(user) else ()
+            for runas_names, group_names, command_names, tags in entries:
+                for runas_item, group_item, command_item in product(
+                    invoking if runas_names is None else runas_names,
+                    group_names,
+                    command_names,
+                ):
+                    yield Permission(
+                        user,
+                        host,
+                        runas_item[0],
+                        group_item[0],
+                        command_item[0],
+                        tags,
+                        allowed and runas_item[1] and group_item[1] and command_item[1],
+                    )
+
+
+def _chunks(items: Iterable, size: int) -> Generator[list, None, None]:
+    """Return lists of up to *size* consecutive items."""
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def write_ndjson(
+    permissions: Iterable[Permission], stream: TextIO, chunk_size: int = 10000
+) -> int:
+    """
+    Write permissions as newline delimited JSON, one object per permission.
+
+    The permissions are consumed and written *chunk_size* at a time, so a generator is never held in memory.
+
+    :param Iterable permissions: The permissions, such as from *expand_permissions*
+    :param TextIO stream: The text stream to write to
+    :param int chunk_size: The number of permissions written at a time
+
+    :return: The number of permissions written
+    :rtype: int
+    """
+    count = 0
+    for chunk in _chunks(permissions, chunk_size):
+        stream.write(
+            "".join(json.dumps(permission._asdict()) + "\n" for permission in chunk)
+        )
+        count += len(chunk)
+
+    return count
+
+
+def write_csv(
+    permissions: Iterable[Permission],
+    stream: TextIO,
+    chunk_size: int = 10000,
+    *,
+    header: bool = True,
+) -> int:
+    """
+    Write permissions as CSV, with the columns of *FIELDS* and the tags of each permission joined with commas.
+
+    The permissions are consumed and written *chunk_size* at a time, so a generator is never held in memory.  Open
+    files with newline="" so the line endings are written as the csv module expects.
+
+    :param Iterable permissions: The permissions, such as from *expand_permissions*
+    :param TextIO stream: The text stream to write to
+    :param int chunk_size: The number of permissions written at a time
+    :param bool header: Whether to write a header line first
+
+    :return: The number of permissions written, without the header
+    :rtype: int
+    """
+    if header:
+        csv.writer(stream).writerow(FIELDS)
+
+    count = 0
+    for chunk in _chunks(permissions, chunk_size):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (*permission[:5], ",".join(permission.tags), permission.allowed)
+            for permission in chunk
+        )
+        stream.write(buffer.getvalue())
+        count += len(chunk)
+
+    return count
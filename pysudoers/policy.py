@@ -0,0 +1,659 @@
+"""Answer permission questions against a parsed sudoers file."""
+
+from __future__ import annotations
+
+import re
+from functools import cache, lru_cache
+from typing import TYPE_CHECKING
+
+from pysudoers import CyclicAliasExceptionError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable
+
+    from pysudoers import Sudoers
+    from pysudoers.models import CommandSpec
+
+# Characters that make a name a shell style pattern instead of a literal
+_GLOB_CHARS = frozenset("*?[")
+# Prefixes of user list entries that refer to netgroups or ids instead of a user name
+_USER_PREFIXES = ("+", "#")
+
+
+@cache
+def _glob_re(pattern: str, *, pathname: bool) -> re.Pattern:
+    """
+    Return a compiled regular expression for a shell style pattern, as matched by fnmatch(3).
+
+    With *pathname* set, wildcards never match a slash, just like the FNM_PATHNAME flag sudo uses for command paths.
+    """
+    anychar = "[^/]" if pathname else "."
+    regex = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        index += 1
+        if char == "*":
+            regex.append(anychar + "*")
+        elif char == "?":
+            regex.append(anychar)
+        elif char == "\\" and index < len(pattern):
+            regex.append(re.escape(pattern[index]))
+            index += 1
+        elif char == "[" and "]" in pattern[index + 1 :]:
+            end = pattern.index("]", index + 1)
+            body = pattern[index:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex.append(f"[{body}]")
+            index = end + 1
+        else:
+            regex.append(re.escape(char))
+
+    return re.compile("".join(regex) + r"\Z", re.DOTALL)
+
+
+def _is_glob(name: str) -> bool:
+    """Return whether the name contains any shell style wildcard."""
+    return not _GLOB_CHARS.isdisjoint(name)
+
+
+def command_matches(spec: str, command: str) -> bool:
+    """
+    Return whether a command from a sudoers file allows the provided command line.
+
+    The semantics follow sudoers(5): *ALL* allows everything, a path ending in a slash allows any file in that
+    directory, a command without arguments allows any arguments, *""* as the arguments allows none, and shell style
+    wildcards are allowed in both the path and the arguments.
+
+    :param str spec: A command as written in the sudoers file, without any leading "!"
+    :param str command: The full command line being checked
+
+    :return: True if the command line is allowed by the spec
+    :rtype: bool
+    """
+    if spec == "ALL":
+        return True
+
+    spec_path, _, spec_args = spec.partition(" ")
+    path, _, args = command.strip().partition(" ")
+    spec_args = spec_args.strip()
+    args = args.strip()
+
+    if spec_path.endswith("/"):
+        # A directory allows every file directly inside it, with any arguments
+        return (
+            path.startswith(spec_path)
+            and "/" not in path[len(spec_path) :]
+            and path != spec_path
+        )
+
+    return _pattern_matches(spec_path, path, pathname=True) and _args_match(
+        spec_args, args
+    )
+
+
+def _pattern_matches(pattern: str, value: str, *, pathname: bool) -> bool:
+    """Return whether the value matches a literal or shell style pattern."""
+    if _is_glob(pattern):
+        return bool(_glob_re(pattern, pathname=pathname).match(value))
+
+    return pattern == value
+
+
+def _args_match(spec_args: str, args: str) -> bool:
+    """Return whether the arguments of a command line are allowed by the arguments of a sudoers command."""
+    if not spec_args:
+        return True
+    if spec_args == '""':
+        return not args
+
+    return _pattern_matches(spec_args, args, pathname=False)
+
+
+def evaluate(
+    items: Iterable[str],
+    aliases: dict,
+    leaf: Callable[[str], bool],
+    memo: dict | None = None,
+) -> bool | None:
+    """
+    Evaluate a sudoers list against a single value, with sudo's "last match wins" semantics.
+
+    Every entry of the list may be negated with one or more "!" and may be an alias from *aliases*, which is evaluated
+    as a list in turn.  An entry that matches sets the result to allowed, or denied when negated, and the last such
+    entry of the list decides.
+
+    :param Iterable items: The list of entries from the sudoers file
+    :param dict aliases: The aliases of the matching type
+    :param Callable leaf: Return whether a single entry that is not an alias matches the value
+    :param dict memo: If set, keeps the result of every alias evaluated, to share between lists evaluated against the
+                      same value
+
+    :return: True if allowed, False if denied or None if no entry matched
+    :rtype: bool or None
+    """
+    return _evaluate(items, aliases, leaf, (), {} if memo is None else memo)
+
+
+def _evaluate(
+    items: Iterable[str],
+    aliases: dict,
+    leaf: Callable[[str], bool],
+    stack: tuple,
+    memo: dict,
+) -> bool | None:
+    """Evaluate a list for *evaluate*, with *stack* holding the aliases being expanded to detect loops."""
+    result = None
+    for item in items:
+        name = item.lstrip("!")
+        negated = (len(item) - len(name)) % 2 == 1
+
+        if name in memo:
+            match = memo[name]
+        elif name in aliases:
+            if name in stack:
+                errmsg = f"alias loop: {name} is a member of itself"
+                raise CyclicAliasExceptionError(errmsg)
+            match = memo[name] = _evaluate(
+                aliases[name], aliases, leaf, (*stack, name), memo
+            )
+        else:
+            match = True if leaf(name) else None
+
+        if match is not None:
+            result = match != negated
+
+    return result
+
+
+def expand_names(items: Iterable[str], aliases: dict) -> Generator[tuple, None, None]:
+    """
+    Expand every alias of a sudoers list, depth first, keeping track of negations.
+
+    :param Iterable items: The list of entries from the sudoers file
+    :param dict aliases: The aliases of the matching type
+
+    :return: A generator of (name, negated) tuples, negated being True when the name is reached through an odd number
+             of "!"
+    :rtype: Generator[tuple, None, None]
+    """
+    seen = set()
+    stack: list[tuple[str, bool, tuple[str, ...]]] = [
+        (item, False, ()) for item in reversed(list(items))
+    ]
+    while stack:
+        item, negated, parents = stack.pop()
+        name = item.lstrip("!")
+        negated ^= (len(item) - len(name)) % 2 == 1
+
+        if name in aliases:
+            if name in parents:
+                errmsg = f"alias loop: {name} is a member of itself"
+                raise CyclicAliasExceptionError(errmsg)
+            if (name, negated) not in seen:
+                seen.add((name, negated))
+                stack.extend(
+                    (member, negated, (*parents, name))
+                    for member in reversed(aliases[name])
+                )
+        else:
+            yield name, negated
+
+
+def positive_names(items: Iterable[str], aliases: dict) -> tuple[set, bool]:
+    """
+    Return every name a sudoers list could allow, expanding aliases.
+
+    A name can only be allowed by the list when it is reached through an even number of negations.  Group entries are
+    returned as they are written, with their "%".  Entries that are not plain names (ALL, netgroups, ids and patterns)
+    cannot be indexed, so the second element of the returned tuple says whether any of them can allow something.
+
+    :param Iterable items: The list of entries from the sudoers file
+    :param dict aliases: The aliases of the matching type
+
+    :return: A tuple of the set of names and whether the list may allow other names
+    :rtype: tuple
+    """
+    names = set()
+    wildcard = False
+    for name, negated in expand_names(items, aliases):
+        if negated:
+            # An entry reached through an odd number of negations can only deny
+            continue
+        if name == "ALL" or name.startswith(_USER_PREFIXES) or _is_glob(name):
+            wildcard = True
+        else:
+            names.add(name)
+
+    return names, wildcard
+
+
+def leaf_matchers(
+    user: str, host: str, command: str, runas: str, groups: Iterable[str]
+) -> tuple:
+    """
+    Return the functions matching single user, host, run as and command entries against a query, for *evaluate*.
+
+    :param str user: The user name
+    :param str host: The host name
+    :param str command: The full command line
+    :param str runas: The user to run the command as
+    :param Iterable groups: The names of the groups the user belongs to
+
+    :return: The user, host, run as and command matching functions
+    :rtype: tuple
+    """
+    group_set = frozenset(groups)
+    host = host.lower()
+
+    def user_leaf(name: str) -> bool:
+        if name.startswith("%"):
+            return name[1:] in group_set
+        return name in {"ALL", user}
+
+    def host_leaf(name: str) -> bool:
+        return name == "ALL" or _pattern_matches(name.lower(), host, pathname=False)
+
+    def runas_leaf(name: str) -> bool:
+        return name in {"ALL", runas}
+
+    def command_leaf(name: str) -> bool:
+        return command_matches(name, command)
+
+    return user_leaf, host_leaf, runas_leaf, command_leaf
+
+
+class Policy:
+    """
+    Compile a parsed sudoers file into indexes that answer "may user U run command C on host H as R".
+
+    Every rule is indexed under the users and hosts it could allow, after expanding aliases.  A query only evaluates
+    the rules found under both the user and the host, walking them from last to first so the first full match is the
+    one sudo would use.  The policy reflects the *Sudoers* object at the time it was built.
+    """
+
+    def __init__(self, sudoers: Sudoers) -> None:
+        """
+        Initialize the class.
+
+        :param Sudoers sudoers: The parsed sudoers file
+        """
+        self._rules = list(sudoers.rules)
+        self._user_aliases = dict(sudoers.user_aliases)
+        self._host_aliases = dict(sudoers.host_aliases)
+        self._runas_aliases = dict(sudoers.runas_aliases)
+        self._cmnd_aliases = dict(sudoers.cmnd_aliases)
+
+        self._by_user = {}
+        self._any_user = set()
+        self._by_host = {}
+        self._any_host = set()
+
+        # Rules share their user and host lists, so expand each distinct list once
+        users_names = {}
+        hosts_names = {}
+        for index, rule in enumerate(self._rules):
+            if rule.users not in users_names:
+                users_names[rule.users] = positive_names(rule.users, self._user_aliases)
+            names, wildcard = users_names[rule.users]
+            for name in names:
+                self._by_user.setdefault(name, set()).add(index)
+            if wildcard:
+                self._any_user.add(index)
+
+            # Host names are not case sensitive
+            if rule.hosts not in hosts_names:
+                hosts_names[rule.hosts] = positive_names(rule.hosts, self._host_aliases)
+            names, wildcard = hosts_names[rule.hosts]
+            for name in names:
+                self._by_host.setdefault(name.lower(), set()).add(index)
+            if wildcard:
+                self._any_host.add(index)
+
+        self._user_matches = lru_cache(maxsize=1024)(self._match_user)
+
+    @property
+    def rules(self) -> list:
+        """Return the rules the policy was built from."""
+        return self._rules
+
+    def _user_candidates(self, user: str, groups: Iterable[str]) -> set:
+        """Return the indexes of the rules indexed under a user or any of its groups."""
+        users = self._any_user | self._by_user.get(user, set())
+        for group in groups:
+            users |= self._by_user.get(f"%{group}", set())
+        return users
+
+    def candidates(self, user: str, host: str, groups: Iterable[str] = ()) -> list:
+        """
+        Return the indexes of the rules that may apply to a user on a host, last rule first.
+
+        Entries that are not plain names or groups, such as netgroups, are indexed as matching anyone, so the
+        candidates are a superset of the rules that apply.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param Iterable groups: The names of the groups the user belongs to
+
+        :return: A list of indexes into *rules*
+        :rtype: list
+        """
+        users = self._user_candidates(user, groups)
+        if not users:
+            return []
+        hosts = self._any_host | self._by_host.get(host.lower(), set())
+
+        return sorted(users & hosts, reverse=True)
+
+    def _match_user(self, user: str, groups: frozenset) -> frozenset:
+        """Return the indexes of the rules whose user list allows a user, for *matching*."""
+        user_leaf = leaf_matchers(user, "", "", "", groups)[0]
+        matches = set()
+        allowed = {}
+        memo = {}
+        for index in self._user_candidates(user, groups):
+            users = self._rules[index].users
+            if users not in allowed:
+                allowed[users] = evaluate(users, self._user_aliases, user_leaf, memo)
+            if allowed[users]:
+                matches.add(index)
+        return frozenset(matches)
+
+    def matching(
+        self, user: str, host: str, groups: Iterable[str] = ()
+    ) -> Generator[int, None, None]:
+        """
+        Return the indexes of the rules whose user and host lists both allow a user on a host, last rule first.
+
+        The rules allowing each user are remembered, so later queries for the same user only evaluate host lists.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param Iterable groups: The names of the groups the user belongs to
+
+        :return: A generator of indexes into *rules*
+        :rtype: Generator[int, None, None]
+        """
+        users = self._user_matches(user, frozenset(groups))
+        if not users:
+            return
+        host_leaf = leaf_matchers(user, host, "", "", ())[1]
+        hosts = self._any_host | self._by_host.get(host.lower(), set())
+        allowed = {}
+        memo = {}
+        for index in sorted(users & hosts, reverse=True):
+            items = self._rules[index].hosts
+            if items not in allowed:
+                allowed[items] = evaluate(items, self._host_aliases, host_leaf, memo)
+            if allowed[items]:
+                yield index
+
+    def _runas_matches(
+        self,
+        entry: CommandSpec,
+        user: str | None,
+        runas_leaf: Callable[[str], bool],
+        group_leaf: Callable[[str], bool] | None,
+    ) -> bool:
+        """
+        Return whether the run as list of a command entry allows a query, for *decide*.
+
+        An entry only listing groups runs commands as the invoking user, never as another user.  A run as group is
+        only allowed by the groups of the list, the groups of the target user are not looked up.
+        """
+        if entry.run_as_users:
+            if not evaluate(entry.run_as_users, self._runas_aliases, runas_leaf):
+                return False
+        elif user is None or not runas_leaf(user):
+            return False
+
+        if group_leaf is None:
+            return True
+        return bool(evaluate(entry.run_as_groups, self._runas_aliases, group_leaf))
+
+    def decide(
+        self,
+        indexes: Iterable[int],
+        command: str,
+        runas: str = "root",
+        runas_group: str | None = None,
+        user: str | None = None,
+    ) -> dict | None:
+        """
+        Find the command entry sudo would use for a command among the rules matching a user and host.
+
+        :param Iterable indexes: The indexes of the matching rules, last rule first, see *matching*
+        :param str command: The full command line
+        :param str runas: The user to run the command as
+        :param str runas_group: If set, the group to run the command as
+        :param str user: The invoking user, allowed as the run as user of entries only listing groups
+
+        :return: None when nothing matches, else a dictionary as returned by *lookup*
+        :rtype: dict or None
+        """
+        _, _, runas_leaf, command_leaf = leaf_matchers("", "", command, runas, ())
+        group_leaf = (
+            None
+            if runas_group is None
+            else leaf_matchers("", "", "", runas_group, ())[2]
+        )
+        for index in indexes:
+            for entry in reversed(self._rules[index].commands):
+                if not self._runas_matches(entry, user, runas_leaf, group_leaf):
+                    continue
+                allowed = evaluate((entry.command,), self._cmnd_aliases, command_leaf)
+                if allowed is not None:
+                    return {"rule": index, "command": entry, "allowed": allowed}
+
+        return None
+
+    def lookup(  # noqa: PLR0913
+        self,
+        user: str,
+        host: str,
+        command: str,
+        runas: str = "root",
+        groups: Iterable[str] = (),
+        *,
+        runas_group: str | None = None,
+    ) -> dict | None:
+        """
+        Find the command entry sudo would use for a user running a command on a host as another user.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param str command: The full command line
+        :param str runas: The user to run the command as
+        :param Iterable groups: The names of the groups the user belongs to
+        :param str runas_group: If set, the group to run the command as
+
+        :return: None when nothing matches, else a dictionary with the keys *rule* (the index into *rules*),
+                 *command* (the matching command dictionary of the rule) and *allowed* (False for a negated command)
+        :rtype: dict or None
+        """
+        return self.decide(
+            self.matching(user, host, groups), command, runas, runas_group, user
+        )
+
+    def can(  # noqa: PLR0913
+        self,
+        user: str,
+        host: str,
+        command: str,
+        runas: str = "root",
+        groups: Iterable[str] = (),
+        *,
+        runas_group: str | None = None,
+    ) -> bool:
+        """
+        Return whether the policy allows a user to run a command on a host as another user.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param str command: The full command line
+        :param str runas: The user to run the command as
+        :param Iterable groups: The names of the groups the user belongs to
+        :param str runas_group: If set, the group to run the command as
+
+        :return: True if allowed
+        :rtype: bool
+        """
+        match = self.lookup(
+            user, host, command, runas=runas, groups=groups, runas_group=runas_group
+        )
+        return match is not None and match["allowed"]
+
+
+class _TrieNode:
+    """Hold the commands of a *CommandIndex* stored under one path component."""
+
+    __slots__ = ("children", "dirs", "exact", "patterns")
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children = {}
+        # Commands naming exactly this path, directories ending at this path and patterns whose literal part ends here
+        self.exact = []
+        self.dirs = []
+        self.patterns = []
+
+
+class CommandIndex:
+    """
+    Index the commands of a parsed sudoers file by path, to find the rules that allow running a given command.
+
+    Every command of every rule is expanded through the command aliases and stored in a trie of path components.  A
+    plain path is stored at its own node, a directory (a path ending in a slash) at the node of the directory and a
+    path with wildcards at the node of its longest literal prefix.  *ALL* is kept aside since it matches everything.
+    A query only visits the nodes along the path of the command.  The index reflects the *Sudoers* object at the time
+    it was built.
+    """
+
+    def __init__(self, sudoers: Sudoers) -> None:
+        """
+        Initialize the class.
+
+        :param Sudoers sudoers: The parsed sudoers file
+        """
+        self._rules = list(sudoers.rules)
+        self._root = _TrieNode()
+        self._all = []
+
+        cmnd_aliases = dict(sudoers.cmnd_aliases)
+        order = 0
+        for rule_index, rule in enumerate(self._rules):
+            for entry in rule.commands:
+                for spec, negated in expand_names((entry.command,), cmnd_aliases):
+                    order += 1
+                    self._insert(
+                        order,
+                        {
+                            "rule": rule_index,
+                            "command": entry,
+                            "spec": spec,
+                            "allowed": not negated,
+                        },
+                    )
+
+    @property
+    def rules(self) -> list:
+        """Return the rules the index was built from."""
+        return self._rules
+
+    @staticmethod
+    def _components(path: str) -> list:
+        """Split a path into its non-empty components."""
+        return [part for part in path.split("/") if part]
+
+    def _insert(self, order: int, match: dict) -> None:
+        """Store a match, along with its position in the file, at the trie node of its command."""
+        spec = match["spec"]
+        if spec == "ALL":
+            self._all.append((order, match))
+            return
+
+        path = spec.partition(" ")[0]
+        components = self._components(path)
+        if _is_glob(path):
+            # Stop at the first component with a wildcard
+            components = components[
+                : next(index for index, part in enumerate(components) if _is_glob(part))
+            ]
+            bucket = "patterns"
+        elif path.endswith("/"):
+            bucket = "dirs"
+        else:
+            bucket = "exact"
+
+        node = self._root
+        for part in components:
+            node = node.children.setdefault(part, _TrieNode())
+        getattr(node, bucket).append((order, match))
+
+    def lookup(self, command: str) -> list:
+        """
+        Return every command of every rule matching a command line.
+
+        The matches are in rule order, with *allowed* False for negated commands, so the last match of the rules that
+        apply to a given user and host decides, just as it does for sudo.
+
+        :param str command: The full command line, or just the path of a command
+
+        :return: A list of dictionaries with the keys *rule* (the index into *rules*), *command* (the command
+                 dictionary of the rule), *spec* (the command after alias expansion) and *allowed*
+        :rtype: list
+        """
+        components = self._components(command.strip().partition(" ")[0])
+
+        found = list(self._all)
+        node = self._root
+        for depth in range(len(components) + 1):
+            found.extend(node.patterns)
+            if depth == len(components) - 1:
+                found.extend(node.dirs)
+            elif depth == len(components):
+                found.extend(node.exact)
+                break
+            node = node.children.get(components[depth])
+            if node is None:
+                break
+
+        return self._sorted(
+            item for item in found if command_matches(item[1]["spec"], command)
+        )
+
+    def under(self, prefix: str) -> list:
+        """
+        Return every command of every rule that may run something below a directory.
+
+        This includes the commands stored anywhere below the directory, plus *ALL* and the patterns stored above it
+        since they may match below it as well.
+
+        :param str prefix: The path of the directory
+
+        :return: A list of dictionaries, in the same format as *lookup*
+        :rtype: list
+        """
+        found = list(self._all)
+        node = self._root
+        for part in self._components(prefix):
+            found.extend(node.patterns)
+            node = node.children.get(part)
+            if node is None:
+                return self._sorted(found)
+
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            found.extend(node.exact)
+            found.extend(node.dirs)
+            found.extend(node.patterns)
+            pending.extend(node.children.values())
+
+        return self._sorted(found)
+
+    @staticmethod
+    def _sorted(found: Iterable[tuple]) -> list:
+        """Return the matches of (position, match) tuples in the order they appear in the file."""
+        return [match for _, match in sorted(found, key=lambda item: item[0])]
@@ -0,0 +1,167 @@
+"""Cache the answers to repeated permission questions against a parsed sudoers file."""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+from pysudoers.lru import CacheStats, TTLCache
+from pysudoers.policy import Policy
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from pysudoers import Sudoers
+
+# Marks a cache miss, None being a valid answer
+_MISSING = object()
+
+
+class QueryCache:
+    """
+    Answer permission questions and resolve aliases against a parsed sudoers file, caching the answers.
+
+    Answers are keyed on the question and the *generation* of the *Sudoers* object, so any new data published by
+    parsing or *reload* is seen by the next question: the cache is emptied and the *Policy* behind it is built again
+    from a *snapshot* of the new data, so every answer comes from one consistent version of it.  At most *maxsize* of
+    the most recently used answers are kept, each for at most *ttl* seconds when set.  The cache is safe to share
+    between threads, even while another thread reloads the *Sudoers* object.
+    """
+
+    def __init__(
+        self, sudoers: Sudoers, maxsize: int = 65536, ttl: float | None = None
+    ) -> None:
+        """
+        Initialize the class.
+
+        :param Sudoers sudoers: The parsed sudoers file
+        :param int maxsize: The number of answers to keep
+        :param float ttl: The number of seconds to keep an answer, forever when None
+        """
+        self.sudoers = sudoers
+        self.cache = TTLCache(maxsize, ttl)
+        self.invalidations = 0
+        self._snapshot = None
+        self._policy = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> tuple:
+        """Return a snapshot of the current data and its policy, emptying the cache when the data changed."""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.generation != self.sudoers.generation:
+                if snapshot is not None:
+                    self.cache.clear()
+                    self.invalidations += 1
+                snapshot = self._snapshot = self.sudoers.snapshot()
+                self._policy = Policy(snapshot)
+            return snapshot, self._policy
+
+    def lookup(  # noqa: PLR0913
+        self,
+        user: str,
+        host: str,
+        command: str,
+        runas: str = "root",
+        groups: Iterable[str] = (),
+        *,
+        runas_group: str | None = None,
+    ) -> dict | None:
+        """
+        Find the command entry sudo would use for a user running a command on a host as another user.
+
+        The arguments and the result are the same as for *Policy.lookup*.  A new dictionary is returned on every
+        call, so changing it does not change the cached answer.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param str command: The full command line
+        :param str runas: The user to run the command as
+        :param Iterable groups: The names of the groups the user belongs to
+        :param str runas_group: If set, the group to run the command as
+
+        :return: None when nothing matches, else a dictionary with the keys *rule*, *command* and *allowed*
+        :rtype: dict or None
+        """
+        snapshot, policy = self._current()
+        groups = frozenset(groups)
+        key = (
+            "lookup",
+            snapshot.generation,
+            user,
+            host,
+            command,
+            runas,
+            groups,
+            runas_group,
+        )
+        result = self.cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = policy.lookup(
+                user, host, command, runas, groups, runas_group=runas_group
+            )
+            self.cache.put(key, result)
+        return dict(result) if isinstance(result, dict) else None
+
+    def can(  # noqa: PLR0913
+        self,
+        user: str,
+        host: str,
+        command: str,
+        runas: str = "root",
+        groups: Iterable[str] = (),
+        *,
+        runas_group: str | None = None,
+    ) -> bool:
+        """
+        Return whether the policy allows a user to run a command on a host as another user.
+
+        :param str user: The user name
+        :param str host: The host name
+        :param str command: The full command line
+        :param str runas: The user to run the command as
+        :param Iterable groups: The names of the groups the user belongs to
+        :param str runas_group: If set, the group to run the command as
+
+        :return: True if the last matching command allows it
+        :rtype: bool
+        """
+        result = self.lookup(
+            user, host, command, runas, groups, runas_group=runas_group
+        )
+        return result is not None and result["allowed"]
+
+    def _resolve(self, alias_type: str, name: str) -> list:
+        """Return the cached expansion of a name for the *resolve_* methods."""
+        snapshot = self._current()[0]
+        key = (alias_type, snapshot.generation, name)
+        names = self.cache.get(key, _MISSING)
+        if not isinstance(names, tuple):
+            names = tuple(snapshot._resolve_aliases(alias_type, name))  # noqa: SLF001
+            self.cache.put(key, names)
+        return list(names)
+
+    def resolve_command(self, command: str) -> list:
+        """Resolve the provided command for any aliases that may exist."""
+        return self._resolve("Cmnd_Alias", command)
+
+    def resolve_host(self, host: str) -> list:
+        """Resolve the provided host for any aliases that may exist."""
+        return self._resolve("Host_Alias", host)
+
+    def resolve_runas(self, runas: str) -> list:
+        """Resolve the provided run as user for any aliases that may exist."""
+        return self._resolve("Runas_Alias", runas)
+
+    def resolve_user(self, user: str) -> list:
+        """Resolve the provided user for any aliases that may exist."""
+        return self._resolve("User_Alias", user)
+
+    def stats(self) -> CacheStats:
+        """
+        Return the counters of the cache.
+
+        :return: The hits, misses, evictions, expirations and size
+        :rtype: CacheStats
+        """
+        return self.cache.stats()
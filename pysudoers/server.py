@@ -0,0 +1,485 @@
+"""Answer permission questions about a sudoers file from a long-lived local service over a Unix domain socket."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import signal
+import sys
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import NamedTuple, overload
+
+from pysudoers import (
+    LOGGER,
+    BadAliasExceptionError,
+    BadDefaultsExceptionError,
+    BadIncludeExceptionError,
+    BadRuleExceptionError,
+    CyclicAliasExceptionError,
+    DuplicateAliasExceptionError,
+    Sudoers,
+)
+from pysudoers.defaults import DefaultsIndex
+from pysudoers.querycache import QueryCache
+
+# The longest request line accepted, in bytes
+MAX_REQUEST_SIZE = 1024 * 1024
+# The errors that keep the previous snapshot when reloading, instead of stopping the server
+RELOAD_ERRORS = (
+    BadAliasExceptionError,
+    BadDefaultsExceptionError,
+    BadIncludeExceptionError,
+    BadRuleExceptionError,
+    CyclicAliasExceptionError,
+    DuplicateAliasExceptionError,
+    OSError,
+    UnicodeDecodeError,
+)
+# The alias types of the "resolve" request
+RESOLVERS = {
+    "command": "resolve_command",
+    "host": "resolve_host",
+    "runas": "resolve_runas",
+    "user": "resolve_user",
+}
+
+
+class Snapshot(NamedTuple):
+    """
+    One parsed version of the sudoers file, along with the caches answering questions about it.
+
+    The *Policy* of *queries* and the *DefaultsIndex* are built along with the snapshot, in the thread that parsed the
+    file, so the event loop never builds them.  *stamps* pairs the file, and every file its includes name when they are
+    followed, with its modification time, size and inode when it was read, and *digest* is the SHA-256 of the file.
+    A snapshot is never changed once it is published, a reload publishes a new one.
+    """
+
+    sudoers: Sudoers
+    queries: QueryCache
+    defaults: DefaultsIndex
+    stamps: tuple
+    digest: bytes
+
+
+def _stamp(path: Path) -> tuple | None:
+    """Return the modification time, size and inode of a file, None if it cannot be read."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino, stat.st_dev)
+
+
+class _MissingArgumentError(Exception):
+    """Raised when a request lacks an argument its op needs."""
+
+
+class _Request(dict):
+    """A request whose missing arguments raise *_MissingArgumentError*, so they are told apart from other errors."""
+
+    def __missing__(self, key: str) -> object:
+        raise _MissingArgumentError(key)
+
+
+def _json_default(value: object) -> object:
+    """Convert the values json cannot serialize, such as *CommandSpec* objects and sets."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    errmsg = f"cannot serialize {type(value).__name__}"
+    raise TypeError(errmsg)
+
+
+class PolicyServer:
+    """
+    Serve JSON questions about a sudoers file over a Unix domain socket.
+
+    Each request is one JSON object on a line, with an *op* and its arguments and optionally an *id*, which is copied
+    into the response, also one JSON object on a line, holding either *result* or *error*.  Clients may send any
+    number of requests without waiting for the responses, which are sent in the order of the requests.  The ops are:
+
+    - *can* and *lookup*: *user*, *host*, *command* and optionally *runas*, *groups* and *runas_group*, as for *Policy*
+    - *defaults*: *user*, *host* and optionally *runas*, *command* and *groups*, as for *DefaultsIndex*
+    - *resolve*: *type* (user, host, runas or command) and *name*
+    - *status*: the path, generation and cache counters of the current snapshot
+    - *reload*: parse the file again, even if it did not change
+
+    The file is checked for changes every *interval* seconds.  A changed file is read and parsed in a worker thread,
+    and the new snapshot replaces the old one in a single assignment once it is ready, so questions keep being
+    answered from the old snapshot while the file is parsed.  If the new contents fail to parse, the old snapshot is
+    kept.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        follow_includes: bool = False,
+        cache_size: int = 65536,
+        interval: float = 2.0,
+    ) -> None:
+        """
+        Initialize the class, parsing the file.
+
+        :param path: The path to the sudoers file
+        :type path: str or Path
+        :param bool follow_includes: Resolve include directives and merge the included files
+        :param int cache_size: The number of answers each snapshot keeps
+        :param float interval: The number of seconds between checks for changes to the file
+        """
+        self.path = Path(path).resolve()
+        self.follow_includes = follow_includes
+        self.cache_size = cache_size
+        self.interval = interval
+        self.reloads = 0
+        self.snapshot = self._load()
+        self._reloading = None
+
+        self._ops = {
+            "can": self._can,
+            "defaults": self._defaults,
+            "lookup": self._lookup,
+            "resolve": self._resolve,
+            "status": self._status,
+        }
+
+    def _stamps(self, sudoers: Sudoers | None) -> tuple:
+        """
+        Return the (path, stamp) pairs of the file and, when includes are followed, of every file they name now.
+
+        The directories of *includedir* directives are listed again, so adding or removing a file changes the stamps.
+
+        :param Sudoers sudoers: The parsed file whose include directives are checked, None for the file alone
+
+        :return: The pairs, in the order the files are read
+        :rtype: tuple
+        """
+        paths = [self.path]
+        if self.follow_includes and sudoers is not None:
+            for position, include in enumerate(sudoers.includes):
+                span = sudoers.span("Include", position)
+                with contextlib.suppress(OSError):
+                    paths.extend(
+                        Sudoers.include_paths(include, span.path if span else None)
+                    )
+        return tuple((path, _stamp(path)) for path in dict.fromkeys(paths))
+
+    @overload
+    def _load(self, previous: None = None, *, force: bool = False) -> Snapshot: ...
+
+    @overload
+    def _load(self, previous: Snapshot, *, force: bool = False) -> Snapshot | None: ...
+
+    def _load(
+        self, previous: Snapshot | None = None, *, force: bool = False
+    ) -> Snapshot | None:
+        """
+        Read and parse the file into a snapshot.
+
+        :param Snapshot previous: The current snapshot, whose digest is compared with the contents read
+        :param bool force: Parse the file even if its contents are the same as those of *previous*
+
+        :return: The new snapshot, None if the contents are the same as those of *previous*
+        :rtype: Snapshot or None
+        """
+        before = dict(self._stamps(None if previous is None else previous.sudoers))
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).digest()
+        # The digest only covers the file itself, not the files it includes
+        if (
+            previous is not None
+            and not force
+            and not self.follow_includes
+            and digest == previous.digest
+        ):
+            return None
+
+        sudoers = Sudoers.from_bytes(
+            raw, self.path, follow_includes=self.follow_includes
+        )
+        queries = QueryCache(sudoers, maxsize=self.cache_size)
+        # Build the policy now, instead of on the event loop when the first question comes
+        queries._current()  # noqa: SLF001
+        # A file that changed while it was read keeps its earlier stamp, so the next check reads it again
+        stamps = tuple(
+            (path, before.get(path, stamp)) for path, stamp in self._stamps(sudoers)
+        )
+        return Snapshot(sudoers, queries, DefaultsIndex(sudoers), stamps, digest)
+
+    async def reload(self, *, force: bool = False) -> bool:
+        """
+        Parse the file again in a worker thread if it changed, and publish the new snapshot.
+
+        Concurrent calls share a single reload.
+
+        :param bool force: Parse the file even if the modification times, sizes, inodes and contents did not change
+
+        :return: True if a new snapshot was published
+        :rtype: bool
+        """
+        if self._reloading is not None:
+            return await asyncio.shield(self._reloading)
+        if not force and self._stamps(self.snapshot.sudoers) == self.snapshot.stamps:
+            return False
+
+        self._reloading = asyncio.ensure_future(self._reload(force=force))
+        try:
+            return await asyncio.shield(self._reloading)
+        finally:
+            self._reloading = None
+
+    async def _reload(self, *, force: bool) -> bool:
+        """Parse the file and publish the new snapshot for *reload*."""
+        try:
+            snapshot = await asyncio.to_thread(self._load, self.snapshot, force=force)
+        except RELOAD_ERRORS:
+            LOGGER.exception(
+                "Failed to reload %s, keeping the previous version", self.path
+            )
+            return False
+
+        if snapshot is None:
+            # Only the modification time changed, remember it so the contents are not read again
+            self.snapshot = self.snapshot._replace(
+                stamps=self._stamps(self.snapshot.sudoers)
+            )
+            return False
+
+        self.snapshot = snapshot
+        self.reloads += 1
+        LOGGER.info("Reloaded %s", self.path)
+        return True
+
+    def _can(self, snapshot: Snapshot, request: dict) -> bool:
+        """Answer a *can* request."""
+        return snapshot.queries.can(
+            request["user"],
+            request["host"],
+            request["command"],
+            request.get("runas", "root"),
+            request.get("groups", ()),
+            runas_group=request.get("runas_group"),
+        )
+
+    def _lookup(self, snapshot: Snapshot, request: dict) -> dict | None:
+        """Answer a *lookup* request."""
+        return snapshot.queries.lookup(
+            request["user"],
+            request["host"],
+            request["command"],
+            request.get("runas", "root"),
+            request.get("groups", ()),
+            runas_group=request.get("runas_group"),
+        )
+
+    def _defaults(self, snapshot: Snapshot, request: dict) -> Mapping:
+        """Answer a *defaults* request."""
+        return snapshot.defaults.effective_defaults(
+            request["user"],
+            request["host"],
+            request.get("runas", "root"),
+            request.get("command"),
+            request.get("groups", ()),
+        )
+
+    def _resolve(self, snapshot: Snapshot, request: dict) -> list:
+        """Answer a *resolve* request."""
+        resolver = RESOLVERS.get(request["type"])
+        if resolver is None:
+            errmsg = f"unknown alias type: {request['type']}"
+            raise ValueError(errmsg)
+        return getattr(snapshot.queries, resolver)(request["name"])
+
+    def _status(self, snapshot: Snapshot, request: dict) -> dict:  # noqa: ARG002
+        """Answer a *status* request."""
+        return {
+            "path": str(self.path),
+            "generation": snapshot.sudoers.generation,
+            "reloads": self.reloads,
+            "rules": len(snapshot.sudoers.rules),
+            "cache": snapshot.queries.stats()._asdict(),
+        }
+
+    async def handle(self, line: bytes) -> bytes:
+        """
+        Answer one request line.
+
+        :param bytes line: The JSON request
+
+        :return: The JSON response, ending with a newline
+        :rtype: bytes
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                errmsg = "a request must be a JSON object"
+                raise TypeError(errmsg)  # noqa: TRY301
+            request = _Request(request)
+            request_id = request.get("id")
+            op = request.get("op")
+
+            if op == "reload":
+                result = await self.reload(force=True)
+            else:
+                handler: Callable | None = (
+                    self._ops.get(op) if isinstance(op, str) else None
+                )
+                if handler is None:
+                    errmsg = f"unknown op: {op}"
+                    raise ValueError(errmsg)  # noqa: TRY301
+                # The snapshot is taken once, so a request is answered from a single version of the file
+                result = handler(self.snapshot, request)
+            response = {"id": request_id, "result": result}
+        except _MissingArgumentError as err:
+            response = {"id": request_id, "error": f"missing argument: {err.args[0]}"}
+        except Exception as err:  # noqa: BLE001
+            response = {"id": request_id, "error": f"{type(err).__name__}: {err}"}
+
+        return (json.dumps(response, default=_json_default) + "\n").encode()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Answer the requests of one client until it disconnects.
+
+        :param StreamReader reader: The stream of requests
+        :param StreamWriter writer: The stream of responses
+        """
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                writer.write(await self.handle(line))
+                await writer.drain()
+        except ValueError:
+            # The request line is longer than the limit of the reader
+            writer.write(b'{"id": null, "error": "request too long"}\n')
+        except ConnectionError:
+            pass
+        finally:
+            with contextlib.suppress(ConnectionError):
+                await writer.drain()
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def watch(self) -> None:
+        """
+        Check the file for changes every *interval* seconds, reloading it when it changed.
+
+        A check that fails is logged and the next one is made as usual, so the file keeps being watched.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reload()
+            except Exception:  # noqa: BLE001
+                LOGGER.exception("Failed to check %s for changes", self.path)
+
+    async def serve(self, socket_path: str | Path, mode: int = 0o600) -> None:
+        """
+        Listen on a Unix domain socket and answer requests until cancelled.
+
+        SIGHUP forces a reload where signals are supported.  The umask of the process is changed while the socket is
+        created, so other threads should not create files at the same time.
+
+        :param socket_path: The path of the socket, an existing socket there is replaced
+        :type socket_path: str or Path
+        :param int mode: The permissions of the socket
+        """
+        socket_path = Path(socket_path)
+        with contextlib.suppress(FileNotFoundError):
+            socket_path.unlink()
+
+        # The socket is created with its final permissions, it is never reachable with those of the default umask
+        umask = os.umask(0o777 & ~mode)
+        try:
+            server = await asyncio.start_unix_server(
+                self.handle_connection, path=socket_path, limit=MAX_REQUEST_SIZE
+            )
+        finally:
+            os.umask(umask)
+
+        loop = asyncio.get_running_loop()
+        with contextlib.suppress(NotImplementedError, AttributeError):
+            loop.add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.ensure_future(self.reload(force=True))
+            )
+
+        watcher = asyncio.ensure_future(self.watch())
+        LOGGER.info("Serving %s on %s", self.path, socket_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            with contextlib.suppress(FileNotFoundError):
+                socket_path.unlink()
+
+
+def main(argv: list | None = None) -> int:
+    """
+    Serve questions about a sudoers file over a Unix domain socket until interrupted.
+
+    :param list argv: The command line arguments, *sys.argv* by default
+
+    :return: The exit status
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="pysudoers-server",
+        description="Answer JSON questions about a sudoers file over a Unix domain socket.",
+    )
+    parser.add_argument(
+        "path", nargs="?", default="/etc/sudoers", help="the sudoers file"
+    )
+    parser.add_argument(
+        "-s",
+        "--socket",
+        default=str(Path(os.environ.get("XDG_RUNTIME_DIR", "/run")) / "pysudoers.sock"),
+        help="path of the Unix domain socket",
+    )
+    parser.add_argument(
+        "--mode",
+        type=lambda value: int(value, 8),
+        default=0o600,
+        help="octal permissions of the socket",
+    )
+    parser.add_argument(
+        "--follow-includes",
+        action="store_true",
+        help="merge the files included from the sudoers file",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="seconds between checks for changes to the file",
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=65536, help="number of answers to cache"
+    )
+    args = parser.parse_args(argv)
+
+    server = PolicyServer(
+        args.path,
+        follow_includes=args.follow_includes,
+        cache_size=args.cache_size,
+        interval=args.interval,
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve(args.socket, args.mode))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
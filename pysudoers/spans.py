@@ -0,0 +1,258 @@
+"""Record where every entry of a sudoers file was declared, without keeping copies of its text."""
+
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Self
+
+# The kinds of entries whose spans are looked up by alias name, every other kind is looked up by position
+ALIAS_KINDS = frozenset(("Cmnd_Alias", "Host_Alias", "Runas_Alias", "User_Alias"))
+# A row holds the source number, the first and last line numbers and the start and end offsets of one entry
+_WIDTH = 5
+
+
+class Span(NamedTuple):
+    """
+    The place an entry of a sudoers file was declared.
+
+    The *path* is the file the entry was read from, None when it was not read from a file.  The *line* and *end_line*
+    are the first and last physical lines of the logical line that declared it, starting at 1.  The *start* and *end*
+    are the offsets of its first character and just past its last one, leading and trailing whitespace excluded.
+    Offsets count bytes into a file and characters into a string.
+    """
+
+    path: Path | None
+    line: int
+    end_line: int
+    start: int
+    end: int
+
+
+class SpanTable:
+    """
+    Hold the *Span* of every entry of the internal data of a *Sudoers* object, in arrays of numbers.
+
+    Each entry takes one row of five numbers, so the table stays small however large the file is.  The text of an
+    entry is only sliced from its source when *text* is called: from the string the entry was parsed from, which is
+    kept by reference, or else read again from its file.  Strings are not pickled, only the paths are.  Once *freeze*
+    is called any change raises a *TypeError*, like the other containers of published data.
+    """
+
+    __slots__ = ("_aliases", "_frozen", "_rows", "_sources")
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        # The (path, string) pairs the entries were parsed from, a row refers to one by its position
+        self._sources = []
+        self._rows = {}
+        self._aliases = {}
+        self._frozen = False
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the lines and offsets of the spans, equal contents parsed from different sources are equal."""
+        if not isinstance(other, SpanTable):
+            return NotImplemented
+        return self._rows == other._rows and self._aliases == other._aliases
+
+    def __hash__(self) -> int:
+        """Refuse to hash the table, whose spans can change while it is not frozen."""
+        errmsg = f"unhashable type: {type(self).__name__!r}"
+        raise TypeError(errmsg)
+
+    def __reduce__(self) -> tuple:
+        """Pickle the rows and the paths of the sources, strings are only sliced in the process that parsed them."""
+        sources = [(path, None) for path, _ in self._sources]
+        return (_load_table, (sources, self._rows, self._aliases))
+
+    @property
+    def frozen(self) -> bool:
+        """Return whether the table can no longer be changed."""
+        return self._frozen
+
+    def freeze(self) -> Self:
+        """Stop any further change to the table and return it."""
+        self._frozen = True
+        return self
+
+    def copy(self) -> SpanTable:
+        """Return a copy of the table that can be changed."""
+        table = SpanTable()
+        table._sources = list(self._sources)
+        table._rows = {kind: array("Q", rows) for kind, rows in self._rows.items()}
+        table._aliases = {kind: dict(names) for kind, names in self._aliases.items()}
+        return table
+
+    def _changing(self) -> None:
+        """Refuse a change to a frozen table."""
+        if self._frozen:
+            errmsg = "SpanTable is read-only, parse or reload to change the data"
+            raise TypeError(errmsg)
+
+    def add_source(self, path: Path | None, text: str | None = None) -> int:
+        """
+        Add a source the entries are parsed from.
+
+        :param Path path: The file the entries are read from, None if they are not read from a file
+        :param str text: The string the entries are parsed from, None to read the text from *path* when needed
+
+        :return: The number of the source, to pass to *add*
+        :rtype: int
+        """
+        self._changing()
+        self._sources.append((path, text))
+        return len(self._sources) - 1
+
+    def add(self, kind: str, name: str | None, row: tuple) -> None:
+        """
+        Add the span of the next entry of a kind.
+
+        :param str kind: The kind of the entry, *Rule*, *Defaults*, *Include* or one of the alias types
+        :param str name: The name of an alias, None for the other kinds
+        :param tuple row: The source number, the first and last line numbers and the start and end offsets
+        """
+        self._changing()
+        rows = self._rows.get(kind)
+        if rows is None:
+            rows = self._rows[kind] = array("Q")
+        if kind in ALIAS_KINDS:
+            self._aliases.setdefault(kind, {})[name] = len(rows) // _WIDTH
+        rows.extend(row)
+
+    def adopt(self, other: SpanTable) -> int:
+        """
+        Add the sources of another table, so that its spans can be copied with *extend* and *add_alias*.
+
+        :param SpanTable other: The table the spans are copied from
+
+        :return: The number to add to the source numbers of the other table
+        :rtype: int
+        """
+        self._changing()
+        base = len(self._sources)
+        self._sources.extend(other._sources)
+        return base
+
+    def _rows_of(self, kind: str, start: int, stop: int) -> array:
+        """Return a copy of the rows of the entries of a kind between two positions."""
+        return self._rows.get(kind, array("Q"))[start * _WIDTH : stop * _WIDTH]
+
+    def extend(
+        self,
+        other: SpanTable,
+        base: int,
+        kind: str,
+        start: int,
+        stop: int | None = None,
+    ) -> None:
+        """
+        Add the spans of entries of another table, between two positions.
+
+        :param SpanTable other: The table the spans are copied from
+        :param int base: The number returned by *adopt* for the other table
+        :param str kind: The kind of the entries, *Rule*, *Defaults* or *Include*
+        :param int start: The position of the first entry
+        :param int stop: The position after the last entry, None for the end
+        """
+        self._changing()
+        if stop is None:
+            stop = len(other._rows.get(kind, ())) // _WIDTH
+        rows = other._rows_of(kind, start, stop)
+        for index in range(0, len(rows), _WIDTH):
+            rows[index] += base
+        self._rows.setdefault(kind, array("Q")).extend(rows)
+
+    def add_alias(self, other: SpanTable, base: int, kind: str, name: str) -> None:
+        """
+        Add the span of an alias of another table.
+
+        :param SpanTable other: The table the span is copied from
+        :param int base: The number returned by *adopt* for the other table
+        :param str kind: The alias type
+        :param str name: The name of the alias
+        """
+        position = other._aliases.get(kind, {}).get(name)
+        if position is not None:
+            row = other._rows_of(kind, position, position + 1)
+            row[0] += base
+            self.add(kind, name, tuple(row))
+
+    def _row(self, kind: str, key: int | str) -> tuple | None:
+        """Return the row of an entry, None if it has no span."""
+        if kind in ALIAS_KINDS:
+            position = self._aliases.get(kind, {}).get(key)
+            if position is None:
+                return None
+        elif isinstance(key, int):
+            position = key
+        else:
+            return None
+        rows = self._rows.get(kind, ())
+        count = len(rows) // _WIDTH
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            return None
+        return tuple(rows[position * _WIDTH : (position + 1) * _WIDTH])
+
+    def span(self, row: tuple) -> Span:
+        """
+        Return the span of a row, as passed to *add*.
+
+        :param tuple row: The source number, the first and last line numbers and the start and end offsets
+
+        :return: The span
+        :rtype: Span
+        """
+        return Span(self._sources[row[0]][0], *row[1:])
+
+    def get(self, kind: str, key: int | str) -> Span | None:
+        """
+        Return the span of an entry.
+
+        :param str kind: The kind of the entry, *Rule*, *Defaults*, *Include* or one of the alias types
+        :param key: The position of the entry among those of its kind, or the name of an alias
+        :type key: int or str
+
+        :return: The span, None if the entry has none
+        :rtype: Span or None
+        """
+        row = self._row(kind, key)
+        return None if row is None else self.span(row)
+
+    def text(self, kind: str, key: int | str) -> str | None:
+        """
+        Return the text that declared an entry, from its first to its last character, continuation lines included.
+
+        :param str kind: The kind of the entry, *Rule*, *Defaults*, *Include* or one of the alias types
+        :param key: The position of the entry among those of its kind, or the name of an alias
+        :type key: int or str
+
+        :return: The text, None if the entry has no span or its source was neither kept nor read from a file
+        :rtype: str or None
+        """
+        row = self._row(kind, key)
+        if row is None:
+            return None
+        path, text = self._sources[row[0]]
+        start, end = row[3:]
+        if text is not None:
+            return text[start:end]
+        if path is None:
+            return None
+        # The file is read as it is now, so the text is wrong if it changed since it was parsed
+        with path.open("rb") as sudo:
+            sudo.seek(start)
+            return str(sudo.read(end - start), "ascii")
+
+
+def _load_table(sources: list, rows: dict, aliases: dict) -> SpanTable:
+    """Create a table from its pickled contents."""
+    table = SpanTable()
+    table._sources = sources  # noqa: SLF001
+    table._rows = rows  # noqa: SLF001
+    table._aliases = aliases  # noqa: SLF001
+    return table
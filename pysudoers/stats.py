@@ -0,0 +1,93 @@
+"""Collect statistics while parsing a sudoers file."""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class ParseStats:
+    """
+    Hold the counters and timings gathered while parsing, when passed as *stats* to *Sudoers*.
+
+    *counts* maps each kind of logical line (*Defaults*, *Rule*, *Include* or an alias type) to the number of lines of
+    that kind and *continued* counts the logical lines joined from several physical lines.  *times* holds the
+    cumulative seconds spent in each phase: *read* covers reading the file and joining continuation lines, the
+    *parse_* phases cover parsing each kind of line, with *parse_rule* including *parse_commands*, and *store* covers
+    storing the entries.  The *callback*, if any, is called with every parsed *Entry*.
+    """
+
+    PHASES = (
+        "read",
+        "parse_alias",
+        "parse_commands",
+        "parse_defaults",
+        "parse_include",
+        "parse_rule",
+        "store",
+    )
+
+    def __init__(self, slowest: int = 10, callback: Callable | None = None) -> None:
+        """
+        Initialize the class.
+
+        :param int slowest: The number of slowest lines to keep
+        :param callable callback: A function called with each parsed *Entry*
+        """
+        self.counts = Counter()
+        self.continued = 0
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self.callback = callback
+        self._keep = slowest
+        # A min-heap of (seconds, first line, last line, logical line), the fastest of the kept lines first
+        self._slowest = []
+
+    def record(
+        self, kind: str, start: int, end: int, line: str, seconds: float
+    ) -> None:
+        """
+        Record one parsed logical line.
+
+        :param str kind: The kind of the line
+        :param int start: The first physical line number
+        :param int end: The last physical line number
+        :param str line: The logical line
+        :param float seconds: The time spent parsing the line
+        """
+        self.counts[kind] += 1
+        if end > start:
+            self.continued += 1
+        if kind == "Rule":
+            self.times["parse_rule"] += seconds
+        elif kind == "Defaults":
+            self.times["parse_defaults"] += seconds
+        elif kind == "Include":
+            self.times["parse_include"] += seconds
+        else:
+            self.times["parse_alias"] += seconds
+
+        if len(self._slowest) < self._keep:
+            heapq.heappush(self._slowest, (seconds, start, end, line))
+        elif self._keep and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, start, end, line))
+
+    @property
+    def slowest(self) -> list:
+        """Return the slowest lines as (seconds, first line, last line, logical line) tuples, slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+    def as_dict(self) -> dict:
+        """Return the statistics as a dictionary of plain values, such as for a metrics exporter."""
+        return {
+            "counts": dict(self.counts),
+            "continued": self.continued,
+            "times": dict(self.times),
+            "slowest": [
+                {"seconds": seconds, "line": start, "end_line": end, "text": line}
+                for seconds, start, end, line in self.slowest
+            ],
+        }
@@ -0,0 +1,97 @@
+"""Define the batch parser unit tests."""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from pysudoers import BadRuleExceptionError
+from pysudoers.batch import main, parse_many
+from tests.test_sudoers import TestSudoers
+
+
+class TestBatch(TestSudoers):
+    """Test parsing many files in a process pool."""
+
+    def setUp(self) -> None:
+        """Set up a tree of sudoers files."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp_path = Path(tmpdir.name).resolve()
+        for host, data in [
+            ("host1", "root ALL=ALL\n"),
+            ("host2", "alice ALL=ALL\n"),
+            ("host3", "root ALL=ALL\n"),
+            ("host4", "not a rule\n"),
+        ]:
+            (self.tmp_path / host / "etc").mkdir(parents=True)
+            (self.tmp_path / host / "etc" / "sudoers").write_text(data)
+
+    def test_parse_many(self) -> None:
+        """Identical files are parsed once and failures are reported per file."""
+        results = list(
+            parse_many(
+                [self.tmp_path / "**" / "sudoers", self.tmp_path / "missing"],
+                max_workers=2,
+                chunksize=1,
+            )
+        )
+        assert len(results) == 4  # noqa: PLR2004
+        by_host = {
+            result.paths[0].relative_to(self.tmp_path).parts[0]: result
+            for result in results
+        }
+
+        assert isinstance(by_host["missing"].error, FileNotFoundError)
+        assert by_host["host1"].paths == [
+            self.tmp_path / "host1" / "etc" / "sudoers",
+            self.tmp_path / "host3" / "etc" / "sudoers",
+        ]
+        first, second = by_host["host1"].sudoers, by_host["host2"].sudoers
+        assert first is not None
+        assert second is not None
+        assert first.rules[0]["users"] == ["root"]
+        assert first.path == self.tmp_path / "host1" / "etc" / "sudoers"
+        assert second.rules[0]["users"] == ["alice"]
+        assert isinstance(by_host["host4"].error, BadRuleExceptionError)
+        assert by_host["host4"].sudoers is None
+
+    def test_main(self) -> None:
+        """The command line writes one JSON summary per distinct file and fails on errors."""
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            status = main(
+                ["-j", "1", str(self.tmp_path / "host[123]" / "etc" / "sudoers")]
+            )
+        assert status == 0
+        summaries = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        assert sorted(len(summary["paths"]) for summary in summaries) == [1, 2]
+        assert all(summary["rules"] == 1 for summary in summaries)
+
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            assert main([str(self.tmp_path / "host4" / "etc" / "sudoers")]) == 1
+
+    def test_keep_going(self) -> None:
+        """Every error of every file is reported with its location."""
+        (self.tmp_path / "host2" / "etc" / "sudoers").write_text(
+            "bad one\nalice ALL=ALL\nbad two\n"
+        )
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            status = main(["-k", str(self.tmp_path / "host[24]" / "etc" / "sudoers")])
+        assert status == 1
+        summaries = {
+            Path(summary["paths"][0]).parts[-3]: summary
+            for summary in map(json.loads, stdout.getvalue().splitlines())
+        }
+        assert summaries["host2"]["rules"] == 1
+        assert [
+            (error["line"], error["message"]) for error in summaries["host2"]["errors"]
+        ] == [
+            (1, "invalid rule: bad one"),
+            (3, "invalid rule: bad two"),
+        ]
+        assert summaries["host4"]["errors"][0]["path"] == str(
+            self.tmp_path / "host4" / "etc" / "sudoers"
+        )
@@ -0,0 +1,103 @@
+"""Define the parse cache unit tests."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from pysudoers import Sudoers
+from pysudoers.cache import ParseCache
+from tests.test_sudoers import TestSudoers
+
+
+class TestParseCache(TestSudoers):
+    """Test caching parsed files on disk."""
+
+    def setUp(self) -> None:
+        """Set up an empty cache directory."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp = Path(tmpdir.name)
+        self.cache = ParseCache(self.tmp / "cache")
+
+    def test_hit(self) -> None:
+        """A second load of an unchanged file is served from the cache without parsing."""
+        first = self.cache.load(self.test_correct_file)
+        with mock.patch.object(Sudoers, "parse_lines") as parse:
+            second = self.cache.load(self.test_correct_file)
+        parse.assert_not_called()
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+        assert second.rules == first.rules
+        assert second.user_aliases == first.user_aliases
+        assert second.path == self.test_correct_file
+        assert second.resolve_user("ADMINS") == first.resolve_user("ADMINS")
+
+    def test_reload_after_hit(self) -> None:
+        """An object loaded from the cache only parses the lines that changed when reloaded."""
+        sudoers = self.tmp / "sudoers"
+        sudoers.write_text("alice ALL=ALL\nbob ALL=ALL\n")
+        self.cache.load(sudoers)
+        cached = self.cache.load(sudoers)
+        assert self.cache.hits == 1
+
+        with mock.patch.object(Sudoers, "_parse_line_entries") as parse:
+            os.utime(sudoers, ns=(0, 0))
+            assert not cached.reload()
+            sudoers.write_text("alice ALL=ALL\n# a comment\nbob ALL=ALL\n")
+            assert not cached.reload()
+        parse.assert_not_called()
+
+        sudoers.write_text("alice ALL=ALL\ncarol ALL=ALL\n")
+        assert cached.reload()
+        assert [rule["users"] for rule in cached.rules] == [["alice"], ["carol"]]
+
+    def test_changed_contents(self) -> None:
+        """Changing the file or the library version misses the cache."""
+        sudoers = self.tmp / "sudoers"
+        sudoers.write_text("alice ALL=ALL\n")
+        self.cache.load(sudoers)
+        sudoers.write_text("bob ALL=ALL\n")
+        assert self.cache.load(sudoers).rules[0]["users"] == ["bob"]
+        with mock.patch("pysudoers.cache.__version__", "0.0.0"):
+            self.cache.load(sudoers)
+        assert (self.cache.hits, self.cache.misses) == (0, 3)
+
+    def test_corrupt_entry(self) -> None:
+        """An unreadable entry is removed and the file parsed again."""
+        self.cache.load(self.test_correct_file)
+        (entry,) = self.cache.directory.glob("*.pickle")
+        entry.write_bytes(b"garbage")
+        assert self.cache.load(self.test_correct_file).rules
+        assert self.cache.misses == 2  # noqa: PLR2004
+
+        # An entry pickled from a class that no longer exists
+        entry.write_bytes(b"cpysudoers.models\nRemoved\n.")
+        assert self.cache.load(self.test_correct_file).rules
+        assert self.cache.misses == 3  # noqa: PLR2004
+
+    def test_format(self) -> None:
+        """Changing the format of the entries misses the cache."""
+        self.cache.load(self.test_correct_file)
+        with mock.patch.object(ParseCache, "FORMAT", ParseCache.FORMAT + 1):
+            self.cache.load(self.test_correct_file)
+        assert (self.cache.hits, self.cache.misses) == (0, 2)
+
+    def test_eviction(self) -> None:
+        """The least recently used entries are removed once the cache is full."""
+        paths = []
+        for num in range(3):
+            path = self.tmp / f"sudoers{num}"
+            path.write_text(f"user{num} ALL=ALL\n")
+            paths.append(path)
+            self.cache.load(path)
+            os.utime(self.cache._entry(self.cache.key(path.read_bytes())), (num, num))
+
+        size = sum(
+            entry.stat().st_size for entry in self.cache.directory.glob("*.pickle")
+        )
+        self.cache.max_size = size - 1
+        self.cache.evict()
+        assert self.cache.get(self.cache.key(paths[0].read_bytes())) is None
+        assert self.cache.get(self.cache.key(paths[2].read_bytes())) is not None
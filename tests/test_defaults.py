@@ -0,0 +1,155 @@
+"""Define the Defaults unit tests."""
+
+from pathlib import Path
+from typing import cast
+from unittest import mock
+
+import pytest
+
+from pysudoers import BadDefaultsExceptionError, Sudoers
+from pysudoers.defaults import DefaultsEntry, DefaultsIndex, Parameter, parse_defaults
+from tests.test_sudoers import TestSudoers
+
+
+class TestParseDefaults(TestSudoers):
+    """Test parsing single Defaults lines."""
+
+    def test_flags(self) -> None:
+        """Flags are True, or False when negated."""
+        assert parse_defaults("Defaults env_reset, !insults") == DefaultsEntry(
+            "",
+            (),
+            (
+                Parameter("env_reset", None, value=True),
+                Parameter("insults", None, value=False),
+            ),
+        )
+
+    def test_bindings(self) -> None:
+        """Each binding keeps its list of targets."""
+        assert parse_defaults("Defaults:SOMEUSERS,%wheel !umask") == DefaultsEntry(
+            ":", ("SOMEUSERS", "%wheel"), (Parameter("umask", None, value=False),)
+        )
+        assert parse_defaults("Defaults@web1 log_output").binding == "@"
+        assert parse_defaults("Defaults>root !lecture").binding == ">"
+        assert parse_defaults("Defaults!/usr/bin/less noexec").targets == (
+            "/usr/bin/less",
+        )
+
+    def test_values(self) -> None:
+        """Values are typed, quotes are removed and commas inside quotes do not split parameters."""
+        entry = parse_defaults(
+            'Defaults timestamp_timeout=2.5, passwd_tries=5, umask=0027, secure_path="/usr/bin:/bin", '
+            'lecture_file="/etc/a, b"'
+        )
+        assert [parameter.value for parameter in entry.parameters] == [
+            2.5,
+            5,
+            0o027,
+            "/usr/bin:/bin",
+            "/etc/a, b",
+        ]
+
+    def test_quoted_from_file(self) -> None:
+        """Quoted values parsed from a file keep their commas and spaces."""
+        sudoobj = Sudoers.from_string(
+            'Defaults badpass_message = "Wrong, try again" , passprompt="Password: "\n'
+        )
+        assert sudoobj.defaults == [
+            'Defaults badpass_message="Wrong, try again",passprompt="Password: "'
+        ]
+        assert parse_defaults(sudoobj.defaults[0]).parameters == (
+            Parameter("badpass_message", "=", "Wrong, try again"),
+            Parameter("passprompt", "=", "Password: "),
+        )
+
+    def test_lists(self) -> None:
+        """List parameters and list operators hold a tuple of values."""
+        assert parse_defaults('Defaults env_keep += "HOME EDITOR"').parameters == (
+            Parameter("env_keep", "+=", ("HOME", "EDITOR")),
+        )
+        assert parse_defaults("Defaults env_keep=LANG").parameters == (
+            Parameter("env_keep", "=", ("LANG",)),
+        )
+
+    def test_bad(self) -> None:
+        """Malformed Defaults lines raise an exception."""
+        with pytest.raises(BadDefaultsExceptionError):
+            parse_defaults("Defaults")
+        with pytest.raises(BadDefaultsExceptionError):
+            parse_defaults("Defaults !umask=022")
+        with pytest.raises(BadDefaultsExceptionError):
+            parse_defaults("Defaults env_reset, , insults")
+
+
+class TestDefaultsIndex(TestSudoers):
+    """Test the effective settings lookup."""
+
+    def setUp(self) -> None:
+        """Set up an index to query."""
+        super().setUp()
+
+        data = """
+        User_Alias ADMINS=alice, bob
+        Host_Alias WEB=web*
+        Defaults env_reset, timestamp_timeout=5
+        Defaults env_keep="HOME LANG"
+        Defaults@WEB env_keep+=EDITOR, timestamp_timeout=10
+        Defaults:ADMINS, !bob timestamp_timeout=0
+        Defaults:%wheel env_keep-=LANG
+        Defaults>root !lecture
+        Defaults!/usr/bin/less noexec
+        Defaults:bob env_keep += "TERM"
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            self.sudoobj = Sudoers(path=self.fake_path)
+        self.index = DefaultsIndex(self.sudoobj)
+
+    def test_global(self) -> None:
+        """Global Defaults apply to everyone."""
+        assert dict(self.index.effective_defaults("eve", "db1", runas="postgres")) == {
+            "env_reset": True,
+            "timestamp_timeout": 5,
+            "env_keep": ("HOME", "LANG"),
+        }
+
+    def test_precedence(self) -> None:
+        """User Defaults override host Defaults, which override global ones."""
+        settings = self.index.effective_defaults("alice", "web1")
+        assert settings["timestamp_timeout"] == 0
+        assert settings["env_keep"] == ("HOME", "LANG", "EDITOR")
+        assert settings["lecture"] is False
+
+    def test_negated_target(self) -> None:
+        """A negated target excludes a name from the list."""
+        settings = self.index.effective_defaults("bob", "WEB2")
+        assert settings["timestamp_timeout"] == 10  # noqa: PLR2004
+        assert settings["env_keep"] == ("HOME", "LANG", "EDITOR", "TERM")
+
+    def test_groups(self) -> None:
+        """Group targets match the groups of the user and -= removes values."""
+        settings = self.index.effective_defaults("eve", "db1", groups=["wheel"])
+        assert settings["env_keep"] == ("HOME",)
+
+    def test_command(self) -> None:
+        """Command Defaults only apply when a matching command is given."""
+        assert "noexec" not in self.index.effective_defaults("eve", "db1")
+        assert (
+            self.index.effective_defaults(
+                "eve", "db1", command="/usr/bin/less /etc/hosts"
+            )["noexec"]
+            is True
+        )
+
+    def test_cached(self) -> None:
+        """Repeated lookups return the same read-only result."""
+        first = self.index.effective_defaults("alice", "web1")
+        assert self.index.effective_defaults("alice", "web1") is first
+        with pytest.raises(TypeError):
+            cast("dict", first)["env_reset"] = False
+
+    def test_entries(self) -> None:
+        """The index exposes every parsed Defaults line in file order."""
+        assert len(self.index.entries) == len(self.sudoobj.defaults)
+        assert self.index.entries[-1].targets == ("bob",)
@@ -0,0 +1,140 @@
+"""Define the diff unit tests."""
+
+from pysudoers import Sudoers
+from pysudoers.diff import Change, PermissionChange, diff
+from tests.test_sudoers import TestSudoers
+
+OLD = """
+User_Alias ADMINS = alice, bob
+Host_Alias WEB = web1, web2
+Cmnd_Alias SHELLS = /bin/sh, /bin/bash
+Defaults env_reset
+Defaults:ADMINS timestamp_timeout=5
+ADMINS WEB = (root) ALL, !SHELLS
+carol ALL = /usr/bin/top
+dave ALL = /usr/bin/less
+"""
+
+
+class TestDiff(TestSudoers):
+    """Test comparing two parsed sudoers files."""
+
+    def setUp(self) -> None:
+        """Parse the file before the change."""
+        super().setUp()
+        self.old = Sudoers.from_string(OLD)
+
+    def test_identical(self) -> None:
+        """Reordering, renaming aliases and spacing do not change what a file grants."""
+        new = Sudoers.from_string(
+            """
+            User_Alias STAFF = alice, bob
+            Host_Alias WEB = WEB2, web1
+            Cmnd_Alias SHELLS = /bin/sh, /bin/bash
+            Defaults env_reset
+            Defaults:alice,bob timestamp_timeout=5
+            STAFF web1,web2 = (root) ALL, !SHELLS
+            carol ALL = /usr/bin/top
+            dave ALL = /usr/bin/less
+            """
+        )
+        result = diff(self.old, new)
+        assert result.changed == [
+            Change("Host_Alias", "WEB", ("web1", "web2"), ("WEB2", "web1")),
+        ]
+        assert [change.kind for change in result.added] == ["User_Alias"]
+        assert [change.kind for change in result.removed] == ["User_Alias"]
+
+    def test_rules(self) -> None:
+        """Rules are reported as added, removed or changed when their users and hosts stay the same."""
+        new = Sudoers.from_string(
+            OLD.replace(
+                "carol ALL = /usr/bin/top", "carol ALL = /usr/bin/htop"
+            ).replace("dave ALL = /usr/bin/less", "erin ALL = /usr/bin/less")
+        )
+        result = diff(self.old, new)
+
+        assert [
+            (change.old.commands[0].command, change.new.commands[0].command)
+            for change in result.changed
+        ] == [("/usr/bin/top", "/usr/bin/htop")]
+        assert result.changed[0].key == ((("carol", False),), (("ALL", False),))
+        assert [change.new.users for change in result.added] == [("erin",)]
+        assert [change.old.users for change in result.removed] == [("dave",)]
+
+    def test_alias_change(self) -> None:
+        """A changed alias changes the rules using it."""
+        new = Sudoers.from_string(OLD.replace("alice, bob", "alice, bob, carol"))
+        result = diff(self.old, new)
+
+        assert [change.kind for change in result.changed] == ["User_Alias"]
+        assert [change.kind for change in result.added] == ["Rule", "Defaults"]
+        assert [change.kind for change in result.removed] == ["Rule", "Defaults"]
+
+    def test_defaults(self) -> None:
+        """Defaults are compared parsed."""
+        new = Sudoers.from_string(
+            OLD.replace("timestamp_timeout=5", "timestamp_timeout=10")
+        )
+        result = diff(self.old, new)
+
+        assert result.changed == [
+            Change(
+                "Defaults",
+                (":", (("alice", False), ("bob", False))),
+                "Defaults:ADMINS timestamp_timeout=5",
+                "Defaults:ADMINS timestamp_timeout=10",
+            )
+        ]
+        assert not result.added
+        assert not result.removed
+
+    def test_permissions(self) -> None:
+        """Effective permission changes are only reported when asked for."""
+        new = Sudoers.from_string(
+            OLD.replace(
+                "ADMINS WEB = (root) ALL, !SHELLS", "ADMINS WEB = (root) ALL"
+            ).replace("dave ALL = /usr/bin/less", "dave ALL = NOPASSWD: /usr/bin/less")
+        )
+        assert diff(self.old, new).permissions == []
+
+        permissions = diff(self.old, new, permissions=True).permissions
+        assert (
+            PermissionChange("alice", "web1", "root", "/bin/sh", None, ())
+            in permissions
+        )
+        assert (
+            PermissionChange("bob", "web2", "root", "/bin/bash", None, ())
+            in permissions
+        )
+        assert (
+            PermissionChange("dave", "ALL", "root", "/usr/bin/less", (), ("NOPASSWD",))
+            in permissions
+        )
+        assert not [change for change in permissions if change.command == "ALL"]
+        assert len(permissions) == 9  # noqa: PLR2004
+
+    def test_reorder(self) -> None:
+        """Moving a rule is a change, and the decisions it flips are reported."""
+        old = Sudoers.from_string("alice ALL=(root) ALL\nalice ALL=(root) !/bin/sh\n")
+        new = Sudoers.from_string("alice ALL=(root) !/bin/sh\nalice ALL=(root) ALL\n")
+        result = diff(old, new, permissions=True)
+
+        assert not result.added
+        assert not result.removed
+        assert [change.old.commands[0].command for change in result.changed] == [
+            "!/bin/sh"
+        ]
+        assert (
+            PermissionChange("alice", "ALL", "root", "/bin/sh", None, ())
+            in result.permissions
+        )
+
+    def test_no_changes(self) -> None:
+        """Comparing a file with itself finds nothing."""
+        assert diff(self.old, Sudoers.from_string(OLD), permissions=True) == (
+            [],
+            [],
+            [],
+            [],
+        )
@@ -0,0 +1,39 @@
+"""Define the synthetic sudoers generator unit tests."""
+
+import tempfile
+from pathlib import Path
+
+from benchmarks.generate import generate, write
+from pysudoers import Sudoers
+from tests.test_sudoers import TestSudoers
+
+
+class TestGenerate(TestSudoers):
+    """Test generating large sudoers files."""
+
+    def test_seeded(self) -> None:
+        """The same seed generates the same file, another seed a different one."""
+        assert list(generate(seed=1, rules=50)) == list(generate(seed=1, rules=50))
+        assert list(generate(seed=1, rules=50)) != list(generate(seed=2, rules=50))
+
+    def test_parses(self) -> None:
+        """Generated files parse with the requested sizes and alias nesting."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "sudoers"
+            lines = write(
+                path, aliases=12, depth=3, rules=300, continuation=0.5, defaults=9
+            )
+            sudoobj = Sudoers(path)
+
+        assert lines > 300  # noqa: PLR2004
+        assert len(sudoobj.rules) == 300  # noqa: PLR2004
+        assert len(sudoobj.defaults) == 9  # noqa: PLR2004
+        assert len(sudoobj.user_aliases) == 12  # noqa: PLR2004
+        assert "USERS_2_0" in sudoobj.user_aliases
+        assert all(
+            member.startswith(("user", "%group", "USERS_1_"))
+            for member in sudoobj.user_aliases["USERS_2_0"]
+        )
+        assert not any(
+            member.startswith("USERS") for member in sudoobj.resolve_user("USERS_2_0")
+        )
@@ -0,0 +1,157 @@
+"""Define the group membership resolver unit tests."""
+
+from pathlib import Path
+from typing import cast
+from unittest import mock
+
+import pytest
+
+from pysudoers import Sudoers
+from pysudoers.groups import (
+    DictSource,
+    GroupFileSource,
+    GroupSource,
+    GrpSource,
+    MembershipResolver,
+    referenced_groups,
+)
+from tests.test_sudoers import TestSudoers
+
+DATA = """
+User_Alias ADMINS = %wheel, +ops, !%#20
+Runas_Alias DBAS = %dba
+Defaults:%staff !lecture
+ADMINS ALL = ALL
+%#10, carol ALL = (DBAS) /usr/bin/psql
+"""
+
+GROUPS = """\
+# comment
+root:x:0:
+wheel:x:10:alice,bob
+staff:x:20:carol,alice
++nis
+broken line
+"""
+
+
+class TestGroups(TestSudoers):
+    """Test the group sources and the membership resolver."""
+
+    def setUp(self) -> None:
+        """Set up a parsed file and a resolver over a dictionary."""
+        super().setUp()
+        self.sudoobj = Sudoers.from_string(DATA)
+        self.source = DictSource(
+            {"wheel": ["alice", "bob"], "staff": ["carol"]},
+            {10: "wheel"},
+            {"ops": ["dave"]},
+        )
+        self.resolver = MembershipResolver(self.source)
+
+    def test_referenced(self) -> None:
+        """Every group, GID and netgroup entry is found once, in file order."""
+        assert referenced_groups(self.sudoobj) == [
+            "%wheel",
+            "+ops",
+            "%#20",
+            "%dba",
+            "%#10",
+            "%staff",
+        ]
+
+    def test_members(self) -> None:
+        """Groups, GIDs and netgroups are resolved, unknown entries are None."""
+        assert self.resolver.members("%wheel") == {"alice", "bob"}
+        assert self.resolver.members("%#10") == {"alice", "bob"}
+        assert self.resolver.members("%:staff") == {"carol"}
+        assert self.resolver.members("+ops") == {"dave"}
+        assert self.resolver.members("%nobody") is None
+        assert self.resolver.is_member("bob", "%wheel")
+        assert not self.resolver.is_member("bob", "%nobody")
+
+    def test_cache(self) -> None:
+        """Answers are cached until they expire, and the least recently used ones are evicted."""
+        resolver = MembershipResolver(self.source, maxsize=2, ttl=60)
+        with (
+            mock.patch.object(
+                self.source, "lookup", wraps=self.source.lookup
+            ) as lookup,
+            mock.patch("pysudoers.lru.time.monotonic", return_value=100) as clock,
+        ):
+            resolver.members("%wheel")
+            resolver.members("%wheel")
+            assert lookup.call_count == 1
+            assert (resolver.hits, resolver.misses) == (1, 1)
+
+            resolver.members("%staff")
+            resolver.members("+ops")
+            resolver.members("%wheel")
+            assert lookup.call_count == 4  # noqa: PLR2004
+
+            clock.return_value = 200
+            resolver.members("%wheel")
+            assert lookup.call_count == 5  # noqa: PLR2004
+
+    def test_prefetch(self) -> None:
+        """Prefetching looks up every referenced entry at once, so later lookups hit the cache."""
+        with mock.patch.object(
+            self.source, "lookup_many", wraps=self.source.lookup_many
+        ) as lookup_many:
+            assert self.resolver.prefetch(self.sudoobj) == 6  # noqa: PLR2004
+            assert self.resolver.prefetch(self.sudoobj) == 0
+        assert lookup_many.call_count == 1
+
+        with mock.patch.object(self.source, "lookup") as lookup:
+            assert self.resolver.members("%#10") == {"alice", "bob"}
+            assert self.resolver.members("%dba") is None
+        lookup.assert_not_called()
+        assert self.resolver.groups_of("alice", self.sudoobj) == ["wheel", "#10"]
+
+    def test_resolve_user(self) -> None:
+        """Resolving a user alias with a resolver replaces the groups it knows with their members."""
+        assert self.sudoobj.resolve_user("ADMINS") == ["%wheel", "+ops", "!%#20"]
+        assert self.sudoobj.resolve_user("ADMINS", resolver=self.resolver) == [
+            "alice",
+            "bob",
+            "dave",
+            "!%#20",
+        ]
+
+    def test_incomplete_source(self) -> None:
+        """A source that does not implement every lookup cannot be created."""
+
+        class NamesOnly(GroupSource):
+            def group(self, name: str) -> frozenset | None:
+                return frozenset({name})
+
+        with pytest.raises(TypeError, match="gid"):
+            cast("type[GroupSource]", NamesOnly)()
+
+    def test_file_source(self) -> None:
+        """Group files are parsed, skipping comments and malformed lines."""
+        mstat = mock.Mock(return_value=mock.Mock(st_mtime_ns=1))
+        with (
+            mock.patch.object(Path, "open", self.get_mock_open(GROUPS)),
+            mock.patch.object(Path, "stat", mstat),
+        ):
+            source = GroupFileSource("/etc/group")
+            assert source.group("wheel") == {"alice", "bob"}
+            assert source.gid(20) == {"alice", "carol"}
+            assert source.group("root") == frozenset()
+            assert source.group("nis") is None
+
+    def test_grp_source(self) -> None:
+        """The grp source enumerates the group database once for many entries."""
+        wheel = mock.Mock(gr_name="wheel", gr_gid=10, gr_mem=["alice"])
+        with mock.patch("pysudoers.groups.grp") as mgrp:
+            mgrp.getgrall.return_value = [wheel]
+            mgrp.getgrnam.side_effect = KeyError
+            source = GrpSource()
+            assert source.lookup_many(["%wheel", "%#10", "%dba"]) == {
+                "%wheel": {"alice"},
+                "%#10": {"alice"},
+                "%dba": None,
+            }
+        mgrp.getgrall.assert_called_once_with()
+        mgrp.getgrnam.assert_called_once_with("dba")
@@ -0,0 +1,93 @@
+"""Define the linter unit tests."""
+
+from pysudoers import Sudoers
+from pysudoers.lint import Finding, lint, shadowed_rules
+from pysudoers.policy import Policy
+from tests.test_sudoers import TestSudoers
+
+DATA = """\
+User_Alias ADMINS = alice, bob, OPS
+User_Alias OPS = carol
+User_Alias STALE = dave, OLD
+User_Alias OLD = erin
+Host_Alias LOOP = web1, BACK
+Host_Alias BACK = LOOP
+Cmnd_Alias SHELLS = /bin/sh, /bin/bash
+Defaults:ADMINS timestamp_timeout=5
+Defaults@NOWHERE env_reset
+ADMINS web1 = (root) /usr/bin/top -b
+ADMINS ALL = (root) /usr/bin/top, !SHELLS
+frank LOOP = ALL
+grace ALL = (ALL) /usr/bin/less
+grace ALL = (root) MISSING
+"""
+
+
+class TestLint(TestSudoers):
+    """Test finding problems in a parsed sudoers file."""
+
+    def test_findings(self) -> None:
+        """Every check reports its findings in file order, on the entry they were found in."""
+        sudoobj = Sudoers.from_string(DATA)
+        findings = lint(sudoobj)
+        assert [(finding.check, finding.kind, finding.key) for finding in findings] == [
+            ("alias-cycle", "Host_Alias", "LOOP"),
+            ("undefined-alias", "Rule", 4),
+            ("undefined-alias", "Defaults", 1),
+            ("unused-alias", "User_Alias", "STALE"),
+            ("unused-alias", "User_Alias", "OLD"),
+            ("shadowed-rule", "Rule", 0),
+        ]
+        assert (
+            findings[0].message
+            == "Host_Alias LOOP is a member of itself through LOOP, BACK"
+        )
+        assert (
+            findings[1].message
+            == "rule 4 refers to Cmnd_Alias MISSING, which is not defined"
+        )
+        assert findings[-1].span.line == 10  # noqa: PLR2004
+        assert findings[-1].as_dict()["line"] == 10  # noqa: PLR2004
+
+    def test_clean(self) -> None:
+        """A file without problems has no findings."""
+        assert (
+            lint(Sudoers.from_string("User_Alias ADMINS = alice\nADMINS ALL = ALL\n"))
+            == []
+        )
+        assert (
+            Finding("unused-alias", "User_Alias", "X", "", None).as_dict()["path"]
+            is None
+        )
+
+    def test_shadowed(self) -> None:
+        """Only rules whose every query is decided by later rules are shadowed."""
+        sudoobj = Sudoers.from_string(
+            """\
+            Host_Alias WEB = web1, web2
+            alice WEB = (root) /usr/bin/top
+            alice web1 = (root) /usr/bin/top
+            bob ALL = (root) /usr/bin/top -b, /usr/bin/free
+            bob ALL = /usr/bin/top -b
+            bob ALL = /usr/bin/top
+            carol ALL = /usr/bin/top
+            ALL,!dave ALL = ALL
+            erin ALL = (root) /usr/bin/top
+            erin ALL = (ALL) !/usr/bin/top
+            !frank ALL = ALL
+            %staff ALL = (root) ALL
+            %staff ALL = (root) ALL
+            """
+        )
+        assert shadowed_rules(sudoobj) == [3, 7, 9, 10]
+
+        # Every query a shadowed rule could decide is decided by another rule
+        policy = Policy(sudoobj)
+        for user, command, groups in (
+            ("bob", "/usr/bin/top -b", ()),
+            ("erin", "/usr/bin/top", ()),
+            ("frank", "/usr/bin/top", ("staff",)),
+        ):
+            result = policy.lookup(user, "web1", command, groups=groups)
+            assert result is not None
+            assert result["rule"] not in {3, 7, 9, 10}
@@ -0,0 +1,68 @@
+"""Define the model unit tests."""
+
+import pickle
+
+import pytest
+
+from pysudoers import Sudoers
+from pysudoers.models import Alias, CommandSpec, Rule, shared_tuple
+from tests.test_sudoers import TestSudoers
+
+
+class TestModels(TestSudoers):
+    """Test the rule, command and alias models."""
+
+    def setUp(self) -> None:
+        """Set up a parsed rule."""
+        super().setUp()
+
+        rule = Sudoers.parse_rule("alice,bob ALL=(root) NOPASSWD:/bin/ls,/bin/cat")
+        assert isinstance(rule, Rule)
+        self.rule = rule
+
+    def test_dict_view(self) -> None:
+        """Rules and commands read and compare like the dictionaries they replace."""
+        assert self.rule == {
+            "users": ["alice", "bob"],
+            "hosts": ["ALL"],
+            "commands": [
+                {"run_as": ["root"], "tags": ["NOPASSWD"], "command": "/bin/ls"},
+                {"run_as": ["root"], "tags": ["NOPASSWD"], "command": "/bin/cat"},
+            ],
+        }
+        assert self.rule["users"] == ["alice", "bob"]
+        assert self.rule.get("missing") is None
+        assert self.rule.as_dict() == dict(self.rule)
+        assert isinstance(self.rule.as_dict()["commands"][0], dict)
+
+    def test_shared_values(self) -> None:
+        """Inherited run as and tag lists are stored once, names are interned."""
+        first, second = self.rule.commands
+        assert first.run_as is second.run_as
+        assert first.tags is second.tags
+        assert first.run_as is shared_tuple(["root"])
+        other = Sudoers.parse_rule("carol ALL=(root) NOPASSWD:/bin/ls")
+        assert isinstance(other, Rule)
+        assert other.commands[0].tags is first.tags
+        assert other.hosts[0] is self.rule.hosts[0]
+        unpickled = pickle.loads(pickle.dumps(other))  # noqa: S301
+        assert unpickled.commands[0].run_as is first.run_as
+        assert unpickled.commands[0].tags is first.tags
+
+    def test_immutable(self) -> None:
+        """Models cannot be changed, but can be hashed and pickled."""
+        with pytest.raises(AttributeError):
+            self.rule.users = ("eve",)
+        with pytest.raises(AttributeError):
+            self.rule.extra = True
+        assert hash(self.rule) == hash(pickle.loads(pickle.dumps(self.rule)))  # noqa: S301
+        assert pickle.loads(pickle.dumps(self.rule)) == self.rule  # noqa: S301
+        assert (
+            Rule(("alice",), ("ALL",), (CommandSpec(("root",), None, "ALL"),))
+            != self.rule
+        )
+
+    def test_alias(self) -> None:
+        """Aliases unpack to a key and members."""
+        key, members = Alias("ADMINS", ("alice",))
+        assert (key, members) == ("ADMINS", ("alice",))
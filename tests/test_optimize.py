@@ -0,0 +1,126 @@
+"""Define the optimizer unit tests."""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from pysudoers import Sudoers
+from pysudoers.diff import diff
+from pysudoers.optimize import main, optimize, serialize
+from tests.test_sudoers import TestSudoers
+
+DATA = """\
+User_Alias ADMINS = alice, bob
+User_Alias OLD = yan
+User_Alias STALE = zed
+Host_Alias WEB = web1, web2
+Defaults env_reset
+Defaults:ADMINS timestamp_timeout=5
+Defaults env_reset
+OLD web1,web2 = /usr/bin/top
+carol web1,web2 = (root) /usr/bin/less, /usr/bin/top, NOPASSWD: /usr/bin/less
+dave web1,web2 = (root) /usr/bin/less, /usr/bin/top, NOPASSWD: /usr/bin/less
+erin web1,web2 = /usr/bin/free
+frank,frank web1,web2 = /usr/bin/free
+yan ALL = /usr/bin/top
+carol ALL = !/usr/bin/free
+grace web1,web2 = /usr/bin/free
+henry web1,web2 = /usr/bin/top, NOPASSWD: /usr/bin/less
+carol web1,web2 = /usr/bin/free
+"""
+
+OPTIMIZED = """\
+Host_Alias WEB = web1, web2
+User_Alias ADMINS = alice, bob
+Defaults:ADMINS timestamp_timeout=5
+Defaults env_reset
+carol,dave,henry WEB = /usr/bin/top, NOPASSWD: /usr/bin/less
+erin,frank,grace WEB = /usr/bin/free
+yan ALL = /usr/bin/top
+carol ALL = !/usr/bin/free
+carol WEB = /usr/bin/free
+"""
+
+
+class TestOptimize(TestSudoers):
+    """Test rewriting a policy into a smaller one granting the same permissions."""
+
+    def test_serialize(self) -> None:
+        """The written policy parses back into the same entries."""
+        sudoobj = Sudoers.from_string(
+            DATA
+            + "Cmnd_Alias AWK = /bin/awk -F\\: {print}, /bin/sed s/a\\,b/c/\n"
+            + "ivan ALL = (www-data, mysql) /usr/bin/sort a\\,b, (ALL : wheel) SETENV:NOEXEC: AWK\n"
+            + "@includedir /etc/sudoers.d\n"
+        )
+        copy = Sudoers.from_string(serialize(sudoobj))
+        assert copy.rules == sudoobj.rules
+        assert copy.defaults == sudoobj.defaults
+        assert copy.includes == sudoobj.includes
+        for alias in Sudoers.ALIAS_TYPES:
+            assert dict(copy._data[alias]) == dict(sudoobj._data[alias])
+
+    def test_runas_groups(self) -> None:
+        """Run as groups are written after a colon, and are never covered by the same names as users."""
+        data = (
+            "bob ALL = (:wheel) /bin/cat\n"
+            "bob ALL = (root:wheel) /bin/less\n"
+            "bob ALL = (root,wheel) /bin/less, (root) /bin/cat\n"
+        )
+        sudoobj = Sudoers.from_string(data)
+        assert serialize(sudoobj) == data
+        copy = Sudoers.from_string(serialize(sudoobj))
+        assert [
+            spec.run_as_groups for rule in copy.rules for spec in rule.commands
+        ] == [
+            ("wheel",),
+            ("wheel",),
+            (),
+            (),
+        ]
+        assert optimize(sudoobj).text == data
+
+    def test_optimize(self) -> None:
+        """Shadowed rules, repeated entries and unused aliases are dropped, rules merged and lists factored."""
+        sudoobj = Sudoers.from_string(DATA)
+        result = optimize(sudoobj)
+        assert result.text == OPTIMIZED
+        assert result.sudoers.rules == Sudoers.from_string(OPTIMIZED).rules
+        assert diff(sudoobj, result.sudoers, permissions=True).permissions == []
+
+        report = result.report
+        assert (report.rules_before, report.rules_after) == (10, 5)
+        assert (report.entries_before, report.entries_after) == (15, 6)
+        assert (report.aliases_before, report.aliases_after) == (4, 2)
+        assert (report.defaults_before, report.defaults_after) == (3, 2)
+        assert report.size_before > report.size_after == len(OPTIMIZED)
+
+    def test_includes(self) -> None:
+        """Rules are not merged across files that were not read, and aliases they may use are kept."""
+        sudoobj = Sudoers.from_string(
+            "User_Alias STALE = zed\n"
+            "alice ALL = /usr/bin/top\n"
+            "@includedir /etc/sudoers.d\n"
+            "bob ALL = /usr/bin/top\n"
+            "carol ALL = /usr/bin/top\n"
+        )
+        assert optimize(sudoobj).text == (
+            "User_Alias STALE = zed\n"
+            "alice ALL = /usr/bin/top\n"
+            "@includedir /etc/sudoers.d\n"
+            "bob,carol ALL = /usr/bin/top\n"
+        )
+
+    def test_main(self) -> None:
+        """The command line writes the optimized policy and reports the sizes."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = Path(tmpdir.name) / "sudoers"
+        path.write_text(DATA)
+
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            assert main([str(path), "-o", str(path.with_suffix(".new"))]) == 0
+        assert path.with_suffix(".new").read_text() == OPTIMIZED
+        assert json.loads(stderr.getvalue())["rules_after"] == 5  # noqa: PLR2004
@@ -0,0 +1,165 @@
+"""Define the permission expansion unit tests."""
+
+import csv
+import io
+import json
+
+from pysudoers import Sudoers
+from pysudoers.permissions import (
+    Permission,
+    expand_permissions,
+    write_csv,
+    write_ndjson,
+)
+from tests.test_sudoers import TestSudoers
+
+DATA = """
+User_Alias ADMINS = alice, bob, !carol
+Host_Alias WEB = web1, web2
+Runas_Alias DBA = postgres, mysql
+Cmnd_Alias SHELLS = /bin/sh, /bin/bash
+ADMINS WEB = (root) ALL, !SHELLS
+carol db1 = (DBA) NOPASSWD: /usr/bin/psql
+"""
+
+
+class TestPermissions(TestSudoers):
+    """Test expanding rules into permissions."""
+
+    def setUp(self) -> None:
+        """Parse the file to expand."""
+        super().setUp()
+        self.sudoobj = Sudoers.from_string(DATA)
+
+    def test_expand(self) -> None:
+        """Every combination is yielded in file order, negated commands and users are denied."""
+        permissions = list(expand_permissions(self.sudoobj))
+
+        assert permissions[:4] == [
+            Permission("alice", "web1", "root", "", "ALL", (), allowed=True),
+            Permission("alice", "web1", "root", "", "/bin/sh", (), allowed=False),
+            Permission("alice", "web1", "root", "", "/bin/bash", (), allowed=False),
+            Permission("alice", "web2", "root", "", "ALL", (), allowed=True),
+        ]
+        excluded = Permission("carol", "web1", "root", "", "ALL", (), allowed=False)
+        assert excluded in permissions
+        assert permissions[-2:] == [
+            Permission(
+                "carol",
+                "db1",
+                "postgres",
+                "",
+                "/usr/bin/psql",
+                ("NOPASSWD",),
+                allowed=True,
+            ),
+            Permission(
+                "carol",
+                "db1",
+                "mysql",
+                "",
+                "/usr/bin/psql",
+                ("NOPASSWD",),
+                allowed=True,
+            ),
+        ]
+        assert len(permissions) == 20  # noqa: PLR2004
+
+    def test_runas_groups(self) -> None:
+        """Run as groups are combined with the run as users, or with the invoking user when no user is listed."""
+        sudoobj = Sudoers.from_string(
+            "bob ALL = (:wheel) /bin/cat, (root:adm,!audit) /bin/less\n"
+            "ALL, !dave ALL = /bin/ls\n"
+        )
+        assert list(expand_permissions(sudoobj)) == [
+            Permission("bob", "ALL", "bob", "wheel", "/bin/cat", (), allowed=True),
+            Permission("bob", "ALL", "root", "adm", "/bin/less", (), allowed=True),
+            Permission("bob", "ALL", "root", "audit", "/bin/less", (), allowed=False),
+            Permission("ALL", "ALL", "root", "", "/bin/ls", (), allowed=True),
+            Permission("dave", "ALL", "root", "", "/bin/ls", (), allowed=False),
+        ]
+        filtered = expand_permissions(sudoobj, users=["bob"], runas=["root"])
+        assert [permission.command for permission in filtered] == [
+            "/bin/less",
+            "/bin/less",
+        ]
+
+    def test_filters(self) -> None:
+        """Filters are collections of names or functions."""
+        permissions = expand_permissions(
+            self.sudoobj,
+            users=["bob", "carol"],
+            hosts={"web2", "db1"},
+            runas=lambda name: name != "mysql",
+        )
+        assert [
+            (permission.user, permission.host, permission.runas)
+            for permission in permissions
+        ] == [
+            ("bob", "web2", "root"),
+            ("bob", "web2", "root"),
+            ("bob", "web2", "root"),
+            ("carol", "web2", "root"),
+            ("carol", "web2", "root"),
+            ("carol", "web2", "root"),
+            ("carol", "db1", "postgres"),
+        ]
+
+        commands = expand_permissions(
+            self.sudoobj, commands=lambda name: name.startswith("/bin/")
+        )
+        assert {permission.command for permission in commands} == {
+            "/bin/sh",
+            "/bin/bash",
+        }
+
+    def test_lazy(self) -> None:
+        """Permissions are produced one at a time."""
+        permissions = expand_permissions(self.sudoobj)
+        assert next(permissions).user == "alice"
+
+    def test_write_ndjson(self) -> None:
+        """NDJSON has one object per line."""
+        stream = io.StringIO()
+        count = write_ndjson(
+            expand_permissions(self.sudoobj, users=["carol"]), stream, chunk_size=1
+        )
+
+        assert count == 8  # noqa: PLR2004
+        lines = stream.getvalue().splitlines()
+        assert json.loads(lines[-2]) == {
+            "user": "carol",
+            "host": "db1",
+            "runas": "postgres",
+            "runas_group": "",
+            "command": "/usr/bin/psql",
+            "tags": ["NOPASSWD"],
+            "allowed": True,
+        }
+
+    def test_write_csv(self) -> None:
+        """CSV has a header line and the tags joined with commas."""
+        stream = io.StringIO(newline="")
+        count = write_csv(expand_permissions(self.sudoobj), stream, chunk_size=5)
+
+        rows = list(csv.reader(io.StringIO(stream.getvalue())))
+        assert count == len(rows) - 1
+        assert rows[0] == [
+            "user",
+            "host",
+            "runas",
+            "runas_group",
+            "command",
+            "tags",
+            "allowed",
+        ]
+        assert rows[2] == ["alice", "web1", "root", "", "/bin/sh", "", "False"]
+        assert rows[-1] == [
+            "carol",
+            "db1",
+            "mysql",
+            "",
+            "/usr/bin/psql",
+            "NOPASSWD",
+            "True",
+        ]
@@ -0,0 +1,221 @@
+"""Define the Policy unit tests."""
+
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from pysudoers import CyclicAliasExceptionError, Sudoers
+from pysudoers.policy import CommandIndex, Policy, command_matches
+from tests.test_sudoers import TestSudoers
+
+
+class TestCommandMatches(TestSudoers):
+    """Test matching a single command against a command line."""
+
+    def test_all(self) -> None:
+        """ALL matches any command line."""
+        assert command_matches("ALL", "/bin/anything --at all")
+
+    def test_arguments(self) -> None:
+        """A command without arguments allows any, otherwise the arguments must match."""
+        assert command_matches("/bin/ls", "/bin/ls -l /tmp")
+        assert command_matches("/bin/ls -l", "/bin/ls -l")
+        assert not command_matches("/bin/ls -l", "/bin/ls -a")
+        assert command_matches('/bin/ls ""', "/bin/ls")
+        assert not command_matches('/bin/ls ""', "/bin/ls -l")
+
+    def test_directory(self) -> None:
+        """A directory allows the files directly inside it only."""
+        assert command_matches("/usr/bin/", "/usr/bin/vim /etc/hosts")
+        assert not command_matches("/usr/bin/", "/usr/bin/sub/vim")
+        assert not command_matches("/usr/bin/", "/usr/sbin/vim")
+
+    def test_wildcards(self) -> None:
+        """Wildcards in a path never match a slash, but they do in arguments."""
+        assert command_matches("/opt/*/bin/run", "/opt/app/bin/run")
+        assert not command_matches("/opt/*/run", "/opt/app/bin/run")
+        assert command_matches("/bin/cat /var/log/*", "/bin/cat /var/log/app/error.log")
+
+
+class TestPolicy(TestSudoers):
+    """Test the permission queries."""
+
+    def setUp(self) -> None:
+        """Set up a policy to query."""
+        super().setUp()
+
+        data = """
+        User_Alias ADMINS=alice, bob, OPS
+        User_Alias OPS=carol
+        Host_Alias WEB=web1, Web2
+        Runas_Alias DBA=postgres, mysql
+        Cmnd_Alias SHELLS=/bin/sh, /bin/bash
+        Cmnd_Alias SERVICE=/usr/sbin/service
+
+        ADMINS ALL=(ALL) ALL, !SHELLS
+        ALL, !dave WEB=NOPASSWD: SERVICE
+        dave WEB=(DBA) /usr/bin/psql
+        %wheel ALL=(ALL) /usr/bin/
+        bob web1=(root) /bin/sh
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            self.sudoobj = Sudoers(path=self.fake_path)
+        self.policy = Policy(self.sudoobj)
+
+    def test_aliases_and_negations(self) -> None:
+        """Aliases are expanded and negated commands deny."""
+        assert self.policy.can("carol", "db1", "/usr/bin/id")
+        assert not self.policy.can("carol", "db1", "/bin/bash")
+        assert not self.policy.can("eve", "db1", "/usr/bin/id")
+
+    def test_negated_user(self) -> None:
+        """A negated user is excluded from an otherwise matching list."""
+        assert self.policy.can("eve", "web2", "/usr/sbin/service nginx restart")
+        assert not self.policy.can("dave", "web1", "/usr/sbin/service nginx restart")
+
+    def test_last_match_wins(self) -> None:
+        """A later rule overrides an earlier one."""
+        assert not self.policy.can("bob", "web2", "/bin/sh")
+        assert self.policy.can("bob", "WEB1", "/bin/sh")
+
+    def test_runas(self) -> None:
+        """The run as list limits the target user."""
+        assert self.policy.can("dave", "web1", "/usr/bin/psql", runas="postgres")
+        assert not self.policy.can("dave", "web1", "/usr/bin/psql")
+
+    def test_runas_groups(self) -> None:
+        """The groups of a run as list never match the target user."""
+        sudoobj = Sudoers.from_string(
+            "bob ALL = (:wheel) /bin/cat, (root:wheel) /bin/less"
+        )
+        cat, less = sudoobj.rules[0].commands
+        assert (cat.run_as_users, cat.run_as_groups) == ((), ("wheel",))
+        assert (less.run_as_users, less.run_as_groups) == (("root",), ("wheel",))
+        assert less["run_as"] == ["root", "wheel"]
+
+        policy = Policy(sudoobj)
+        assert not policy.can("bob", "h", "/bin/cat", runas="wheel")
+        assert not policy.can("bob", "h", "/bin/cat")
+        assert policy.can("bob", "h", "/bin/less")
+        assert not policy.can("bob", "h", "/bin/less", runas="wheel")
+
+    def test_runas_group_query(self) -> None:
+        """Entries only listing groups run commands as the invoking user, with one of the groups."""
+        policy = Policy(
+            Sudoers.from_string("bob ALL = (:wheel) /bin/cat, (root:adm) /bin/less")
+        )
+        assert policy.can("bob", "h", "/bin/cat", runas="bob")
+        assert policy.can("bob", "h", "/bin/cat", runas="bob", runas_group="wheel")
+        assert not policy.can("bob", "h", "/bin/cat", runas="bob", runas_group="adm")
+        assert not policy.can("alice", "h", "/bin/cat", runas="alice")
+        result = policy.lookup("bob", "h", "/bin/cat", runas="bob")
+        assert result is not None
+        assert result["rule"] == 0
+
+        assert policy.can("bob", "h", "/bin/less", runas_group="adm")
+        assert not policy.can("bob", "h", "/bin/less", runas_group="wheel")
+        assert not policy.can("bob", "h", "/bin/less", runas="bob", runas_group="adm")
+
+    def test_groups(self) -> None:
+        """Group entries match the groups of the user."""
+        assert self.policy.can("frank", "any", "/usr/bin/vim", groups=["wheel"])
+        assert not self.policy.can("frank", "any", "/usr/bin/vim")
+
+    def test_lookup(self) -> None:
+        """Lookup returns the command entry that decided the query."""
+        match = self.policy.lookup("eve", "web1", "/usr/sbin/service")
+        assert match == {
+            "rule": 1,
+            "command": {"run_as": ["root"], "tags": ["NOPASSWD"], "command": "SERVICE"},
+            "allowed": True,
+        }
+        assert self.policy.lookup("eve", "db1", "/usr/sbin/service") is None
+
+    def test_candidates(self) -> None:
+        """Only the rules indexed under the user and host are candidates."""
+        assert self.policy.candidates("dave", "web1") == [2, 1]
+        assert self.policy.candidates("dave", "web1", groups=["wheel"]) == [3, 2, 1]
+        assert self.policy.candidates("alice", "db1") == [0]
+
+    def test_cycle(self) -> None:
+        """Building a policy over cyclic aliases raises an exception."""
+        data = """
+        User_Alias FIRST=SECOND
+        User_Alias SECOND=FIRST
+        FIRST ALL=ALL
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            sudoobj = Sudoers(path=self.fake_path)
+        with pytest.raises(CyclicAliasExceptionError):
+            _ = Policy(sudoobj)
+
+
+class TestCommandIndex(TestSudoers):
+    """Test the reverse command index."""
+
+    def setUp(self) -> None:
+        """Set up an index to query."""
+        super().setUp()
+
+        data = """
+        Cmnd_Alias EDITORS=/usr/bin/vim, /usr/bin/nano
+        Cmnd_Alias APP=/opt/app/bin/, /opt/*/sbin/ctl
+
+        alice ALL=EDITORS
+        bob ALL=(ALL) ALL, !EDITORS
+        carol ALL=APP, /usr/bin/vim /etc/hosts
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            self.index = CommandIndex(Sudoers(path=self.fake_path))
+
+    def test_lookup(self) -> None:
+        """Lookup finds plain paths, ALL and negations in file order."""
+        found = [
+            (match["rule"], match["spec"], match["allowed"])
+            for match in self.index.lookup("/usr/bin/vim")
+        ]
+        assert found == [
+            (0, "/usr/bin/vim", True),
+            (1, "ALL", True),
+            (1, "/usr/bin/vim", False),
+        ]
+
+    def test_lookup_arguments(self) -> None:
+        """Lookup only returns commands whose arguments match."""
+        found = [
+            (match["rule"], match["spec"])
+            for match in self.index.lookup("/usr/bin/vim /etc/hosts")
+        ]
+        assert (2, "/usr/bin/vim /etc/hosts") in found
+        found = [
+            (match["rule"], match["spec"])
+            for match in self.index.lookup("/usr/bin/vim /etc/passwd")
+        ]
+        assert (2, "/usr/bin/vim /etc/hosts") not in found
+
+    def test_lookup_directory_and_pattern(self) -> None:
+        """Lookup finds directories and wildcard paths."""
+        specs = [match["spec"] for match in self.index.lookup("/opt/app/bin/start")]
+        assert specs == ["ALL", "/opt/app/bin/"]
+        specs = [match["spec"] for match in self.index.lookup("/opt/other/sbin/ctl")]
+        assert specs == ["ALL", "/opt/*/sbin/ctl"]
+        specs = [match["spec"] for match in self.index.lookup("/opt/app/bin/sub/start")]
+        assert specs == ["ALL"]
+
+    def test_under(self) -> None:
+        """Under finds everything below a directory, plus what may match below it."""
+        specs = [match["spec"] for match in self.index.under("/opt/app")]
+        assert specs == ["ALL", "/opt/app/bin/", "/opt/*/sbin/ctl"]
+        specs = [match["spec"] for match in self.index.under("/usr/bin/")]
+        assert specs == [
+            "/usr/bin/vim",
+            "/usr/bin/nano",
+            "ALL",
+            "/usr/bin/vim",
+            "/usr/bin/nano",
+            "/usr/bin/vim /etc/hosts",
+        ]
@@ -0,0 +1,167 @@
+"""Define the query cache unit tests."""
+
+import pickle
+import threading
+from unittest import mock
+
+import pytest
+
+from pysudoers import DuplicateAliasExceptionError, Sudoers
+from pysudoers.lru import CacheStats, TTLCache
+from pysudoers.querycache import QueryCache
+from tests.test_sudoers import TestSudoers
+
+DATA = """
+User_Alias ADMINS = alice, bob
+ADMINS ALL = (root) /usr/bin/top
+"""
+
+
+class TestGeneration(TestSudoers):
+    """Test publishing parsed data and its generation number."""
+
+    def test_changes(self) -> None:
+        """Parsing publishes new data with a higher generation, the published data cannot be changed."""
+        sudoobj = Sudoers.from_string(DATA)
+        seen = [sudoobj.generation]
+
+        sudoobj.parse_line("carol ALL = ALL")
+        seen.append(sudoobj.generation)
+        sudoobj.parse_lines(["Defaults env_reset", "User_Alias OPS = dave"])
+        seen.append(sudoobj.generation)
+        assert seen == sorted(set(seen))
+
+        for change in (
+            sudoobj.rules.pop,
+            lambda: sudoobj.defaults.append("Defaults !lecture"),
+            lambda: sudoobj.user_aliases.update(OPS=["erin"]),
+            lambda: sudoobj.user_aliases["OPS"].append("erin"),
+        ):
+            with pytest.raises(TypeError):
+                change()
+        assert sudoobj.generation == seen[-1]
+        assert sudoobj.resolve_user("OPS") == ["dave"]
+
+    def test_failed_parse(self) -> None:
+        """Nothing is published when a line fails to parse."""
+        sudoobj = Sudoers.from_string(DATA)
+        generation = sudoobj.generation
+        with pytest.raises(DuplicateAliasExceptionError):
+            sudoobj.parse_lines(["carol ALL = ALL", "User_Alias ADMINS = dave"])
+        assert sudoobj.generation == generation
+        assert len(sudoobj.rules) == 1
+
+    def test_snapshot(self) -> None:
+        """Snapshots keep the data they were taken with."""
+        sudoobj = Sudoers.from_string(DATA)
+        snapshot = sudoobj.snapshot()
+        assert snapshot.generation == sudoobj.generation
+        assert snapshot.user_aliases is sudoobj.user_aliases
+
+        sudoobj.parse_line("carol ALL = ALL")
+        assert len(snapshot.rules) == 1
+        assert len(sudoobj.rules) == 2  # noqa: PLR2004
+
+    def test_concurrent_readers(self) -> None:
+        """Readers never see a partly parsed version of the data."""
+        sudoobj = Sudoers.from_string(DATA)
+        done = threading.Event()
+        seen = []
+
+        def read() -> None:
+            while not done.is_set():
+                snapshot = sudoobj.snapshot()
+                seen.append(len(snapshot.rules) == len(snapshot.user_aliases))
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for num in range(200):
+            sudoobj.parse_lines(
+                [f"user{num} ALL = ALL", f"User_Alias USERS{num} = user{num}"]
+            )
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        assert seen
+        assert all(seen)
+        assert len(sudoobj.rules) == 201  # noqa: PLR2004
+
+    def test_pickle(self) -> None:
+        """Pickled data is loaded read-only."""
+        sudoobj = Sudoers.from_string(DATA)
+        data = pickle.loads(pickle.dumps(sudoobj._data))  # noqa: S301
+        copy = Sudoers._from_data(data)
+        assert copy.generation > sudoobj.generation
+        assert copy.rules == sudoobj.rules
+        with pytest.raises(TypeError):
+            copy.user_aliases["OPS"] = ["dave"]
+
+
+class TestTTLCache(TestSudoers):
+    """Test the bounded cache."""
+
+    def test_bounds(self) -> None:
+        """Least recently used entries are evicted and old ones expire."""
+        cache = TTLCache(maxsize=2, ttl=10)
+        with mock.patch("pysudoers.lru.time.monotonic", return_value=0) as clock:
+            cache.put("a", 1)
+            cache.put("b", None)
+            assert cache.get("a") == 1
+            cache.put("c", 3)
+            assert cache.get("b", "missing") == "missing"
+            assert "a" in cache
+
+            clock.return_value = 20
+            assert "a" not in cache
+            assert cache.get("a") is None
+        assert cache.stats() == CacheStats(
+            hits=1, misses=2, evictions=1, expirations=1, size=1
+        )
+
+
+class TestQueryCache(TestSudoers):
+    """Test caching permission decisions."""
+
+    def setUp(self) -> None:
+        """Set up a cache over a parsed file."""
+        super().setUp()
+        self.sudoobj = Sudoers.from_string(DATA)
+        self.queries = QueryCache(self.sudoobj, maxsize=16)
+
+    def test_lookup(self) -> None:
+        """Repeated questions are answered from the cache."""
+        assert self.queries.can("alice", "web1", "/usr/bin/top")
+        assert self.queries.can("alice", "web1", "/usr/bin/top")
+        assert not self.queries.can("carol", "web1", "/usr/bin/top")
+        result = self.queries.lookup("bob", "web1", "/usr/bin/top")
+        assert result is not None
+        assert result["rule"] == 0
+
+        stats = self.queries.stats()
+        assert (stats.hits, stats.misses) == (1, 3)
+
+    def test_results_copied(self) -> None:
+        """Changing a result does not change the cached answer."""
+        result = self.queries.lookup("alice", "web1", "/usr/bin/top")
+        assert result is not None
+        result["allowed"] = False
+        assert self.queries.can("alice", "web1", "/usr/bin/top")
+
+    def test_resolve(self) -> None:
+        """Alias expansions are cached."""
+        assert self.queries.resolve_user("ADMINS") == ["alice", "bob"]
+        assert self.queries.resolve_user("ADMINS") == ["alice", "bob"]
+        assert self.queries.resolve_host("ALL") == ["ALL"]
+        assert self.queries.stats().hits == 1
+
+    def test_invalidation(self) -> None:
+        """Changing the parsed data is seen by the next question."""
+        assert not self.queries.can("carol", "web1", "/usr/bin/top")
+        assert self.queries.resolve_user("OPS") == ["OPS"]
+
+        self.sudoobj.parse_lines(["carol ALL = (root) ALL", "User_Alias OPS = dave"])
+        assert self.queries.can("carol", "web1", "/usr/bin/top")
+        assert self.queries.resolve_user("OPS") == ["dave"]
+        assert self.queries.invalidations == 1
@@ -0,0 +1,209 @@
+"""Define the query server unit tests."""
+
+import asyncio
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from unittest import mock
+
+from pysudoers.querycache import QueryCache
+from pysudoers.server import PolicyServer
+from tests.test_sudoers import TestSudoers
+
+DATA = """\
+User_Alias ADMINS = alice, bob
+Defaults:ADMINS timestamp_timeout=5
+ADMINS ALL = (root) /usr/bin/top
+"""
+
+
+class TestPolicyServer(TestSudoers):
+    """Test answering questions over a Unix domain socket."""
+
+    def setUp(self) -> None:
+        """Set up a sudoers file and a server for it."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp = Path(tmpdir.name)
+        self.sudoers = self.tmp / "sudoers"
+        self.sudoers.write_text(DATA)
+        self.server = PolicyServer(self.sudoers, interval=3600)
+
+    async def _exchange(self, *requests: object) -> list:
+        """Serve the file, send every request at once and return the decoded responses."""
+        socket_path = self.tmp / "sock"
+        serving = asyncio.ensure_future(self.server.serve(socket_path))
+        try:
+            while not socket_path.exists():  # noqa: ASYNC110
+                await asyncio.sleep(0.01)
+            assert socket_path.stat().st_mode & 0o777 == 0o600  # noqa: PLR2004
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(
+                b"".join(
+                    (
+                        request
+                        if isinstance(request, bytes)
+                        else json.dumps(request).encode()
+                    )
+                    + b"\n"
+                    for request in requests
+                )
+            )
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in requests]
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+        return responses
+
+    def test_pipelined(self) -> None:
+        """Pipelined requests are answered in order."""
+        responses = asyncio.run(
+            self._exchange(
+                {
+                    "id": 1,
+                    "op": "can",
+                    "user": "alice",
+                    "host": "web1",
+                    "command": "/usr/bin/top",
+                },
+                {
+                    "id": 2,
+                    "op": "can",
+                    "user": "carol",
+                    "host": "web1",
+                    "command": "/usr/bin/top",
+                },
+                {
+                    "id": 3,
+                    "op": "lookup",
+                    "user": "bob",
+                    "host": "web1",
+                    "command": "/usr/bin/top",
+                },
+                {"id": 4, "op": "resolve", "type": "user", "name": "ADMINS"},
+                {"id": 5, "op": "defaults", "user": "alice", "host": "web1"},
+                {"id": 6, "op": "status"},
+            )
+        )
+        assert [response["id"] for response in responses] == [1, 2, 3, 4, 5, 6]
+        assert responses[0]["result"] is True
+        assert responses[1]["result"] is False
+        assert responses[2]["result"] == {
+            "rule": 0,
+            "command": {"run_as": ["root"], "tags": None, "command": "/usr/bin/top"},
+            "allowed": True,
+        }
+        assert responses[3]["result"] == ["alice", "bob"]
+        assert responses[4]["result"] == {"timestamp_timeout": 5}
+        assert responses[5]["result"]["rules"] == 1
+
+    def test_errors(self) -> None:
+        """Bad requests get an error without closing the connection."""
+        responses = asyncio.run(
+            self._exchange(
+                b"not json",
+                {"id": "a", "op": "explode"},
+                {"id": "b", "op": "can", "user": "alice"},
+                {"id": "c", "op": "resolve", "type": "group", "name": "x"},
+                {"id": "d", "op": "status"},
+            )
+        )
+        assert [response.get("error", "")[:12] for response in responses[:4]] == [
+            "JSONDecodeEr",
+            "ValueError: ",
+            "missing argu",
+            "ValueError: ",
+        ]
+        assert "result" in responses[4]
+
+    def test_internal_key_error(self) -> None:
+        """A KeyError raised while answering is not reported as a missing argument."""
+        request = {"op": "can", "user": "alice", "host": "web1", "command": "/bin/ls"}
+        with mock.patch.object(QueryCache, "can", side_effect=KeyError("user")):
+            (response,) = asyncio.run(self._exchange(request))
+        assert response["error"] == "KeyError: 'user'"
+
+    def test_reload(self) -> None:
+        """A changed file is parsed again and published, a broken one is ignored."""
+
+        async def run() -> tuple:
+            old = self.server.snapshot
+            assert not await self.server.reload()
+
+            self.sudoers.write_text(DATA + "carol ALL = ALL\n")
+            os.utime(self.sudoers, ns=(1, 1))
+            assert await self.server.reload()
+            new = self.server.snapshot
+            # The policy is built by the reload, not by the first question
+            assert new.queries._policy is not None
+
+            self.sudoers.write_text(DATA + "User_Alias ADMINS = dave\n")
+            os.utime(self.sudoers, ns=(2, 2))
+            assert not await self.server.reload()
+            return old, new
+
+        old, new = asyncio.run(run())
+        assert old.queries.can("alice", "web1", "/usr/bin/top")
+        assert not old.queries.can("carol", "web1", "/usr/bin/top")
+        assert new.queries.can("carol", "web1", "/usr/bin/top")
+        assert self.server.snapshot is new
+        assert self.server.reloads == 1
+
+    def test_watch(self) -> None:
+        """A file that fails to reload keeps being watched, and its next good version is published."""
+        self.server.interval = 0.01
+
+        async def wait_for(condition: Callable[[], object]) -> None:
+            for _ in range(500):
+                if condition():
+                    return
+                await asyncio.sleep(0.01)
+
+        async def run() -> bool:
+            watching = asyncio.ensure_future(self.server.watch())
+            try:
+                self.sudoers.write_text(DATA + "Defaults:bob\n")
+                os.utime(self.sudoers, ns=(1, 1))
+                await asyncio.sleep(0.1)
+                assert not watching.done()
+                assert self.server.reloads == 0
+
+                self.sudoers.write_text(DATA + "carol ALL = ALL\n")
+                os.utime(self.sudoers, ns=(2, 2))
+                await wait_for(lambda: self.server.reloads)
+                return watching.done()
+            finally:
+                watching.cancel()
+                await asyncio.gather(watching, return_exceptions=True)
+
+        assert not asyncio.run(run())
+        assert self.server.reloads == 1
+        assert self.server.snapshot.queries.can("carol", "web1", "/usr/bin/top")
+
+    def test_includes(self) -> None:
+        """Changes to included files are picked up when includes are followed."""
+        (self.tmp / "sudoers.d").mkdir()
+        fragment = self.tmp / "sudoers.d" / "carol"
+        fragment.write_text("carol ALL = ALL\n")
+        self.sudoers.write_text(DATA + "@includedir sudoers.d\n")
+        server = PolicyServer(self.sudoers, follow_includes=True, interval=3600)
+
+        async def run() -> list:
+            changed = [await server.reload()]
+            fragment.write_text("carol ALL = !ALL\n")
+            os.utime(fragment, ns=(1, 1))
+            changed.append(await server.reload())
+            (self.tmp / "sudoers.d" / "dave").write_text("dave ALL = ALL\n")
+            changed.append(await server.reload())
+            return changed
+
+        assert asyncio.run(run()) == [False, True, True]
+        assert not server.snapshot.queries.can("carol", "web1", "/usr/bin/top")
+        assert server.snapshot.queries.can("dave", "web1", "/usr/bin/top")
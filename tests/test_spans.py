@@ -0,0 +1,99 @@
+"""Define the source span unit tests."""
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from pysudoers import Sudoers
+from pysudoers.spans import Span
+from tests.test_sudoers import TestSudoers
+
+DATA = (
+    "# Administrators\r\n"
+    "Defaults env_reset\r\n"
+    "User_Alias ADMINS = alice, bob : OPS = carol\r\n"
+    "  ADMINS ALL = (root) /usr/bin/top, \\\r\n"
+    "      /usr/bin/free  \r\n"
+    "@includedir sudoers.d\r\n"
+)
+
+
+class TestSpans(TestSudoers):
+    """Test recording where each entry was declared."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory holding a sudoers file."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp_path = Path(tmpdir.name).resolve()
+        self.path = self.tmp_path / "sudoers"
+        self.path.write_bytes(DATA.encode())
+
+    def test_file(self) -> None:
+        """Spans count physical lines and bytes of the file, and the text is read from it."""
+        sudoobj = Sudoers(path=self.path)
+        start = DATA.index("ADMINS ALL")
+        end = DATA.index("free") + len("free")
+        assert sudoobj.span("Rule", 0) == Span(self.path, 4, 5, start, end)
+        assert sudoobj.source_text("Rule", 0) == DATA[start:end]
+        assert sudoobj.span("User_Alias", "OPS") == sudoobj.span("User_Alias", "ADMINS")
+        span = sudoobj.span("User_Alias", "OPS")
+        assert span is not None
+        assert span.line == 3  # noqa: PLR2004
+        assert sudoobj.source_text("Defaults", -1) == "Defaults env_reset"
+        assert sudoobj.source_text("Include", 0) == "@includedir sudoers.d"
+        assert sudoobj.span("Rule", 1) is None
+        assert sudoobj.span("Host_Alias", "ADMINS") is None
+
+    def test_strings(self) -> None:
+        """The text is sliced from the parsed string, which is not pickled."""
+        sudoobj = Sudoers.from_string(DATA)
+        sudoobj.parse_line("  carol ALL = ALL")
+        span = sudoobj.span("Rule", 0)
+        assert span is not None
+        assert span.path is None
+        assert sudoobj.source_text("Rule", 0) == Sudoers(path=self.path).source_text(
+            "Rule", 0
+        )
+        assert sudoobj.span("Rule", 1) == Span(None, 1, 1, 2, 17)
+        assert sudoobj.source_text("Rule", 1) == "carol ALL = ALL"
+
+        copy = Sudoers._from_data(pickle.loads(pickle.dumps(sudoobj._data)))  # noqa: S301
+        assert copy.span("Rule", 0) == sudoobj.span("Rule", 0)
+        assert copy.source_text("Rule", 0) is None
+
+    def test_includes(self) -> None:
+        """Entries of included files have spans in those files."""
+        (self.tmp_path / "sudoers.d").mkdir()
+        child = self.tmp_path / "sudoers.d" / "child"
+        child.write_text("\ndave ALL = ALL\n")
+        self.path.write_bytes((DATA + "erin ALL = ALL\n").encode())
+
+        sudoobj = Sudoers(path=self.path, follow_includes=True)
+        assert [rule["users"] for rule in sudoobj.rules] == [
+            ["ADMINS"],
+            ["dave"],
+            ["erin"],
+        ]
+        assert sudoobj.span("Rule", 1) == Span(child, 2, 2, 1, 15)
+        assert sudoobj.source_text("Rule", 2) == "erin ALL = ALL"
+        span = sudoobj.span("Include", 0)
+        assert span is not None
+        assert span.path == self.path
+
+    def test_reload(self) -> None:
+        """Edits that only move entries publish their new spans."""
+        sudoobj = Sudoers(path=self.path)
+        self.path.write_bytes(b"# A new comment\n" + DATA.encode())
+        os.utime(self.path, ns=(1, 1))
+
+        assert not sudoobj.reload()
+        span = sudoobj.span("Rule", 0)
+        assert span is not None
+        assert span.line == 5  # noqa: PLR2004
+        text = sudoobj.source_text("Rule", 0)
+        assert text is not None
+        assert text.startswith("ADMINS ALL")
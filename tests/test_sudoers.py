@@ -2,6 +2,8 @@
 # Don't warn about things that happen as that is part of unit testing
 # pylint: disable=protected-access
 
+import mmap
+import tempfile
 from pathlib import Path
 from textwrap import dedent
 from unittest import mock
@@ -10,11 +12,16 @@ import pytest
 from testtools import TestCase
 
 from pysudoers import (
+    AliasTable,
     BadAliasExceptionError,
+    BadIncludeExceptionError,
     BadRuleExceptionError,
+    CyclicAliasExceptionError,
     DuplicateAliasExceptionError,
+    Entry,
     Sudoers,
 )
+from pysudoers.stats import ParseStats
 
 
 class TestSudoers(TestCase):
@@ -120,7 +127,7 @@ class TestInit(TestSudoers):
         mopen = self.get_mock_open()
         with mock.patch.object(Path, "open", mopen) as mock_file:
             sudoobj = Sudoers(path=self.fake_path)
-            mock_file.assert_called_with(encoding="ascii")
+            mock_file.assert_called_with(encoding="ascii", newline="")
 
             # Check all the internal values
             assert sudoobj.path == self.fake_path
@@ -131,7 +138,7 @@ class TestInit(TestSudoers):
         mopen = self.get_mock_open()
         with mock.patch.object(Path, "open", mopen) as mock_file:
             sudoobj = Sudoers(path=self.fake_path)
-            mock_file.assert_called_with(encoding="ascii")
+            mock_file.assert_called_with(encoding="ascii", newline="")
 
             # Check all the internal values
             for alias in sudoobj.ALIAS_TYPES:
@@ -198,6 +205,133 @@ class TestInit(TestSudoers):
         assert sudoobj._data["Rules"] == self.test_correct_rules
 
 
+class TestConstructors(TestSudoers):
+    """Test the alternate constructors that do not read from disk."""
+
+    def setUp(self) -> None:
+        """Set up class-wide variables and mocks."""
+        super().setUp()
+
+        self.test_correct_data = self.test_correct_file.read_text(encoding="ascii")
+
+    def test_from_string(self) -> None:
+        """Parsing a string gives the same result as parsing the file."""
+        sudoobj = Sudoers.from_string(self.test_correct_data)
+        assert sudoobj.path is None
+        assert sudoobj._data == Sudoers(path=self.test_correct_file)._data
+
+    def test_from_string_crlf(self) -> None:
+        """Windows line endings are handled like when reading a file."""
+        sudoobj = Sudoers.from_string(self.test_correct_data.replace("\n", "\r\n"))
+        assert sudoobj.rules == self.test_correct_rules
+
+    def test_from_lines(self) -> None:
+        """Parsing lines gives the same result as parsing the file, the path is kept."""
+        lines = self.test_correct_data.splitlines()
+        sudoobj = Sudoers.from_lines(lines, path=self.test_correct_file)
+        assert sudoobj.path == self.test_correct_file
+        assert sudoobj.rules == self.test_correct_rules
+        assert sudoobj.user_aliases["SOMEUSERS"] == Sudoers(path=self.test_correct_file).user_aliases["SOMEUSERS"]
+
+    def test_from_bytes(self) -> None:
+        """Parsing bytes, memoryviews and mmaps gives the same result as parsing the file."""
+        data = self.test_correct_data.encode("ascii")
+        assert Sudoers.from_bytes(data).rules == self.test_correct_rules
+        assert Sudoers.from_bytes(memoryview(data)).rules == self.test_correct_rules
+
+        with self.test_correct_file.open("rb") as sudo, mmap.mmap(sudo.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert Sudoers.from_bytes(mapped).rules == self.test_correct_rules
+
+    def test_from_bytes_encoding(self) -> None:
+        """Non-ascii data needs the right encoding."""
+        data = "User_Alias NAMES=j\u00fcrgen\n".encode()
+        with pytest.raises(UnicodeDecodeError):
+            _ = Sudoers.from_bytes(data)
+        assert Sudoers.from_bytes(data, encoding="utf-8").user_aliases == {"NAMES": ["j\u00fcrgen"]}
+
+
+class TestIterEntries(TestSudoers):
+    """Test streaming the entries of a file."""
+
+    def test_parsed_file(self) -> None:
+        """Streaming gives the same entries as parsing, with their line numbers."""
+        entries = list(Sudoers.iter_entries(self.test_correct_file))
+
+        assert [entry.data for entry in entries if entry.kind == "Rule"] == self.test_correct_rules
+        assert [entry.data for entry in entries if entry.kind == "Defaults"] == [
+            "Defaults !insults",
+            "Defaults:SOMEUSERS !umask",
+        ]
+        assert entries[3] == Entry("User_Alias", ("SOMEUSERS", tuple(f"user{num}" for num in range(1, 8))), 11, 14)
+        assert [
+            (entry.data[0], entry.line, entry.end_line)
+            for entry in entries
+            if entry.kind == "Host_Alias" and isinstance(entry.data, tuple)
+        ] == [
+            ("SOMEHOSTS", 9, 9),
+            ("SPARC", 34, 37),
+            ("SGI", 34, 37),
+            ("ALPHA", 34, 37),
+            ("HPPA", 34, 37),
+        ]
+
+    def test_lines_and_includes(self) -> None:
+        """Streaming accepts lines and records the position of includes."""
+        lines = ["user1 ALL=ALL", "", "@includedir /etc/sudoers.d", "Defaults !insults"]
+        entries = list(Sudoers.iter_entries(lines))
+
+        assert entries[1] == Entry(
+            "Include",
+            {"directive": "includedir", "path": "/etc/sudoers.d", "rules": 1, "defaults": 0},
+            3,
+            3,
+        )
+        assert entries[2] == Entry("Defaults", "Defaults !insults", 4, 4)
+
+    def test_lazy(self) -> None:
+        """Entries are yielded before the rest of the file is parsed."""
+        entries = Sudoers.iter_entries(["user1 ALL=ALL", "not a rule"])
+
+        assert next(entries).kind == "Rule"
+        with pytest.raises(BadRuleExceptionError):
+            next(entries)
+
+
+class TestStats(TestSudoers):
+    """Test the parse instrumentation."""
+
+    def test_counts_and_timings(self) -> None:
+        """Every kind of line is counted and timed, and the slowest lines are kept."""
+        entries = []
+        stats = ParseStats(slowest=2, callback=entries.append)
+        sudoobj = Sudoers(path=self.test_correct_file, stats=stats)
+
+        assert sudoobj.stats is stats
+        assert stats.counts == {
+            "Defaults": 2,
+            "Host_Alias": 2,
+            "User_Alias": 1,
+            "Runas_Alias": 1,
+            "Cmnd_Alias": 1,
+            "Rule": 5,
+        }
+        assert stats.continued == 3  # noqa: PLR2004
+        assert all(stats.times[phase] > 0 for phase in ("read", "parse_alias", "parse_rule", "parse_commands"))
+        assert stats.times["parse_commands"] <= stats.times["parse_rule"]
+        assert len(stats.slowest) == 2  # noqa: PLR2004
+        assert stats.slowest[0][0] >= stats.slowest[1][0]
+        assert stats.as_dict()["counts"]["Rule"] == 5  # noqa: PLR2004
+        assert [entry.kind for entry in entries].count("Host_Alias") == 5  # noqa: PLR2004
+        assert Entry("Rule", sudoobj.rules[0], 21, 21) in entries
+
+    def test_disabled(self) -> None:
+        """Without statistics nothing is gathered and lines are not logged unless debugging."""
+        with mock.patch("pysudoers.LOGGER.debug") as debug:
+            sudoobj = Sudoers.from_string("root ALL=ALL\n")
+        assert sudoobj.stats is None
+        debug.assert_not_called()
+
+
 class TestProperties(TestSudoers):
     """Test the class properties."""
 
@@ -329,6 +463,30 @@ class TestParser(TestSudoers):
             sudoobj = Sudoers(path=self.fake_path)
             assert sudoobj.cmnd_aliases == result
 
+    def test_escaped_split_method(self) -> None:
+        """escaped_split keeps escaped delimiters and honors maxsplit."""
+        assert Sudoers.escaped_split(r"a\,b,c,d", ",") == [r"a\,b", "c", "d"]
+        assert Sudoers.escaped_split(r"a\\,b", ",") == ["a\\\\", "b"]
+        assert Sudoers.escaped_split("a=b=c", "=", maxsplit=1) == ["a", "b=c"]
+        assert Sudoers.escaped_split("a,b,", ",") == ["a", "b"]
+        assert Sudoers.escaped_split("a,b", ",", maxsplit=0) == ["a,b"]
+
+    def test_escaped_comma_command(self) -> None:
+        """Escaped commas do not split commands, commas in a run as list do not either."""
+        cmds = Sudoers.parse_commands(r"(root,ALL:wheel) /bin/a x\,y,/bin/b")
+        assert cmds == [
+            {"run_as": ["root", "ALL", "wheel"], "tags": None, "command": "/bin/a x,y"},
+            {"run_as": ["root", "ALL", "wheel"], "tags": None, "command": "/bin/b"},
+        ]
+
+    def test_continuation_at_eof(self) -> None:
+        """A continuation on the last line of the file will not cause an exception."""
+        data = "User_Alias SOMEUSERS=user1, \\\n"
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            sudoobj = Sudoers(path=self.fake_path)
+            assert sudoobj.user_aliases == {"SOMEUSERS": ["user1"]}
+
     def test_hash_include(self) -> None:
         """An include with a hash will not cause an exception."""
         # Find the path to the test sudoers file
@@ -361,6 +519,334 @@ class TestParser(TestSudoers):
         with mock.patch.object(Path, "open", mopen):
             _ = Sudoers(path=self.fake_path)
 
+    def test_parse_line(self) -> None:
+        """Lines parsed one at a time add to one working copy of the data, and a bad line changes nothing."""
+        sudoobj = Sudoers.from_string("User_Alias ADMINS = alice\n")
+        before = sudoobj.snapshot()
+        sudoobj.parse_line("bob ALL = ALL")
+        with mock.patch.object(Sudoers, "_working_data", wraps=sudoobj._working_data) as working:
+            sudoobj.parse_line("carol ALL = ALL")
+            sudoobj.parse_line("User_Alias OPS = dave")
+            with pytest.raises(DuplicateAliasExceptionError):
+                sudoobj.parse_line("User_Alias STAFF = erin : ADMINS = frank")
+        working.assert_not_called()
+
+        assert [rule["users"] for rule in sudoobj.rules] == [["bob"], ["carol"]]
+        assert sudoobj.resolve_user("ADMINS") == ["alice"]
+        assert sudoobj.resolve_user("OPS") == ["dave"]
+        assert "STAFF" not in sudoobj.user_aliases
+        assert before.rules == []
+
+
+class TestIncludes(TestSudoers):
+    """Test following include directives."""
+
+    def setUp(self) -> None:
+        """Set up a temporary directory to hold the sudoers files."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp_path = Path(tmpdir.name).resolve()
+
+    def write(self, name: str, data: str) -> Path:
+        """Write a sudoers file into the temporary directory."""
+        path = self.tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(dedent(data), encoding="ascii")
+        return path
+
+    def test_includes_recorded(self) -> None:
+        """Include directives are recorded with their position when not followed."""
+        data = """
+        Defaults !insults
+        user1 ALL=ALL
+        @includedir /test/dir
+        #include /test/file
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            sudoobj = Sudoers(path=self.fake_path)
+            assert sudoobj.rules == [{"users": ["user1"], "hosts": ["ALL"], "commands": mock.ANY}]
+            assert sudoobj.includes == [
+                {"directive": "includedir", "path": "/test/dir", "rules": 1, "defaults": 1},
+                {"directive": "include", "path": "/test/file", "rules": 1, "defaults": 1},
+            ]
+
+    def test_includedir_order(self) -> None:
+        """Included files are merged in sudo's order, skipping backup and dotted files."""
+        self.write("sudoers.d/20-second", "user2 ALL=ALL\nUser_Alias SECOND=user4\n")
+        self.write("sudoers.d/10-first", "Cmnd_Alias FIRST=/bin/first\nuser1 ALL=FIRST\n")
+        self.write("sudoers.d/30-skipped~", "skipped ALL=ALL\n")
+        self.write("sudoers.d/40.skipped", "skipped ALL=ALL\n")
+        main = self.write(
+            "sudoers",
+            """
+            Defaults !insults
+            root ALL=ALL
+            @includedir sudoers.d
+            user3 ALL=ALL
+            """,
+        )
+
+        sudoobj = Sudoers(path=main, follow_includes=True)
+        assert [rule["users"] for rule in sudoobj.rules] == [["root"], ["user1"], ["user2"], ["user3"]]
+        assert sudoobj.resolve_command("FIRST") == ["/bin/first"]
+        assert sudoobj.resolve_user("SECOND") == ["user4"]
+        assert sudoobj.includes[0]["files"] == [
+            self.tmp_path / "sudoers.d" / "10-first",
+            self.tmp_path / "sudoers.d" / "20-second",
+        ]
+
+    def test_nested_include_processes(self) -> None:
+        """Nested includes are resolved when parsing in a process pool."""
+        self.write("nested", "nested ALL=ALL\n")
+        self.write("child", "#include nested\nchild ALL=ALL\n")
+        main = self.write("sudoers", "@include child\nroot ALL=ALL\n")
+
+        sudoobj = Sudoers(path=main, follow_includes=True, max_workers=2, use_processes=True)
+        assert [rule["users"] for rule in sudoobj.rules] == [["nested"], ["child"], ["root"]]
+
+    def test_duplicate_alias_across_files(self) -> None:
+        """An alias declared in two files will raise an exception."""
+        self.write("child", "Host_Alias SOMEHOSTS=host3\n")
+        main = self.write("sudoers", "Host_Alias SOMEHOSTS=host1\n@include child\n")
+
+        with pytest.raises(DuplicateAliasExceptionError):
+            _ = Sudoers(path=main, follow_includes=True)
+
+    def test_include_loop(self) -> None:
+        """A file that includes itself will raise an exception."""
+        main = self.write("sudoers", "@include sudoers\n")
+
+        with pytest.raises(BadIncludeExceptionError):
+            _ = Sudoers(path=main, follow_includes=True)
+
+
+class TestParallel(TestSudoers):
+    """Test parsing chunks of a file in a process pool."""
+
+    DATA = dedent(
+        """\
+        # A comment ending with a backslash \\
+        Defaults env_reset
+        Host_Alias WEBSERVERS = web1, \\
+            web2, \\
+            web3
+        User_Alias ADMINS = alice, bob
+        ADMINS WEBSERVERS = (root) NOPASSWD: /usr/bin/top, \\
+
+        bob ALL = ALL
+        @includedir /etc/sudoers.d
+        carol ALL = (ALL : ALL) ALL
+        """
+    )
+
+    def setUp(self) -> None:
+        """Set up a temporary directory and chunks small enough to split the test data."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp_path = Path(tmpdir.name)
+        patcher = mock.patch.object(Sudoers, "PARALLEL_CHUNK_SIZE", 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, data: str) -> Path:
+        """Write a sudoers file into the temporary directory."""
+        path = self.tmp_path / "sudoers"
+        path.write_text(data, encoding="ascii")
+        return path
+
+    def test_chunk_bounds(self) -> None:
+        """Chunks cover the whole file and never end inside a continued line."""
+        data = self.DATA.encode()
+        bounds = Sudoers.chunk_bounds(data, 16)
+        assert len(bounds) > 1
+        assert [start for start, _ in bounds[1:]] == [end for _, end in bounds[:-1]]
+        assert (bounds[0][0], bounds[-1][1]) == (0, len(data))
+        for _, end in bounds[:-1]:
+            assert not data[:end].splitlines()[-1].rstrip().endswith(b"\\")
+
+    def test_same_as_serial(self) -> None:
+        """A parallel parse stores the same entries in the same order as a serial one."""
+        path = self.write(self.DATA)
+        serial = Sudoers(path=path)
+        parallel = Sudoers(path=path, parallel=True, max_workers=2)
+
+        assert parallel._data == serial._data
+        assert parallel._lines == serial._lines
+        assert parallel.span("Rule", 1) == serial.span("Rule", 1)
+        assert [rule["users"] for rule in parallel.rules] == [["ADMINS"], ["bob"], ["carol"]]
+        assert parallel.resolve_host("WEBSERVERS") == ["web1", "web2", "web3"]
+        assert parallel.includes[0]["rules"] == 2  # noqa: PLR2004
+        assert not parallel.reload()
+
+    def test_errors_in_order(self) -> None:
+        """The first error in file order is raised, even when a later chunk fails to parse."""
+        path = self.write(self.DATA + "User_Alias ADMINS = dave\nHost_Alias = bad\n")
+        with pytest.raises(DuplicateAliasExceptionError):
+            _ = Sudoers(path=path, parallel=True)
+
+        path = self.write(self.DATA + "Host_Alias = bad\nUser_Alias ADMINS = dave\n")
+        with pytest.raises(BadRuleExceptionError):
+            _ = Sudoers(path=path, parallel=True)
+
+
+class TestNonStrict(TestSudoers):
+    """Test recording parse errors instead of raising them."""
+
+    DATA = dedent(
+        """\
+        User_Alias ADMINS = alice, bob
+        alice ALL = ALL
+        not a rule
+        User_Alias OPS = carol : ADMINS = dave
+        User_Alias
+        bob ALL = ALL
+        """
+    )
+
+    def test_errors(self) -> None:
+        """Every bad line is recorded with its location and the rest of the file is parsed."""
+        sudoobj = Sudoers.from_string(self.DATA, strict=False)
+        assert [rule["users"] for rule in sudoobj.rules] == [["alice"], ["bob"]]
+        assert sudoobj.resolve_user("OPS") == ["carol"]
+        assert sudoobj.resolve_user("ADMINS") == ["alice", "bob"]
+        assert [(error.error, error.span.line) for error in sudoobj.errors] == [
+            ("BadRuleExceptionError", 3),
+            ("DuplicateAliasExceptionError", 4),
+            ("BadAliasExceptionError", 5),
+        ]
+        assert sudoobj.errors[0].as_dict() == {
+            "error": "BadRuleExceptionError",
+            "message": "invalid rule: not a rule",
+            "path": None,
+            "line": 3,
+            "end_line": 3,
+            "start": 47,
+            "end": 57,
+        }
+
+        sudoobj.parse_line("User_Alias OPS = erin")
+        assert len(sudoobj.errors) == 4  # noqa: PLR2004
+        with pytest.raises(BadRuleExceptionError):
+            _ = Sudoers.from_string(self.DATA)
+
+    def test_parallel(self) -> None:
+        """A parallel parse records the same errors as a serial one."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = Path(tmpdir.name) / "sudoers"
+        path.write_text(self.DATA * 2)
+
+        serial = Sudoers(path=path, strict=False)
+        with mock.patch.object(Sudoers, "PARALLEL_CHUNK_SIZE", 16):
+            parallel = Sudoers(path=path, parallel=True, strict=False)
+        assert parallel.errors == serial.errors
+        assert len(parallel.errors) == 8  # noqa: PLR2004
+        assert parallel.rules == serial.rules
+
+    def test_includes(self) -> None:
+        """Errors in included files, duplicates across files and include loops are recorded."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        tmp_path = Path(tmpdir.name).resolve()
+        (tmp_path / "child").write_text("User_Alias ADMINS = erin\nbroken\n@include sudoers\ncarol ALL = ALL\n")
+        main = tmp_path / "sudoers"
+        main.write_text("User_Alias ADMINS = alice\n@include child\nalice ALL = ALL\n")
+
+        sudoobj = Sudoers(path=main, follow_includes=True, strict=False)
+        assert [rule["users"] for rule in sudoobj.rules] == [["carol"], ["alice"]]
+        assert [(error.error, error.span.path.name, error.span.line) for error in sudoobj.errors] == [
+            ("BadRuleExceptionError", "child", 2),
+            ("DuplicateAliasExceptionError", "child", 1),
+            ("BadIncludeExceptionError", "child", 3),
+        ]
+
+    def test_unreadable_includes(self) -> None:
+        """Included files that cannot be read are recorded where they are included, a missing directory is skipped."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        tmp_path = Path(tmpdir.name).resolve()
+        (tmp_path / "sudoers.d").mkdir()
+        (tmp_path / "sudoers.d" / "binary").write_bytes(b"\xff ALL = ALL\n")
+        (tmp_path / "sudoers.d" / "carol").write_text("carol ALL = ALL\n")
+        main = tmp_path / "sudoers"
+        main.write_text("#include missing\n#includedir sudoers.d\n#includedir nowhere\nalice ALL = ALL\n")
+
+        sudoobj = Sudoers(path=main, follow_includes=True, strict=False)
+        assert [rule["users"] for rule in sudoobj.rules] == [["carol"], ["alice"]]
+        assert [(error.error, error.span.path.name, error.span.line) for error in sudoobj.errors] == [
+            ("FileNotFoundError", "sudoers", 1),
+            ("UnicodeDecodeError", "sudoers", 2),
+        ]
+        with pytest.raises(FileNotFoundError):
+            Sudoers(path=main, follow_includes=True)
+
+
+class TestReload(TestSudoers):
+    """Test reloading a changed file."""
+
+    def setUp(self) -> None:
+        """Set up a parsed sudoers file in a temporary directory."""
+        super().setUp()
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp_path = Path(tmpdir.name).resolve()
+        self.main = self.write("sudoers", "User_Alias ADMINS=alice, bob\n# A comment\nADMINS ALL=ALL\ncarol ALL=/bin/ls\n")
+        self.sudoobj = Sudoers(path=self.main)
+
+    write = TestIncludes.write
+
+    def test_unchanged(self) -> None:
+        """An untouched file is not read, a file with changed comments is not parsed."""
+        with mock.patch.object(Path, "open") as mopen:
+            assert not self.sudoobj.reload()
+        mopen.assert_not_called()
+
+        self.main.write_text(self.main.read_text().replace("A comment", "Another comment"))
+        with mock.patch.object(Sudoers, "_parse_entries") as parse:
+            assert not self.sudoobj.reload()
+        parse.assert_not_called()
+
+    def test_changed_line(self) -> None:
+        """Only the changed lines are parsed, unchanged alias tables are kept."""
+        aliases = self.sudoobj.user_aliases
+        self.main.write_text(self.main.read_text().replace("/bin/ls", "/bin/cat") + "dave ALL=ALL\n")
+        with mock.patch.object(Sudoers, "_parse_entries", wraps=Sudoers._parse_entries) as parse:
+            assert self.sudoobj.reload()
+        assert parse.call_count == 2  # noqa: PLR2004
+        assert [rule["users"] for rule in self.sudoobj.rules] == [["ADMINS"], ["carol"], ["dave"]]
+        assert self.sudoobj.rules[1]["commands"][0]["command"] == "/bin/cat"
+        assert self.sudoobj.user_aliases is aliases
+
+    def test_bad_change(self) -> None:
+        """A change that does not parse leaves the object as it was."""
+        rules = self.sudoobj.rules
+        self.main.write_text(self.main.read_text() + "User_Alias ADMINS=eve\n")
+        with pytest.raises(DuplicateAliasExceptionError):
+            self.sudoobj.reload()
+        assert self.sudoobj.rules is rules
+
+    def test_includes(self) -> None:
+        """Included files are read again when includes were followed."""
+        self.write("child", "child ALL=ALL\n")
+        main = self.write("main", "root ALL=ALL\n@include child\n")
+        sudoobj = Sudoers(path=main, follow_includes=True)
+
+        self.write("child", "other ALL=ALL\n")
+        main.write_text("root ALL=ALL\n@include child\nlast ALL=ALL\n")
+        assert sudoobj.reload()
+        assert [rule["users"] for rule in sudoobj.rules] == [["root"], ["other"], ["last"]]
+
+    def test_no_path(self) -> None:
+        """Data that was not read from a file cannot be reloaded."""
+        with pytest.raises(ValueError, match="cannot reload"):
+            Sudoers.from_string("root ALL=ALL\n").reload()
+
 
 class TestResolution(TestSudoers):
     """Test the alias resolution methods."""
@@ -439,3 +925,46 @@ class TestResolution(TestSudoers):
             assert host_res == ["host1", "host2", "host3"]
             assert runas_res == ["user1", "user2"]
             assert user_res == ["user3", "user4"]
+
+    def test_cycle(self) -> None:
+        """Test resolving an alias that is a member of itself raises an exception."""
+        data = """
+        User_Alias FIRST=user1, SECOND
+        User_Alias SECOND=user2, THIRD
+        User_Alias THIRD=FIRST
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            sudoobj = Sudoers(path=self.fake_path)
+            with pytest.raises(CyclicAliasExceptionError):
+                sudoobj.resolve_user("FIRST")
+            assert sudoobj.resolve_user("user1") == ["user1"]
+
+    def test_invalidation(self) -> None:
+        """Test changing an alias table invalidates memoized resolutions."""
+        data = """
+        Host_Alias ALLHOSTS=WEB, DB, host1
+        Host_Alias WEB=host1, host2
+        Host_Alias DB=host3
+        """
+        mopen = self.get_mock_open(data)
+        with mock.patch.object(Path, "open", mopen):
+            sudoobj = Sudoers(path=self.fake_path)
+            assert sudoobj.resolve_host("ALLHOSTS") == ["host1", "host2", "host3"]
+
+            # The returned list is a copy of the memoized expansion
+            sudoobj.resolve_host("ALLHOSTS").append("host9")
+            assert sudoobj.resolve_host("ALLHOSTS") == ["host1", "host2", "host3"]
+
+            # Published tables are read-only, copies of them can be changed
+            with pytest.raises(TypeError):
+                sudoobj.host_aliases["DB"] = ["host4", "host5"]
+            table = AliasTable(sudoobj.host_aliases)
+            assert table.closure("ALLHOSTS") == ("host1", "host2", "host3")
+
+            table["DB"] = ["host4", "host5"]
+            assert table.closure("ALLHOSTS") == ("host1", "host2", "host4", "host5")
+
+            del table["WEB"]
+            assert table.closure("ALLHOSTS") == ("WEB", "host4", "host5", "host1")
+            assert sudoobj.resolve_host("ALLHOSTS") == ["host1", "host2", "host3"]